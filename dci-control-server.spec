@@ -30,7 +30,7 @@ BuildRequires:  python3-tornado
 BuildRequires:  python3-werkzeug
 BuildRequires:  python3-zmq
 BuildRequires:  python3-jwt
-BuildRequires:  python3-dciauth
+BuildRequires:  (python3-dciauth >= 4.0.1 with python3-dciauth < 4.0.2)
 BuildRequires:  python3-pytest
 BuildRequires:  python3-rpm-macros
 BuildRequires:  python3-jsonschema
@@ -50,11 +50,12 @@ Requires:       python3-tornado
 Requires:       python3-werkzeug
 Requires:       python3-zmq
 Requires:       python3-jwt
-Requires:       python3-dciauth
+Requires:       (python3-dciauth >= 4.0.1 with python3-dciauth < 4.0.2)
 Requires:       python3-jsonschema
 Requires:       python3-pytz
 Requires:       python3-boto3
 Requires:       python3-pyparsing
+Requires:       python3-prometheus_client
 Requires:       zeromq
 %{?systemd_requires}
 
@@ -37,6 +37,7 @@ def index():
 import dci.api.v1.analytics  # noqa
 import dci.api.v1.audits  # noqa
 import dci.api.v1.base  # noqa
+import dci.api.v1.caches  # noqa
 import dci.api.v1.components  # noqa
 import dci.api.v1.feeders  # noqa
 import dci.api.v1.files  # noqa
@@ -45,8 +46,10 @@ import dci.api.v1.jobs  # noqa
 import dci.api.v1.jobstates  # noqa
 import dci.api.v1.jobs_events  # noqa
 import dci.api.v1.jobs_kv  # noqa
+import dci.api.v1.messaging  # noqa
 import dci.api.v1.products  # noqa
 import dci.api.v1.pipelines  # noqa
+import dci.api.v1.pool  # noqa
 import dci.api.v1.remotecis  # noqa
 import dci.api.v1.stats  # noqa
 import dci.api.v1.teams  # noqa
@@ -27,6 +27,7 @@ from dci.common.schemas import check_and_get_args
 
 @api.route("/audits", methods=["GET"])
 @decorators.login_required
+@decorators.primary_database
 def get_logs(user):
     args = check_and_get_args(flask.request.args.to_dict())
 
@@ -34,17 +35,18 @@ def get_logs(user):
     if user.is_not_super_admin():
         raise dci_exc.Unauthorized()
 
+    # the entries buffered by this worker are written with the request
+    # connection, on the primary, before being read. The ones buffered by
+    # the other workers show up once they flush them, within
+    # AUDIT_LOG_FLUSH_INTERVAL
+    flask.g.audit_log.flush(flask.g.session)
+
     query = declarative.handle_args(query, models2.Log, args)
-    nb_logs = query.count()
-    query = declarative.handle_pagination(query, args)
-
-    audits = [
-        {
-            "id": audit.id,
-            "created_at": audit.created_at,
-            "user_id": audit.user_id,
-            "action": audit.action,
-        }
-        for audit in query.all()
-    ]
-    return flask.jsonify({"audits": audits, "_meta": {"count": nb_logs}})
+    meta = declarative.get_count_meta(query, args)
+    query = declarative.handle_pagination(query, args, models2.Log)
+
+    fields = args.get("fields") or ["id", "created_at", "user_id", "action"]
+    audits = [{f: getattr(audit, f) for f in fields} for audit in query.all()]
+    if "cursor" in args:
+        meta["next_cursor"] = declarative.get_next_cursor(query, args, models2.Log)
+    return flask.jsonify({"audits": audits, "_meta": meta})
@@ -15,11 +15,35 @@
 # under the License.
 
 import flask
+import logging
 
 from sqlalchemy import orm
 from sqlalchemy import exc
 from dci.common import exceptions as dci_exc
 from dci.common import utils
+from dci.db import cache_generation
+
+logger = logging.getLogger(__name__)
+
+# placeholder of the list which jsonify_stream encodes while the response is sent
+STREAMED_LIST = "__dci_streamed_list__"
+# number of rows fetched at once by the streamed queries
+STREAM_YIELD_PER = 100
+# size of the chunks of the streamed responses
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def increment_caches_generation():
+    """Make the other processes clear their cached identities and access
+    decisions, to be called once the change invalidating them is committed
+    and the stale entries of this process are dropped."""
+    try:
+        generation = cache_generation.increment_generation(flask.g.session)
+    except Exception as e:
+        flask.g.session.rollback()
+        logger.error("cannot increment the generation of the caches: %s" % str(e))
+        return
+    flask.g.shared_caches.set_generation(generation)
 
 
 def get_resources_orm(table, filters=[], options=[]):
@@ -57,6 +81,38 @@ def get_resource_orm(table, id, etag=None, options=[]):
         )
 
 
+def get_resource_columns_orm(table, id, columns):
+    """Return only the given columns of the resource, without loading the
+    whole object nor its relationships."""
+    query = flask.g.session.query(*[getattr(table, c) for c in columns])
+    query = query.filter(table.id == id)
+    if hasattr(table, "state"):
+        query = query.filter(table.state != "archived")
+    resource = query.one_or_none()
+    if resource is None:
+        resource_name = table.__tablename__[0:-1]
+        raise dci_exc.DCIException(
+            message="%s not found" % resource_name, status_code=404
+        )
+    return resource
+
+
+def get_not_modified_response(etag):
+    """Return a 304 response if the If-None-Match header of the request
+    matches etag, None otherwise.
+
+    The weak form of etag, sent with the compressed responses, matches too
+    and is then the ETag of the 304."""
+    if_none_match = flask.request.if_none_match
+    if if_none_match.contains(etag):
+        return flask.Response(None, 304, headers={"ETag": etag})
+    if if_none_match.contains_weak(etag):
+        response = flask.Response(None, 304)
+        response.set_etag(etag, weak=True)
+        return response
+    return None
+
+
 def update_resource_orm(resource, data):
     for k, v in data.items():
         setattr(resource, k, v)
@@ -96,6 +152,56 @@ def create_resource_orm(table, data):
         )
 
 
+def jsonify_stream(document, items, headers=None):
+    """Return the same response as flask.jsonify(document) in which the
+    STREAMED_LIST value is replaced by the list of items.
+
+    The items are iterated and encoded one by one while the response is sent
+    in chunks, neither the list nor its json are held in memory. items is
+    usually a generator over query.yield_per(STREAM_YIELD_PER).
+    """
+    app = flask.current_app
+    indent, separators = None, (",", ":")
+    if app.config["JSONIFY_PRETTYPRINT_REGULAR"] or app.debug:
+        indent, separators = 2, (", ", ": ")
+
+    def dumps(obj):
+        return flask.json.dumps(obj, indent=indent, separators=separators)
+
+    head, tail = dumps(document).split(dumps(STREAMED_LIST), 1)
+    newline = ""
+    closing = "]"
+    if indent:
+        line = head[head.rfind("\n") + 1 :]
+        depth = len(line) - len(line.lstrip(" "))
+        newline = "\n" + " " * (depth + indent)
+        closing = "\n" + " " * depth + "]"
+
+    def generate():
+        chunk = [head, "["]
+        size = 0
+        separator = newline
+        for item in items:
+            # json strings never contain a raw new line
+            encoded = dumps(item).replace("\n", newline)
+            chunk.append(separator + encoded)
+            separator = separators[0] + newline
+            size += len(encoded)
+            if size >= STREAM_CHUNK_SIZE:
+                yield "".join(chunk)
+                chunk = []
+                size = 0
+        # an empty list is encoded as []
+        chunk.append((closing if separator != newline else "]") + tail + "\n")
+        yield "".join(chunk)
+
+    return flask.Response(
+        flask.stream_with_context(generate()),
+        headers=headers,
+        mimetype=app.config["JSONIFY_MIMETYPE"],
+    )
+
+
 def get_archived_resources_query(table):
     return flask.g.session.query(table).filter(table.state == "archived")
 
@@ -106,15 +212,11 @@ def get_to_purge_archived_resources(user, table):
     if user.is_not_super_admin():
         raise dci_exc.Unauthorized()
 
-    archived_resources = [
-        r.serialize() for r in get_archived_resources_query(table).all()
-    ]
+    query = get_archived_resources_query(table)
 
-    return flask.jsonify(
-        {
-            table.__tablename__: archived_resources,
-            "_meta": {"count": len(archived_resources)},
-        }
+    return jsonify_stream(
+        {table.__tablename__: STREAMED_LIST, "_meta": {"count": query.count()}},
+        (r.serialize() for r in query.yield_per(STREAM_YIELD_PER)),
     )
 
 
@@ -138,13 +240,10 @@ def get_resources_to_purge_orm(user, table):
         raise dci_exc.Unauthorized()
 
     query = flask.g.session.query(table).filter(table.state == "archived")
-    archived_resources = [resource.serialize() for resource in query.all()]
 
-    return flask.jsonify(
-        {
-            table.__tablename__: archived_resources,
-            "_meta": {"count": len(archived_resources)},
-        }
+    return jsonify_stream(
+        {table.__tablename__: STREAMED_LIST, "_meta": {"count": query.count()}},
+        (r.serialize() for r in query.yield_per(STREAM_YIELD_PER)),
     )
 
 
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import flask
+
+from dci.api.v1 import api
+from dci import decorators
+from dci.common import exceptions as dci_exc
+
+
+@api.route("/caches", methods=["GET"])
+@decorators.login_required
+def get_caches_stats(user):
+    """Returns the hit and miss counters of the in-process caches"""
+    if user.is_not_super_admin():
+        raise dci_exc.Unauthorized()
+
+    return flask.jsonify(
+        {
+            "caches": {
+                "identity": flask.g.identity_cache.stats(),
+                "credentials": flask.g.credentials_cache.stats(),
+                "sso_identity": flask.g.sso_identity_cache.stats(),
+                "components_access": flask.g.components_access_cache.stats(),
+                "topic_access": flask.g.topic_access_cache.stats(),
+            }
+        }
+    )
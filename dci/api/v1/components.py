@@ -14,7 +14,6 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-import io
 import os
 
 import flask
@@ -157,12 +156,20 @@ def get_all_components(user, topics_ids):
         )
 
     query = declarative.handle_args(query, models2.Component, args)
-    nb_components = query.count()
-    query = declarative.handle_pagination(query, args)
-
-    components = [component.serialize() for component in query.all()]
+    meta = declarative.get_count_meta(query, args)
+    query = declarative.handle_pagination(query, args, models2.Component)
+    if "cursor" in args:
+        meta["next_cursor"] = declarative.get_next_cursor(
+            query, args, models2.Component
+        )
 
-    return flask.jsonify({"components": components, "_meta": {"count": nb_components}})
+    return base.jsonify_stream(
+        {"components": base.STREAMED_LIST, "_meta": meta},
+        (
+            c.serialize(fields=args.get("fields"))
+            for c in query.yield_per(base.STREAM_YIELD_PER)
+        ),
+    )
 
 
 @api.route("/components", methods=["GET"])
@@ -175,6 +182,8 @@ def get_components(user):
 @api.route("/components/<uuid:c_id>", methods=["GET"])
 @decorators.login_required
 def get_component_by_id(user, c_id):
+    # no 304 on If-None-Match, the embedded jobs change without the etag of
+    # the component
     component = base.get_resource_orm(
         models2.Component, c_id, options=[sa_orm.selectinload("files")]
     )
@@ -195,12 +204,11 @@ def get_component_by_id(user, c_id):
         )
 
     serialized_component = component.serialize()
-    serialized_component["jobs"] = [j.serialize() for j in component_jobs_query.all()]
-    return flask.Response(
-        json.dumps({"component": serialized_component}),
-        200,
+    serialized_component["jobs"] = base.STREAMED_LIST
+    return base.jsonify_stream(
+        {"component": serialized_component},
+        (j.serialize() for j in component_jobs_query.yield_per(base.STREAM_YIELD_PER)),
         headers={"ETag": serialized_component["etag"]},
-        content_type="application/json",
     )
 
 
@@ -230,15 +238,13 @@ def list_components_files(user, c_id):
         )
     )
 
-    nb_componentfiles = query.count()
+    meta = declarative.get_count_meta(query, args)
 
     query = declarative.handle_args(query, models2.Componentfile, args)
 
-    componentfiles = [cf.serialize() for cf in query.all()]
+    componentfiles = [cf.serialize(fields=args.get("fields")) for cf in query.all()]
 
-    return flask.jsonify(
-        {"component_files": componentfiles, "_meta": {"count": nb_componentfiles}}
-    )
+    return flask.jsonify({"component_files": componentfiles, "_meta": meta})
 
 
 @api.route("/components/<uuid:c_id>/files/<path:filepath>", methods=["GET", "HEAD"])
@@ -296,7 +302,13 @@ def download_component_file(user, c_id, f_id):
 
 @api.route("/components/<uuid:c_id>/files", methods=["POST"])
 @decorators.login_required
+@decorators.streamed_body
 def upload_component_file(user, c_id):
+    with files_utils.spool_streamed_body(flask.g.streamed_body) as body:
+        return _upload_component_file(user, c_id, body)
+
+
+def _upload_component_file(user, c_id, body):
     component = base.get_resource_orm(models2.Component, c_id)
     permissions.verify_access_to_component(user, component)
 
@@ -307,7 +319,7 @@ def upload_component_file(user, c_id):
 
     file_id = utils.gen_uuid()
     file_path = files_utils.build_file_path(component.topic_id, c_id, file_id)
-    store.upload("components", file_path, io.BytesIO(flask.request.data))
+    store.upload("components", file_path, body)
     s_file = store.head("components", file_path)
 
     values = dict.fromkeys(["md5", "mime", "component_id", "name"])
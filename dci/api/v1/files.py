@@ -16,15 +16,9 @@
 import base64
 import datetime
 import gc
-import io
 import xml.etree.ElementTree
 from dci.common.time import get_job_duration
 
-try:
-    from xmlrpclib import ServerProxy
-except ImportError:
-    from xmlrpc.client import ServerProxy
-
 import flask
 from flask import json
 
@@ -33,6 +27,7 @@ from dci.api.v1 import base
 from dci.api.v1 import junit
 from dci import decorators
 from dci.common import exceptions as dci_exc
+from dci.common import lazy
 from dci.common.schemas import (
     check_json_is_valid,
     file_upload_certification_schema,
@@ -51,6 +46,8 @@ from sqlalchemy import exc as sa_exc
 
 logger = logging.getLogger(__name__)
 
+xmlrpc_client = lazy.LazyModule("xmlrpc.client")
+
 
 def get_previous_job_in_topic(job):
     topic_id = job.topic_id
@@ -143,6 +140,7 @@ def get_file_info_from_headers(headers):
 @api.route("/files", methods=["POST"])
 @decorators.log_file_info
 @decorators.login_required
+@decorators.streamed_body
 def create_files(user):
     file_info = get_file_info_from_headers(dict(flask.request.headers))
     values = dict.fromkeys(["md5", "mime", "jobstate_id", "job_id", "name"])
@@ -155,6 +153,11 @@ def create_files(user):
     if values.get("name") is None:
         raise dci_exc.DCIException("HTTP header DCI-NAME must be specified")
 
+    with files_utils.spool_streamed_body(flask.g.streamed_body) as body:
+        return _create_file(user, values, body)
+
+
+def _create_file(user, values, body):
     if values.get("jobstate_id") and values.get("job_id") is None:
         jobstate = base.get_resource_orm(models2.Jobstate, values.get("jobstate_id"))
         values["job_id"] = jobstate.job_id
@@ -171,7 +174,7 @@ def create_files(user):
     file_path = files_utils.build_file_path(job.team_id, values["job_id"], file_id)
 
     store = flask.g.store
-    store.upload("files", file_path, io.BytesIO(flask.request.data))
+    store.upload("files", file_path, body)
     logger.info("store upload %s (%s)" % (values["name"], file_id))
     s_file = store.head("files", file_path)
     logger.info("store head %s (%s)" % (values["name"], file_id))
@@ -228,12 +231,12 @@ def get_all_files(user, job_id):
     )
 
     query = declarative.handle_args(query, models2.File, args)
-    nb_files = query.count()
+    meta = declarative.get_count_meta(query, args)
     query = declarative.handle_pagination(query, args)
 
-    files = [f.serialize() for f in query.all()]
+    files = [f.serialize(fields=args.get("fields")) for f in query.all()]
 
-    return json.jsonify({"files": files, "_meta": {"count": nb_files}})
+    return json.jsonify({"files": files, "_meta": meta})
 
 
 @api.route("/files/<uuid:file_id>", methods=["GET"])
@@ -323,7 +326,7 @@ def upload_certification(user, file_id):
     username = data["username"]
     password = data["password"]
     conf = dci_config.CONFIG
-    proxy = ServerProxy(conf["CERTIFICATION_URL"])
+    proxy = xmlrpc_client.ServerProxy(conf["CERTIFICATION_URL"])
     certification_details = proxy.Cert.getOpenStack_4_7(
         {
             "username": username,
@@ -391,18 +394,16 @@ def get_junit_file(user, file_id):
     prev_job = get_previous_job_in_topic(job)
     previous_testsuites = _get_previous_testsuites(prev_job, file.name)
     previous_job_info = {"id": prev_job.id, "name": prev_job.name} if prev_job else None
-    return flask.Response(
-        json.dumps(
-            {
-                "id": str(file_id),
-                "name": file.name,
-                "job": {"id": job.id, "name": job.name},
-                "previous_job": previous_job_info,
-                "testsuites": junit.update_testsuites_with_testcase_changes(
-                    previous_testsuites, testsuites
-                ),
-            }
-        ),
-        200,
-        content_type="application/json",
+    # jsonify builds a compact document which the app json encoder can
+    # encode with orjson
+    return flask.jsonify(
+        {
+            "id": str(file_id),
+            "name": file.name,
+            "job": {"id": job.id, "name": job.name},
+            "previous_job": previous_job_info,
+            "testsuites": junit.update_testsuites_with_testcase_changes(
+                previous_testsuites, testsuites
+            ),
+        }
     )
@@ -20,6 +20,7 @@ from sqlalchemy import sql
 from dci.api.v1 import api
 from dci.api.v1 import base
 from dci import auth
+from dci import auth_mechanism
 from dci.common import exceptions as dci_exc
 from dci.common.schemas import clean_json_with_schema, update_current_user_schema
 from dci.common import utils
@@ -98,6 +99,7 @@ def put_identity(user):
     except Exception as e:
         flask.g.session.rollback()
         raise dci_exc.DCIException(message=str(e), status_code=409)
+    auth_mechanism.invalidate_user_identities(user.id)
 
     user = base.get_resource_orm(models2.User, user.id)
     user_serialized = user.serialize()
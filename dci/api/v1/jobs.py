@@ -52,6 +52,42 @@ from dci.api.v1 import jobstates
 
 logger = logging.getLogger(__name__)
 
+# loading options of the relationships embedded in the jobs list, all of them
+# are embedded when the embed argument is not given and
+# JOBS_EMBED_ALL_BY_DEFAULT is enabled
+JOBS_EMBED_OPTIONS = {
+    "results": lambda: sa_orm.selectinload("results"),
+    "remoteci": lambda: sa_orm.joinedload("remoteci", innerjoin=True),
+    "components": lambda: sa_orm.selectinload("components"),
+    "topic": lambda: sa_orm.joinedload("topic", innerjoin=True),
+    "team": lambda: sa_orm.joinedload("team", innerjoin=True),
+    "pipeline": lambda: sa_orm.joinedload("pipeline", innerjoin=False),
+    "keys_values": lambda: sa_orm.selectinload("keys_values"),
+}
+
+
+def get_jobs_embed_options(args):
+    """Return the loading options of the relationships listed in the embed
+    argument, the names which are not relationships of the jobs are ignored
+    as they always were."""
+    # the relationships listed in fields are embedded as well
+    embed = args.get("embed", []) + args.get("fields", [])
+    if not embed:
+        if flask.current_app.config["JOBS_EMBED_ALL_BY_DEFAULT"]:
+            return [option() for option in JOBS_EMBED_OPTIONS.values()]
+        return []
+    relationships = models2.Job.__mapper__.relationships
+    options = []
+    for e in set(embed):
+        if e in JOBS_EMBED_OPTIONS:
+            options.append(JOBS_EMBED_OPTIONS[e]())
+        elif e in relationships:
+            if relationships[e].uselist:
+                options.append(sa_orm.selectinload(e))
+            else:
+                options.append(sa_orm.joinedload(e))
+    return options
+
 
 @api.route("/jobs", methods=["POST"])
 @decorators.login_required
@@ -67,6 +103,7 @@ def create_jobs(user):
 
 @api.route("/jobs/schedule", methods=["POST"])
 @decorators.login_required
+@decorators.primary_database
 def schedule_jobs(user):
     """Dispatch jobs to remotecis.
 
@@ -344,25 +381,30 @@ def get_all_jobs(user, topic_id=None):
     # Get only the non archived jobs
     query = query.filter(models2.Job.state != "archived")
     query = query.from_self()
-    query = declarative.handle_args(query, models2.Job, args)
-
-    # Load associated ressources
-    query = (
-        query.options(sa_orm.selectinload("results"))
-        .options(sa_orm.joinedload("remoteci", innerjoin=True))
-        .options(sa_orm.selectinload("components"))
-        .options(sa_orm.joinedload("topic", innerjoin=True))
-        .options(sa_orm.joinedload("team", innerjoin=True))
-        .options(sa_orm.joinedload("pipeline", innerjoin=False))
-        .options(sa_orm.joinedload("keys_values", innerjoin=False))
-    )
 
-    nb_jobs = query.count()
-    query = declarative.handle_pagination(query, args)
+    # Load the associated ressources listed in embed
+    query = query.options(*get_jobs_embed_options(args))
 
-    jobs = [j.serialize(ignore_columns=["data"]) for j in query.all()]
+    # the data of the jobs is only returned when explicitly requested
+    fields = args.get("fields")
+    ignore_columns = []
+    if not fields:
+        ignore_columns = ["data"]
+        query = query.options(sa_orm.defer("data"))
+    query = declarative.handle_args(query, models2.Job, args)
 
-    return flask.jsonify({"jobs": jobs, "_meta": {"count": nb_jobs}})
+    meta = declarative.get_count_meta(query, args)
+    query = declarative.handle_pagination(query, args, models2.Job)
+    if "cursor" in args:
+        meta["next_cursor"] = declarative.get_next_cursor(query, args, models2.Job)
+
+    return base.jsonify_stream(
+        {"jobs": base.STREAMED_LIST, "_meta": meta},
+        (
+            j.serialize(ignore_columns=ignore_columns, fields=fields)
+            for j in query.yield_per(base.STREAM_YIELD_PER)
+        ),
+    )
 
 
 @api.route("/jobs/<uuid:job_id>/components", methods=["GET"])
@@ -412,6 +454,7 @@ def add_component_to_job(user, job_id):
 
     try:
         j.components.append(component)
+        j.etag = utils.gen_etag()
         flask.g.session.add(j)
         flask.g.session.commit()
     except sa_exc.IntegrityError as e:
@@ -437,6 +480,7 @@ def remove_component_from_job(user, job_id, cmpt_id):
 
     try:
         j.components.remove(component)
+        j.etag = utils.gen_etag()
         flask.g.session.add(j)
         flask.g.session.commit()
     # if the component is not present
@@ -472,6 +516,15 @@ def get_job_by_id(user, job_id):
 
     # Get only non archived job
     query = query.filter(models2.Job.state != "archived")
+
+    if flask.request.if_none_match:
+        etag = query.with_entities(models2.Job.etag).scalar()
+        if etag is None:
+            raise dci_exc.DCIException(message="job not found", status_code=404)
+        not_modified = base.get_not_modified_response(etag)
+        if not_modified is not None:
+            return not_modified
+
     query = (
         query.options(sa_orm.joinedload("remoteci", innerjoin=True))
         .options(sa_orm.joinedload("topic", innerjoin=True))
@@ -49,14 +49,14 @@ def get_jobs_events_from_sequence(user, sequence):
     )
 
     query = declarative.handle_args(query, models2.JobEvent, args)
-    nb_jobs_events = query.count()
+    meta = declarative.get_count_meta(query, args)
 
-    query = declarative.handle_pagination(query, args)
-    jobs_events = [je.serialize() for je in query.all()]
+    query = declarative.handle_pagination(query, args, models2.JobEvent)
+    jobs_events = [je.serialize(fields=args.get("fields")) for je in query.all()]
+    if "cursor" in args:
+        meta["next_cursor"] = declarative.get_next_cursor(query, args, models2.JobEvent)
 
-    return json.jsonify(
-        {"jobs_events": jobs_events, "_meta": {"count": nb_jobs_events}}
-    )
+    return json.jsonify({"jobs_events": jobs_events, "_meta": meta})
 
 
 @api.route("/jobs_events/<int:sequence>", methods=["DELETE"])
@@ -86,6 +86,7 @@ def create_event(job_id, status, topic_id=None):
 
 @api.route("/jobs_events/sequence", methods=["GET"])
 @decorators.login_required
+@decorators.primary_database
 def get_current_sequence(user):
     if user.is_not_super_admin():
         raise dci_exc.Unauthorized()
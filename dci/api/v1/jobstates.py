@@ -84,6 +84,7 @@ def create_jobstates(user):
     # Update job status
     job.status = status
     job.duration = get_job_duration(job)
+    job.etag = utils.gen_etag()
 
     try:
         flask.g.session.commit()
@@ -118,12 +119,12 @@ def get_all_jobstates(user, job_id):
         sa_orm.selectinload("files")
     )
     query = declarative.handle_args(query, models2.Jobstate, args)
-    nb_jobstates = query.count()
+    meta = declarative.get_count_meta(query, args)
     query = declarative.handle_pagination(query, args)
 
-    jobstates = [js.serialize() for js in query.all()]
+    jobstates = [js.serialize(fields=args.get("fields")) for js in query.all()]
 
-    return flask.jsonify({"jobstates": jobstates, "_meta": {"count": nb_jobstates}})
+    return flask.jsonify({"jobstates": jobstates, "_meta": meta})
 
 
 @api.route("/jobstates/<uuid:js_id>", methods=["GET"])
@@ -150,6 +151,7 @@ def delete_jobstate_by_id(user, js_id):
 
     try:
         flask.g.session.delete(jobstate)
+        job.etag = utils.gen_etag()
         flask.g.session.commit()
     except Exception as e:
         flask.g.session.rollback()
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import flask
+
+from dci.api.v1 import api
+from dci import decorators
+from dci.common import exceptions as dci_exc
+
+
+@api.route("/messaging", methods=["GET"])
+@decorators.login_required
+def get_messaging_stats(user):
+    """Returns the queue depth and the counters of the analytics producer"""
+    if user.is_not_super_admin():
+        raise dci_exc.Unauthorized()
+
+    return flask.jsonify({"messaging": flask.g.messaging.stats()})
@@ -20,6 +20,7 @@ import socket
 
 from dci.api.v1 import base
 from dci.common import exceptions as dci_exc
+from dci.common import metrics
 from dci.common import utils
 from dci.db import models2
 
@@ -133,6 +134,7 @@ def get_emails_from_remoteci(remoteci_id):
 
 def send_events(events):
     flask.g.sender.send_json(events)
+    metrics.inc_events_sent(len(events))
 
 
 def _handle_job_event(job):
@@ -38,17 +38,52 @@ def has_access_to_topic(user, topic):
     associated to the product can access to the topic's resources. If the
     export control is False check if user's teams has pre release access.
 
+    The decision is cached across requests, the topic's export control and
+    the user's pre release access are part of the key so that a change of
+    either never serves a stale decision.
+
     :param user:
     :param topic:
     :return: True if has_access_to_topic, False otherwise
     """
+    has_pre_release_access = user.has_pre_release_access()
+    key = (
+        frozenset(user.teams_ids),
+        topic.product_id,
+        topic.id,
+        topic.export_control is True,
+        has_pre_release_access,
+    )
+    has_access = flask.g.topic_access_cache.get(key)
+    if has_access is not None:
+        return has_access
+
     product = base.get_resource_orm(models2.Product, topic.product_id)
     has_access_to_the_product = is_teams_associated_to_product(
         user.teams_ids, product.id
     )
     if topic.export_control is True:
-        return has_access_to_the_product
-    return has_access_to_the_product and user.has_pre_release_access()
+        has_access = has_access_to_the_product
+    else:
+        has_access = has_access_to_the_product and has_pre_release_access
+    flask.g.topic_access_cache.set(key, has_access)
+    return has_access
+
+
+def invalidate_topic_access(team_id=None, product_id=None, topic_id=None):
+    """Drop the cached topics access decisions involving the given team,
+    product or topic."""
+
+    def is_invalidated(key, _):
+        teams_ids, key_product_id, key_topic_id, _, _ = key
+        return (
+            (team_id is not None and team_id in teams_ids)
+            or (product_id is not None and key_product_id == product_id)
+            or (topic_id is not None and key_topic_id == topic_id)
+        )
+
+    flask.g.topic_access_cache.delete_if(is_invalidated)
+    base.increment_caches_generation()
 
 
 def verify_access_to_topic(user, topic):
@@ -89,19 +124,40 @@ def get_user_topic_ids(user):
 def get_components_access_teams_ids(teams_ids):
     """A team can allow another team to see its components.
     This method returns the list of teams ids that allowed teams_ids to see theirs components.
+
+    The result is memoized for the lifetime of the request and cached across
+    requests until the teams_components endpoints change the access list.
     """
-    components_access_teams_ids = []
-    JTCA = models2.JOIN_TEAMS_COMPONENTS_ACCESS
-    for team_id in teams_ids:
-        query = flask.g.session.query(JTCA)
-        query = query.filter(JTCA.c.team_id == team_id)
-        teams_components_access = query.all()
-        if teams_components_access:
-            for tca in teams_components_access:
-                components_access_teams_ids.append(tca.access_team_id)
+    teams_ids = frozenset(teams_ids)
+    if not teams_ids:
+        return []
+
+    request_cache = flask.g.setdefault("components_access_teams_ids", {})
+    components_access_teams_ids = request_cache.get(teams_ids)
+    if components_access_teams_ids is not None:
+        return components_access_teams_ids
+
+    components_access_teams_ids = flask.g.components_access_cache.get(teams_ids)
+    if components_access_teams_ids is None:
+        JTCA = models2.JOIN_TEAMS_COMPONENTS_ACCESS
+        query = sql.select([JTCA.c.access_team_id]).where(JTCA.c.team_id.in_(teams_ids))
+        components_access_teams_ids = [
+            row.access_team_id for row in flask.g.session.execute(query)
+        ]
+        flask.g.components_access_cache.set(teams_ids, components_access_teams_ids)
+
+    request_cache[teams_ids] = components_access_teams_ids
     return components_access_teams_ids
 
 
+def invalidate_components_access_teams_ids(team_id):
+    """Drop the cached components access of the sets of teams containing
+    team_id."""
+    flask.g.components_access_cache.delete_if(lambda teams_ids, _: team_id in teams_ids)
+    flask.g.pop("components_access_teams_ids", None)
+    base.increment_caches_generation()
+
+
 def verify_access_to_component(user, component):
     component_team_id = component.team_id
     if component_team_id is not None:
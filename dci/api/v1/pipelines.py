@@ -54,23 +54,34 @@ def create_pipeline(user):
 @api.route("/pipelines/<uuid:p_id>", methods=["GET"])
 @decorators.login_required
 def get_pipeline_by_id(user, p_id):
+    if flask.request.if_none_match:
+        p = base.get_resource_columns_orm(models2.Pipeline, p_id, ["etag", "team_id"])
+        _verify_access_to_pipeline(user, p)
+        not_modified = base.get_not_modified_response(p.etag)
+        if not_modified is not None:
+            return not_modified
+
     p = base.get_resource_orm(
         models2.Pipeline,
         p_id,
         options=[sa_orm.selectinload("team")],
     )
-
-    if user.is_not_super_admin() and user.is_not_read_only_user() and user.is_not_epm():
-        if p.team_id not in user.teams_ids:
-            raise dci_exc.Unauthorized()
+    _verify_access_to_pipeline(user, p)
 
     return flask.Response(
         json.dumps({"pipeline": p.serialize()}),
         200,
+        headers={"ETag": p.etag},
         content_type="application/json",
     )
 
 
+def _verify_access_to_pipeline(user, pipeline):
+    if user.is_not_super_admin() and user.is_not_read_only_user() and user.is_not_epm():
+        if pipeline.team_id not in user.teams_ids:
+            raise dci_exc.Unauthorized()
+
+
 @api.route("/pipelines", methods=["GET"])
 @decorators.login_required
 def get_pipelines(user):
@@ -82,15 +93,18 @@ def get_pipelines(user):
         query = query.filter(models2.Pipeline.team_id.in_(user.teams_ids))
     query = query.filter(models2.Pipeline.state != "archived")
     query = query.from_self()
-    query = declarative.handle_args(query, models2.Pipeline, args)
     query = query.options(sa_orm.joinedload("team", innerjoin=True))
+    query = declarative.handle_args(query, models2.Pipeline, args)
 
-    nb_pipelines = query.count()
+    meta = declarative.get_count_meta(query, args)
     query = declarative.handle_pagination(query, args)
 
-    pipelines = [j.serialize(ignore_columns=["data"]) for j in query.all()]
+    pipelines = [
+        j.serialize(ignore_columns=["data"], fields=args.get("fields"))
+        for j in query.all()
+    ]
 
-    return flask.jsonify({"pipelines": pipelines, "_meta": {"count": nb_pipelines}})
+    return flask.jsonify({"pipelines": pipelines, "_meta": meta})
 
 
 @api.route("/pipelines/<uuid:p_id>/jobs", methods=["GET"])
@@ -115,9 +129,10 @@ def get_jobs_from_pipeline(user, p_id):
         .options(sa_orm.joinedload("team", innerjoin=True))
     )
 
-    jobs = [j.serialize() for j in query.all()]
-
-    return flask.jsonify({"jobs": jobs, "_meta": {"count": len(jobs)}})
+    return base.jsonify_stream(
+        {"jobs": base.STREAMED_LIST, "_meta": {"count": query.count()}},
+        (j.serialize() for j in query.yield_per(base.STREAM_YIELD_PER)),
+    )
 
 
 @api.route("/pipelines/<uuid:p_id>", methods=["PUT"])
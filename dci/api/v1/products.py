@@ -24,6 +24,7 @@ from sqlalchemy import sql
 from dci import decorators
 from dci.api.v1 import api
 from dci.api.v1 import base
+from dci.api.v1 import permissions
 from dci.api.v1 import utils as v1_utils
 from dci.common import exceptions as dci_exc
 from dci.common.schemas import (
@@ -79,6 +80,7 @@ def update_product(user, product_id):
     # get and update resource
     product = base.get_resource_orm(models2.Product, product_id, if_match_etag)
     base.update_resource_orm(product, values)
+    permissions.invalidate_topic_access(product_id=product_id)
     product = base.get_resource_orm(models2.Product, product_id)
 
     return flask.Response(
@@ -111,12 +113,12 @@ def get_all_products(user):
             ),
         )
     q = q.distinct()
-    nb_products = q.count()
+    meta = d.get_count_meta(q, args)
     q = d.handle_pagination(q, args)
     products = q.all()
-    products = list(map(lambda p: p.serialize(), products))
+    products = list(map(lambda p: p.serialize(fields=args.get("fields")), products))
 
-    return flask.jsonify({"products": products, "_meta": {"count": nb_products}})
+    return flask.jsonify({"products": products, "_meta": meta})
 
 
 @api.route("/products/<uuid:product_id>", methods=["GET"])
@@ -176,6 +178,7 @@ def delete_product_by_id(user, product_id):
     if not deleted_product:
         flask.g.session.rollback()
         raise dci_exc.DCIException(message="delete failed, check etag", status_code=409)
+    permissions.invalidate_topic_access(product_id=product_id)
 
     return flask.Response(None, 204, content_type="application/json")
 
@@ -218,6 +221,7 @@ def add_team_to_product(user, product_id):
     except sa_exc.IntegrityError:
         flask.g.session.rollback()
         raise dci_exc.DCIException(message="conflict when adding team", status_code=409)
+    permissions.invalidate_topic_access(product_id=p.id)
 
     result = json.dumps({"product_id": p.id, "team_id": t.id})
     return flask.Response(result, 201, content_type="application/json")
@@ -258,6 +262,7 @@ def delete_team_from_product(user, product_id, team_id):
         raise dci_exc.DCIException(
             message="conflict when removing team", status_code=409
         )
+    permissions.invalidate_topic_access(product_id=p.id)
 
     return flask.Response(None, 204, content_type="application/json")
 
@@ -21,6 +21,7 @@ import sqlalchemy.orm as sa_orm
 from dci.api.v1 import api
 from dci.api.v1 import base
 from dci.api.v1 import utils as v1_utils
+from dci import auth_mechanism
 from dci import decorators
 from dci.common import exceptions as dci_exc
 from dci.common.schemas import (
@@ -84,18 +85,28 @@ def get_all_remotecis(user, t_id=None):
     )
 
     q = d.handle_args(q, models2.Remoteci, args)
-    nb_remotecis = q.count()
+    meta = d.get_count_meta(q, args)
 
     q = d.handle_pagination(q, args)
     remotecis = q.all()
-    remotecis = list(map(lambda r: r.serialize(), remotecis))
+    remotecis = list(map(lambda r: r.serialize(fields=args.get("fields")), remotecis))
 
-    return flask.jsonify({"remotecis": remotecis, "_meta": {"count": nb_remotecis}})
+    return flask.jsonify({"remotecis": remotecis, "_meta": meta})
 
 
 @api.route("/remotecis/<uuid:remoteci_id>", methods=["GET"])
 @decorators.login_required
 def get_remoteci_by_id(user, remoteci_id):
+    r = base.get_resource_columns_orm(
+        models2.Remoteci, remoteci_id, ["etag", "team_id"]
+    )
+    if user.is_not_in_team(r.team_id) and user.is_not_read_only_user():
+        raise dci_exc.Unauthorized()
+    if flask.request.if_none_match:
+        not_modified = base.get_not_modified_response(r.etag)
+        if not_modified is not None:
+            return not_modified
+
     r = base.get_resource_orm(
         models2.Remoteci,
         remoteci_id,
@@ -104,8 +115,6 @@ def get_remoteci_by_id(user, remoteci_id):
             sa_orm.selectinload("users"),
         ],
     )
-    if user.is_not_in_team(r.team_id) and user.is_not_read_only_user():
-        raise dci_exc.Unauthorized()
 
     return flask.Response(
         json.dumps({"remoteci": r.serialize()}),
@@ -128,6 +137,7 @@ def put_remoteci(user, remoteci_id):
         raise dci_exc.Unauthorized()
 
     base.update_resource_orm(remoteci, values)
+    auth_mechanism.invalidate_client_identity("remoteci", remoteci_id)
 
     remoteci = base.get_resource_orm(models2.Remoteci, remoteci_id)
 
@@ -151,6 +161,7 @@ def delete_remoteci_by_id(user, remoteci_id):
         raise dci_exc.Unauthorized()
 
     base.update_resource_orm(remoteci, {"state": "archived", "users": []})
+    auth_mechanism.invalidate_client_identity("remoteci", remoteci_id)
 
     try:
         flask.g.session.query(models2.Job).filter(
@@ -195,6 +206,7 @@ def add_user_to_remoteci(user, remoteci_id):
 
     try:
         r.users.append(u)
+        r.etag = utils.gen_etag()
         flask.g.session.add(r)
         flask.g.session.commit()
     except sa_exc.IntegrityError:
@@ -232,6 +244,7 @@ def delete_user_from_remoteci(user, remoteci_id, u_id):
 
     try:
         r.users.remove(u)
+        r.etag = utils.gen_etag()
         flask.g.session.add(r)
         flask.g.session.commit()
     except sa_exc.IntegrityError:
@@ -265,6 +278,7 @@ def put_api_secret_remoteci(user, remoteci_id):
         raise dci_exc.Unauthorized()
 
     base.update_resource_orm(remoteci, {"api_secret": signature.gen_secret()})
+    auth_mechanism.invalidate_client_identity("remoteci", remoteci_id)
 
     remoteci = base.get_resource_orm(models2.Remoteci, remoteci_id)
     return flask.Response(
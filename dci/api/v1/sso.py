@@ -14,6 +14,10 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import logging
+import threading
+import time
+
 import jwt
 import requests
 
@@ -21,15 +25,16 @@ from dci import dci_config
 from dci.common import exceptions as dci_exc
 from dci import auth
 
+logger = logging.getLogger(__name__)
 
-def get_public_key_from_token(token):
-    header = jwt.get_unverified_header(token)
-    kid = header["kid"]
+
+def get_jwks():
     sso_url = dci_config.CONFIG.get("SSO_URL")
     realm = dci_config.CONFIG.get("SSO_REALM")
+    timeout = dci_config.CONFIG.get("REQUESTS_TIMEOUT")
 
     url = "%s/auth/realms/%s/.well-known/openid-configuration" % (sso_url, realm)
-    openid_configuration = requests.get(url)
+    openid_configuration = requests.get(url, timeout=timeout)
     if openid_configuration.status_code != 200:
         raise Exception(
             "unable to get sso openid-configuration from url '%s', status=%s, error=%s"
@@ -39,7 +44,7 @@ def get_public_key_from_token(token):
         raise dci_exc.DCIException("jwks_uri key not in the sso openid-configuration")
 
     jwks_uri = openid_configuration.json()["jwks_uri"]
-    keys = requests.get(jwks_uri)
+    keys = requests.get(jwks_uri, timeout=timeout)
     if keys.status_code != 200:
         raise dci_exc.DCIException(
             "unable to get jwks content from url '%s', status=%s, error=%s"
@@ -48,8 +53,103 @@ def get_public_key_from_token(token):
     if "keys" not in keys.json():
         raise dci_exc.DCIException("no 'keys' key found in jwks content")
 
-    keys = keys.json()["keys"]
-    for k in keys:
-        if k["kid"] == kid:
-            return auth.jwk_to_pem(k)
-    raise dci_exc.DCIException("kid '%s' from token not found in sso server" % kid)
+    return keys.json()["keys"]
+
+
+class JWKSKeyCache(object):
+    """kid indexed cache of the sso public keys.
+
+    Known keys are served from memory, once they are older than
+    SSO_JWKS_REFRESH_INTERVAL they are refreshed in the background while the
+    current ones are still served. Concurrent lookups of an unknown kid share
+    the same fetch. The sso server is contacted at most once every
+    SSO_JWKS_MIN_REFRESH_INTERVAL seconds.
+    """
+
+    def __init__(self, fetch_jwks=get_jwks, timer=time.monotonic):
+        self._fetch_jwks = fetch_jwks
+        self._timer = timer
+        self._keys = {}
+        self._refreshed_at = None
+        self._attempted_at = None
+        self._generation = 0
+        self._refresh_lock = threading.Lock()
+
+    def get(self, kid):
+        key = self._keys.get(kid)
+        if key is not None:
+            if self._is_stale():
+                self._refresh_in_background()
+            return key
+
+        self._refresh_unknown_kid()
+        key = self._keys.get(kid)
+        if key is None:
+            raise dci_exc.DCIException(
+                "kid '%s' from token not found in sso server" % kid
+            )
+        return key
+
+    def clear(self):
+        with self._refresh_lock:
+            self._keys = {}
+            self._refreshed_at = None
+            self._attempted_at = None
+            self._generation += 1
+
+    def _is_stale(self):
+        refresh_interval = dci_config.CONFIG["SSO_JWKS_REFRESH_INTERVAL"]
+        return self._timer() - self._refreshed_at > refresh_interval and (
+            not self._is_rate_limited()
+        )
+
+    def _is_rate_limited(self):
+        min_refresh_interval = dci_config.CONFIG["SSO_JWKS_MIN_REFRESH_INTERVAL"]
+        return (
+            self._attempted_at is not None
+            and self._timer() - self._attempted_at < min_refresh_interval
+        )
+
+    def _refresh(self):
+        self._attempted_at = self._timer()
+        keys = {}
+        for jwk in self._fetch_jwks():
+            keys[jwk["kid"]] = auth.jwk_to_pem(jwk)
+        self._keys = keys
+        self._refreshed_at = self._timer()
+        self._generation += 1
+
+    def _refresh_unknown_kid(self):
+        generation = self._generation
+        with self._refresh_lock:
+            if self._generation != generation:
+                # another greenlet refreshed the keys while we were waiting
+                return
+            if self._is_rate_limited():
+                return
+            self._refresh()
+
+    def _refresh_in_background(self):
+        def refresh():
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.warning("unable to refresh the sso public keys: %s" % str(e))
+            finally:
+                self._refresh_lock.release()
+
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            threading.Thread(target=refresh, daemon=True).start()
+        except Exception:
+            self._refresh_lock.release()
+            raise
+
+
+jwks_key_cache = JWKSKeyCache()
+
+
+def get_public_key_from_token(token):
+    header = jwt.get_unverified_header(token)
+    return jwks_key_cache.get(header["kid"])
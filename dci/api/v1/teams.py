@@ -20,8 +20,10 @@ import sqlalchemy.orm as sa_orm
 
 from dci.api.v1 import api
 from dci.api.v1 import base
+from dci.api.v1 import permissions
 from dci.api.v1 import remotecis
 from dci.api.v1 import utils as v1_utils
+from dci import auth_mechanism
 from dci import decorators
 from dci.common import exceptions as dci_exc
 from dci.common.schemas import (
@@ -81,13 +83,13 @@ def get_all_teams(user):
         sa_orm.selectinload("remotecis")
     )
     q = d.handle_args(q, models2.Team, args)
-    nb_teams = q.count()
+    meta = d.get_count_meta(q, args)
 
     q = d.handle_pagination(q, args)
     teams = q.all()
-    teams = list(map(lambda t: t.serialize(), teams))
+    teams = list(map(lambda t: t.serialize(fields=args.get("fields")), teams))
 
-    return flask.jsonify({"teams": teams, "_meta": {"count": nb_teams}})
+    return flask.jsonify({"teams": teams, "_meta": meta})
 
 
 @api.route("/teams/<uuid:t_id>", methods=["GET"])
@@ -172,6 +174,8 @@ def put_team(user, t_id):
             message="update failed, either team not found or etag not matched",
             status_code=409,
         )
+    auth_mechanism.invalidate_team_identities(t_id)
+    permissions.invalidate_topic_access(team_id=t_id)
 
     t = flask.g.session.query(models2.Team).filter(models2.Team.id == t_id).one()
     if not t:
@@ -212,6 +216,8 @@ def delete_team_by_id(user, t_id):
     [team.users.remove(user) for user in team.users]
     flask.g.session.add(team)
     flask.g.session.commit()
+    auth_mechanism.invalidate_team_identities(t_id)
+    permissions.invalidate_topic_access(team_id=t_id)
 
     try:
         for model in [models2.File, models2.Remoteci, models2.Job]:
@@ -18,6 +18,7 @@ from sqlalchemy import exc as sa_exc
 
 from dci.api.v1 import api
 from dci.api.v1 import base
+from dci.api.v1 import permissions
 from dci import decorators
 from dci.common import exceptions as dci_exc
 from dci.common.schemas import check_json_is_valid, add_team_components_access
@@ -52,6 +53,7 @@ def add_component_access_team(user, team_id):
         raise dci_exc.DCIException(
             message="conflict when adding component access teams ids", status_code=409
         )
+    permissions.invalidate_components_access_teams_ids(team_id)
 
     return flask.Response(None, 201, content_type="application/json")
 
@@ -81,6 +83,7 @@ def remove_component_access_team(user, team_id):
         raise dci_exc.DCIException(
             message="conflict when removing component access teams ids", status_code=409
         )
+    permissions.invalidate_components_access_teams_ids(team_id)
 
     return flask.Response(None, 204, content_type="application/json")
 
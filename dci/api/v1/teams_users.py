@@ -17,6 +17,7 @@ from sqlalchemy import exc as sa_exc
 
 from dci.api.v1 import api
 from dci.api.v1 import base
+from dci import auth_mechanism
 from dci import decorators
 from dci.common import exceptions as dci_exc
 from dci.db import models2
@@ -45,6 +46,7 @@ def add_user_to_team(user, team_id, user_id):
     except sa_exc.IntegrityError:
         flask.g.session.rollback()
         raise dci_exc.DCIException(message="conflict when adding team", status_code=409)
+    auth_mechanism.invalidate_user_identities(user_id)
 
     return flask.Response(None, 201, content_type="application/json")
 
@@ -90,5 +92,6 @@ def remove_user_from_team(user, team_id, user_id):
         raise dci_exc.DCIException(
             message="conflict when user from team", status_code=409
         )
+    auth_mechanism.invalidate_user_identities(user_id)
 
     return flask.Response(None, 204, content_type="application/json")
@@ -62,6 +62,15 @@ def create_topics(user):
 @api.route("/topics/<uuid:topic_id>", methods=["GET"])
 @decorators.login_required
 def get_topic_by_id(user, topic_id):
+    if flask.request.if_none_match:
+        topic = base.get_resource_columns_orm(
+            models2.Topic, topic_id, ["id", "etag", "product_id", "export_control"]
+        )
+        permissions.verify_access_to_topic(user, topic)
+        not_modified = base.get_not_modified_response(topic.etag)
+        if not_modified is not None:
+            return not_modified
+
     topic = base.get_resource_orm(
         models2.Topic,
         topic_id,
@@ -106,13 +115,13 @@ def get_all_topics(user):
             q = q.filter(models2.Topic.export_control == True)  # noqa
 
     q = d.handle_args(q, models2.Topic, args)
-    nb_topics = q.count()
+    meta = d.get_count_meta(q, args)
     q = d.handle_pagination(q, args)
 
     topics = q.all()
-    topics = list(map(lambda t: t.serialize(), topics))
+    topics = list(map(lambda t: t.serialize(fields=args.get("fields")), topics))
 
-    return flask.jsonify({"topics": topics, "_meta": {"count": nb_topics}})
+    return flask.jsonify({"topics": topics, "_meta": meta})
 
 
 @api.route("/topics/<uuid:topic_id>", methods=["PUT"])
@@ -129,6 +138,7 @@ def put_topic(user, topic_id):
         values["component_types"] = [type.lower() for type in values["component_types"]]
 
     base.update_resource_orm(topic, values)
+    permissions.invalidate_topic_access(topic_id=topic_id)
     topic = base.get_resource_orm(models2.Topic, topic_id)
 
     return flask.Response(
@@ -157,6 +167,7 @@ def delete_topic_by_id(user, topic_id):
     except Exception as e:
         flask.g.session.rollback()
         raise dci_exc.DCIException(message=str(e), status_code=409)
+    permissions.invalidate_topic_access(topic_id=topic_id)
 
     return flask.Response(None, 204, content_type="application/json")
 
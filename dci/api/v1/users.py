@@ -22,6 +22,7 @@ from dci.api.v1 import api
 from dci.api.v1 import base
 from dci.api.v1 import utils as v1_utils
 from dci import auth
+from dci import auth_mechanism
 from dci import decorators
 from dci.common import exceptions as dci_exc
 from dci.common import utils
@@ -96,17 +97,20 @@ def get_all_users(user):
         .options(sa_orm.selectinload("remotecis"))
     )
     q = d.handle_args(q, models2.User, args)
-    nb_users = q.count()
+    meta = d.get_count_meta(q, args)
     q = d.handle_pagination(q, args)
     users = q.all()
     users = list(
         map(
-            lambda u: u.serialize(ignore_columns=("password", "remotecis.api_secret")),
+            lambda u: u.serialize(
+                ignore_columns=("password", "remotecis.api_secret"),
+                fields=args.get("fields"),
+            ),
             users,
         )
     )
 
-    return flask.jsonify({"users": users, "_meta": {"count": nb_users}})
+    return flask.jsonify({"users": users, "_meta": meta})
 
 
 def user_by_id(user, user_id):
@@ -187,6 +191,7 @@ def put_current_user(user):
             message="update failed, either user not found or etag not matched",
             status_code=409,
         )
+    auth_mechanism.invalidate_user_identities(user.id)
 
     u = flask.g.session.query(models2.User).filter(models2.User.id == user.id).one()
     if not u:
@@ -229,6 +234,7 @@ def put_user(user, user_id):
             message="update failed, either user not found or etag not matched",
             status_code=409,
         )
+    auth_mechanism.invalidate_user_identities(user_id)
 
     u = flask.g.session.query(models2.User).filter(models2.User.id == user_id).one()
     if not u:
@@ -265,6 +271,7 @@ def delete_user_by_id(user, user_id):
             message="delete failed, either user already deleted or etag not matched",
             status_code=409,
         )
+    auth_mechanism.invalidate_user_identities(user_id)
 
     return flask.Response(None, 204, content_type="application/json")
 
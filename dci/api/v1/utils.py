@@ -14,20 +14,23 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
-from OpenSSL import crypto
-
+from dci.common import lazy
 from dci.common import utils
 from dci.common.time import get_utc_now
 from dci.db import models2
 
+crypto = lazy.LazyModule("OpenSSL.crypto")
+
 
-def createKeyPair(type=crypto.TYPE_RSA, bits=2048):
+def createKeyPair(type=None, bits=2048):
     """
     Create a public/private key pair.
-    Arguments: type - Key type, must be one of TYPE_RSA and TYPE_DSA
+    Arguments: type - Key type, must be one of TYPE_RSA (default) and TYPE_DSA
                bits - Number of bits to use in the key
     Returns:   The public/private key pair in a PKey object
     """
+    if type is None:
+        type = crypto.TYPE_RSA
     pkey = crypto.PKey()
     pkey.generate_key(type, bits)
     return pkey
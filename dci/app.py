@@ -15,20 +15,27 @@
 # under the License.
 from dci.api import v1 as api_v1
 from dci.api import v2 as api_v2
+from dci.common import cache
+from dci.common import compression
 from dci.common import exceptions
+from dci.common import json_encoders
+from dci.common import metrics
+from dci.common import timing
 from dci.common import utils
+from dci.db import audit_log
+from dci.db import cache_generation
 from dci.db import models2
+from dci.db import replicas
+from dci.db import request_connection
 from dci import dci_config
+from dci import messaging
 
 import flask
-import kombu
 import logging
-import sys
-import time
-import zmq
 
 from sqlalchemy import exc as sa_exc
-from sqlalchemy.orm import sessionmaker
+from werkzeug.local import LocalProxy
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 try:
     import psycogreen.gevent
@@ -41,6 +48,8 @@ logger = logging.getLogger(__name__)
 
 zmq_sender = None
 
+TEAM_NAMES = ("admin", "Red Hat", "EPM")
+
 
 class DciControlServer(flask.Flask):
     def __init__(self):
@@ -48,16 +57,81 @@ class DciControlServer(flask.Flask):
         self.config.update(dci_config.CONFIG)
         self.url_map.strict_slashes = False
         self.engine = dci_config.get_engine(self.config["SQLALCHEMY_DATABASE_URI"])
-        self.sender = self._get_zmq_sender(self.config["ZMQ_CONN"])
-        self.store = dci_config.get_store()
-        self.messaging = KombuProducer()
-        session = sessionmaker(bind=self.engine)()
-        self.team_admin_id = self._get_team_id(session, "admin")
-        self.team_redhat_id = self._get_team_id(session, "Red Hat")
-        self.team_epm_id = self._get_team_id(session, "EPM")
-        session.close()
+        self.replicas = replicas.ReplicaRouter(
+            [
+                dci_config.get_engine(uri)
+                for uri in self.config["SQLALCHEMY_REPLICA_URIS"]
+            ]
+        )
+        if self.config["METRICS_ENABLED"]:
+            metrics.enable()
+        # the store and the zmq sender are built on first use to keep the
+        # startup of the workers fast
+        self._store = None
+        self._sender = None
+        self.audit_log = audit_log.AuditLogWriter(
+            lambda: self.engine,
+            batch_size=self.config["AUDIT_LOG_BATCH_SIZE"],
+            flush_interval=self.config["AUDIT_LOG_FLUSH_INTERVAL"] / 1000.0,
+        )
+        self.messaging = messaging.KombuProducer(
+            self.config["AMQP_BROKER_URL"],
+            queue_size=self.config["AMQP_QUEUE_SIZE"],
+            batch_size=self.config["AMQP_BATCH_SIZE"],
+            overflow_policy=self.config["AMQP_OVERFLOW_POLICY"],
+            spill_file=self.config["AMQP_SPILL_FILE"],
+            max_backoff=self.config["AMQP_MAX_RECONNECT_BACKOFF"],
+        )
+        self.identity_cache = cache.TTLCache(
+            self.config["IDENTITY_CACHE_SIZE"], self.config["IDENTITY_CACHE_TTL"]
+        )
+        self.credentials_cache = cache.TTLCache(
+            self.config["CREDENTIALS_CACHE_SIZE"], self.config["CREDENTIALS_CACHE_TTL"]
+        )
+        self.sso_identity_cache = cache.TTLCache(
+            self.config["SSO_IDENTITY_CACHE_SIZE"],
+            self.config["SSO_IDENTITY_CACHE_TTL"],
+        )
+        self.components_access_cache = cache.TTLCache(
+            self.config["COMPONENTS_ACCESS_CACHE_SIZE"],
+            self.config["COMPONENTS_ACCESS_CACHE_TTL"],
+        )
+        self.topic_access_cache = cache.TTLCache(
+            self.config["TOPIC_ACCESS_CACHE_SIZE"],
+            self.config["TOPIC_ACCESS_CACHE_TTL"],
+        )
+        # the entries of these caches are invalidated by the writes of any
+        # process, see CacheGroup
+        self.shared_caches = cache.CacheGroup(
+            [
+                self.identity_cache,
+                self.sso_identity_cache,
+                self.components_access_cache,
+                self.topic_access_cache,
+            ]
+        )
+        # the ids of the admin, Red Hat and EPM teams are read on their first
+        # use by a request, with its connection
+        self._team_ids = None
+
+    @property
+    def store(self):
+        if self._store is None:
+            store = dci_config.get_store()
+            if self.config["METRICS_ENABLED"]:
+                store = metrics.MeasuredStore(store)
+            self._store = store
+        return self._store
+
+    @property
+    def sender(self):
+        if self._sender is None:
+            self._sender = self._get_zmq_sender(self.config["ZMQ_CONN"])
+        return self._sender
 
     def _get_zmq_sender(self, zmq_conn):
+        import zmq
+
         global zmq_sender
         if not zmq_sender:
             zmq_sender = zmq.Context().socket(zmq.PUSH)
@@ -77,44 +151,46 @@ class DciControlServer(flask.Flask):
         headers = resp.headers
         headers.add_header("Access-Control-Expose-Headers", self.config["X_HEADERS"])
         headers.add_header("Access-Control-Allow-Origin", self.config["X_DOMAINS"])
-
-        return super(DciControlServer, self).process_response(resp)
-
-    def _get_team_id(self, session, name):
-        team = session.query(models2.Team).filter(models2.Team.name == name).first()
-        if team is None:
-            print(
-                "%s team not found. Please init the database"
-                " with the '%s' team and 'admin' user." % (name, name)
+        if self.config["METRICS_ENABLED"]:
+            metrics.end_request(resp)
+        timings = flask.g.get("timings")
+        if timings is not None:
+            headers.add_header("Server-Timing", timings.get_server_timing_header())
+            fields = {
+                "method": flask.request.method,
+                "path": flask.request.path,
+                "status": resp.status_code,
+            }
+            fields.update(timings.to_dict())
+            timing.logger.info(
+                " ".join("%s=%s" % field for field in fields.items()),
+                extra={"timings": fields},
             )
-            sys.exit(1)
-        return team.id
 
-
-class KombuProducer:
-    def __init__(self):
-        super(KombuProducer, self).__init__()
-        self._connection = kombu.Connection(dci_config.CONFIG["AMQP_BROKER_URL"])
-        self._exchange = kombu.Exchange("dci.analytics.exchange", type="direct")
-        self._queue = kombu.Queue(
-            name="dci.analytics.queue",
-            exchange=self._exchange,
-            routing_key="dci.analytics.jobs",
-        )
-        self._producer = None
-
-    def publish(self, message):
-        if not self._producer:
-            channel = self._connection.channel()
-            self._producer = kombu.Producer(
-                exchange=self._exchange,
-                channel=channel,
-                routing_key="dci.analytics.jobs",
+        resp = super(DciControlServer, self).process_response(resp)
+        if self.config["COMPRESSION_ENCODINGS"]:
+            resp = compression.compress_response(
+                flask.request,
+                resp,
+                self.config["COMPRESSION_ENCODINGS"],
+                self.config["COMPRESSION_MIN_SIZE"],
             )
-            self._queue.maybe_bind(self._connection)
-            self._queue.declare()
+        return resp
 
-        return self._producer.publish(message)
+    def get_team_id(self, session, name):
+        if self._team_ids is None:
+            query = session.query(models2.Team.name, models2.Team.id)
+            team_ids = dict(query.filter(models2.Team.name.in_(TEAM_NAMES)))
+            for team_name in TEAM_NAMES:
+                if team_name not in team_ids:
+                    msg = (
+                        "%s team not found. Please init the database"
+                        " with the '%s' team and 'admin' user." % (team_name, team_name)
+                    )
+                    logger.error(msg)
+                    raise exceptions.DCIException(msg, status_code=500)
+            self._team_ids = team_ids
+        return self._team_ids[name]
 
 
 def configure_root_logger():
@@ -150,6 +226,7 @@ def create_app(param=None):
     def handle_api_exception(api_exception):
         response = flask.jsonify(api_exception.to_dict())
         response.status_code = api_exception.status_code
+        response.headers.extend(getattr(api_exception, "headers", {}))
         logger.exception(api_exception)
         return response
 
@@ -160,43 +237,98 @@ def create_app(param=None):
         logger.exception(dbapi_exception)
         return response
 
+    def get_shared_cache(shared_cache):
+        # the generation of the caches is read on their first use by the
+        # request, the requests which do not use them do not pay for it
+        if not flask.g.get("caches_generation_checked"):
+            flask.g.caches_generation_checked = True
+            dci_app.shared_caches.check_generation(
+                cache_generation.get_generation(flask.g.session)
+            )
+        return shared_cache
+
     @dci_app.before_request
     def before_request():
-        flask.g.team_admin_id = dci_app.team_admin_id
-        flask.g.team_redhat_id = dci_app.team_redhat_id
-        flask.g.team_epm_id = dci_app.team_epm_id
+        if dci_app.config["METRICS_ENABLED"]:
+            metrics.start_request()
+        flask.g.team_admin_id = LocalProxy(
+            lambda: dci_app.get_team_id(flask.g.session, "admin")
+        )
+        flask.g.team_redhat_id = LocalProxy(
+            lambda: dci_app.get_team_id(flask.g.session, "Red Hat")
+        )
+        flask.g.team_epm_id = LocalProxy(
+            lambda: dci_app.get_team_id(flask.g.session, "EPM")
+        )
         flask.g.messaging = dci_app.messaging
+        flask.g.audit_log = dci_app.audit_log
+        flask.g.credentials_cache = dci_app.credentials_cache
+        flask.g.shared_caches = dci_app.shared_caches
+        flask.g.identity_cache = LocalProxy(
+            lambda: get_shared_cache(dci_app.identity_cache)
+        )
+        flask.g.sso_identity_cache = LocalProxy(
+            lambda: get_shared_cache(dci_app.sso_identity_cache)
+        )
+        flask.g.components_access_cache = LocalProxy(
+            lambda: get_shared_cache(dci_app.components_access_cache)
+        )
+        flask.g.topic_access_cache = LocalProxy(
+            lambda: get_shared_cache(dci_app.topic_access_cache)
+        )
 
-        for i in range(5):
-            try:
-                flask.g.engine = dci_app.engine
-                flask.g.db_conn = dci_app.engine.connect()
-                flask.g.session = sessionmaker(bind=dci_app.engine)()
-                break
-            except Exception:
-                logging.warning(
-                    "failed to connect to the database, " "will retry in 1 second..."
-                )
-                time.sleep(1)
-                pass
-        flask.g.store = dci_app.store
-        flask.g.sender = dci_app.sender
+        # the connection is only checked out when the session or db_conn
+        # are used for the first time
+        view = dci_app.view_functions.get(flask.request.endpoint)
+        connection = request_connection.RequestConnection(
+            dci_app.engine,
+            replicas=dci_app.replicas,
+            read_only=replicas.is_read_only(flask.request, view),
+        )
+        flask.g.engine = dci_app.engine
+        flask.g.replicas = dci_app.replicas
+        flask.g.request_connection = connection
+        flask.g.db_conn = LocalProxy(connection.connection)
+        flask.g.session = LocalProxy(connection.session)
+        flask.g.store = LocalProxy(lambda: dci_app.store)
+        flask.g.sender = LocalProxy(lambda: dci_app.sender)
+        if dci_app.config["SERVER_TIMING"]:
+            flask.g.timings = timing.RequestTimings()
+            flask.g.store = timing.TimedProxy(flask.g.store, "store")
+            flask.g.messaging = timing.TimedProxy(dci_app.messaging, "notification")
+            flask.g.sender = timing.TimedProxy(flask.g.sender, "notification")
 
     @dci_app.teardown_request
-    def teardown_request(_):
+    def teardown_request(exception):
+        if dci_app.config["METRICS_ENABLED"]:
+            metrics.teardown_request(dci_app.engine, exception)
+        connection = flask.g.get("request_connection")
+        if connection is None:
+            return
         try:
-            flask.g.session.close()
+            connection.close()
         except Exception:
             logging.warning(
-                "There's been an arror while calling session.close() in teardown_request."
+                "There's been an error while releasing the database connection "
+                "in teardown_request."
             )
 
-        try:
-            flask.g.db_conn.close()
-        except Exception:
-            logging.warning(
-                "There's been an error while calling db_conn.close() in teardown_request."
-            )
+    @dci_app.route("/metrics", methods=["GET"])
+    def get_metrics():
+        if not dci_app.config["METRICS_ENABLED"]:
+            raise exceptions.DCIException("metrics are disabled", status_code=404)
+        if not metrics.is_allowed(
+            flask.request.remote_addr, dci_app.config["METRICS_ALLOWED_NETWORKS"]
+        ):
+            raise exceptions.Forbidden()
+        return flask.Response(
+            metrics.generate_latest(), 200, content_type=metrics.get_content_type()
+        )
+
+    if dci_app.config["NB_TRUSTED_PROXIES"] > 0:
+        dci_app.wsgi_app = ProxyFix(
+            dci_app.wsgi_app, x_for=dci_app.config["NB_TRUSTED_PROXIES"], x_proto=0
+        )
 
     # Registering REST error handler
     dci_app.register_error_handler(exceptions.DCIException, handle_api_exception)
@@ -207,6 +339,12 @@ def create_app(param=None):
     dci_app.register_blueprint(api_v2.api, url_prefix="/api/v2")
 
     # Registering custom encoder
-    dci_app.json_encoder = utils.JSONEncoder
+    dci_app.json_encoder = json_encoders.get_json_encoder(
+        dci_app.config["JSON_ENCODER"]
+    )
+
+    if dci_app.config["SERVER_TIMING"]:
+        timing.instrument_sql()
+        dci_app.json_encoder = timing.get_timed_json_encoder(dci_app.json_encoder)
 
     return dci_app
@@ -15,6 +15,11 @@
 # under the License.
 
 import flask
+import hashlib
+import hmac
+import json
+import os
+import time
 import uuid
 from sqlalchemy import exc as sa_exc
 from sqlalchemy import sql
@@ -24,8 +29,9 @@ from dci.api.v1 import base, sso
 from dci.auth import check_passwords_equal, decode_jwt
 from dci import dci_config
 from dci.common import exceptions as dci_exc
+from dciauth.v2 import headers as dciauth_headers
 from dciauth.v2.headers import parse_headers
-from dciauth.v2.signature import is_valid
+from dciauth.v2.signature import is_expired, is_valid
 from dci.db import models2
 from dci.identity import Identity
 
@@ -34,17 +40,145 @@ from jwt import exceptions as jwt_exc
 
 logger = logging.getLogger(__name__)
 
+# key of the digests stored in the credentials cache, it never leaves the process
+_credentials_digest_key = os.urandom(32)
+
+
+def get_credentials_digest(username, password, encrypted_password):
+    """Keyed digest of the credentials. The stored hash is part of it so
+    that a password change invalidates the cached verification."""
+    message = json.dumps([username, password, encrypted_password]).encode("utf-8")
+    return hmac.new(_credentials_digest_key, message, hashlib.sha256).hexdigest()
+
+
+def invalidate_client_identity(client_type, client_id):
+    """Drop the cached identity of a remoteci or a feeder."""
+    flask.g.identity_cache.delete((client_type, str(client_id)))
+    base.increment_caches_generation()
+
+
+def invalidate_team_identities(team_id):
+    """Drop the cached identities of the members of a team."""
+    for identity_cache in (flask.g.identity_cache, flask.g.sso_identity_cache):
+        identity_cache.delete_if(lambda _, identity: team_id in identity.teams)
+    base.increment_caches_generation()
+
+
+def invalidate_user_identities(user_id):
+    """Drop the cached identities of a sso user."""
+    user_id = str(user_id)
+    flask.g.sso_identity_cache.delete_if(lambda _, identity: identity.id == user_id)
+    base.increment_caches_generation()
+
+
+def get_hmac_signature(request, secret_key, payload_hash):
+    """Compute the dciauth v2 signature of a request whose payload is only
+    known by its sha256 hexdigest.
+
+    dciauth has no public function for it, the private helpers used here
+    are why dciauth is pinned to a single release in requirements.txt and
+    in the spec file."""
+    canonical_request = "\n".join(
+        [
+            request["method"],
+            dciauth_headers._get_endpoint(request),
+            dciauth_headers._get_canonical_querystring(request),
+            dciauth_headers._get_canonical_headers(request),
+            dciauth_headers._get_signed_headers(request),
+            payload_hash,
+        ]
+    )
+    string_to_sign = "\n".join(
+        [
+            dciauth_headers._get_algorithm(request),
+            request["timestamp"],
+            dciauth_headers._get_credential_scope(request),
+            hashlib.sha256(canonical_request.encode("utf-8")).hexdigest(),
+        ]
+    )
+    signing_key = dciauth_headers._get_signing_key(request, secret_key)
+    return hmac.new(
+        signing_key, string_to_sign.encode("utf-8"), hashlib.sha256
+    ).hexdigest()
+
+
+def get_body_length(request):
+    """Return the Content-Length of a request whose body is streamed, the
+    request is rejected if it is above MAX_CONTENT_LENGTH or if its size is
+    unknown: unlike request.data the stream is not bounded by flask."""
+    length = request.content_length
+    if length is None:
+        # without Content-Length nor Transfer-Encoding the body is empty
+        if "Transfer-Encoding" not in request.headers:
+            return 0
+        raise dci_exc.DCIException("Content-Length header missing", status_code=411)
+    max_length = flask.current_app.config["MAX_CONTENT_LENGTH"]
+    if max_length is not None and length > max_length:
+        raise dci_exc.DCIException(
+            "request body larger than %s bytes" % max_length, status_code=413
+        )
+    return length
+
+
+class StreamedBody(object):
+    """Request body read by the view as a stream instead of being
+    buffered in memory, no more than length bytes are read."""
+
+    def __init__(self, stream, length):
+        self._stream = stream
+        self._remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        if size == 0:
+            return b""
+        data = self._stream.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def verify(self):
+        """Called once the body has been consumed, raise if it is not the
+        one that was authenticated."""
+        pass
+
+
+class HmacStreamedBody(StreamedBody):
+    """Hash the body while it is read, the signature of the request is
+    checked against the digest once the whole body went through."""
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, stream, length, verify_payload_hash):
+        super(HmacStreamedBody, self).__init__(stream, length)
+        self._verify_payload_hash = verify_payload_hash
+        self._sha256 = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = super(HmacStreamedBody, self).read(size)
+        self._sha256.update(data)
+        return data
+
+    def verify(self):
+        while self.read(self.chunk_size):
+            pass
+        self._verify_payload_hash(self._sha256.hexdigest())
+
 
 class BaseMechanism(object):
-    def __init__(self, request):
+    def __init__(self, request, streamed_body=False):
         self.request = request
         self.identity = None
+        self.streamed_body = streamed_body
 
     def authenticate(self):
         """Authenticate the user, if the user fail to authenticate then the
         method must raise an exception with proper error message."""
         pass
 
+    def get_streamed_body(self):
+        return StreamedBody(self.request.stream, get_body_length(self.request))
+
     def get_user(self, model_constraint):
         try:
             return (
@@ -135,12 +269,21 @@ class BasicAuthMechanism(BaseMechanism):
                 raise dci_exc.DCIException(
                     "User %s does not exists." % username, status_code=401
                 )
-        is_authenticated = check_passwords_equal(auth.password, user.password)
+        is_authenticated = self.check_password(username, auth.password, user.password)
         if not is_authenticated:
             raise dci_exc.DCIException("Invalid user credentials", status_code=401)
         self.identity = self.identity_from_user(user)
         return True
 
+    def check_password(self, username, password, encrypted_password):
+        digest = get_credentials_digest(username, password, encrypted_password)
+        if flask.g.credentials_cache.get(digest):
+            return True
+        is_authenticated = check_passwords_equal(password, encrypted_password)
+        if is_authenticated:
+            flask.g.credentials_cache.set(digest, True)
+        return is_authenticated
+
 
 class HmacMechanism(BaseMechanism):
     def authenticate(self):
@@ -152,6 +295,15 @@ class HmacMechanism(BaseMechanism):
         self.identity = self.build_identity(headers)
         if self.identity is None:
             raise dci_exc.DCIException("identity does not exists.", status_code=401)
+        self.headers = headers
+        if self.streamed_body:
+            # the payload signature is checked by HmacStreamedBody.verify
+            # once the view has read the body
+            if is_expired({}, headers):
+                raise dci_exc.DCIException("HmacMechanism failed: signature is expired")
+            if len(self.identity.teams_ids) > 0:
+                self.check_team_is_active(self.identity.teams_ids[0])
+            return True
         valid, error_message = is_valid(
             {
                 "method": self.request.method,
@@ -168,6 +320,26 @@ class HmacMechanism(BaseMechanism):
             self.check_team_is_active(self.identity.teams_ids[0])
         return True
 
+    def get_streamed_body(self):
+        return HmacStreamedBody(
+            self.request.stream,
+            get_body_length(self.request),
+            self.verify_payload_hash,
+        )
+
+    def verify_payload_hash(self, payload_hash):
+        request = dict(
+            self.headers,
+            method=self.request.method,
+            endpoint=self.request.path,
+            params=self.request.args.to_dict(flat=True),
+        )
+        signature = get_hmac_signature(request, self.identity.api_secret, payload_hash)
+        if not hmac.compare_digest(
+            signature.encode("utf-8"), self.headers["signature"].encode("utf-8")
+        ):
+            raise dci_exc.DCIException("HmacMechanism failed: signature is invalid")
+
     def build_identity(self, client_info):
         allowed_types_model = {
             "remoteci": models2.Remoteci,
@@ -178,6 +350,11 @@ class HmacMechanism(BaseMechanism):
         if identity_model is None:
             return None
 
+        cache_key = (client_type, str(client_info["client_id"]))
+        identity = flask.g.identity_cache.get(cache_key)
+        if identity is not None:
+            return identity
+
         query = flask.g.session.query(identity_model)
         query = query.filter(identity_model.id == client_info["client_id"])
         query = query.filter(identity_model.state == "active")
@@ -187,7 +364,7 @@ class HmacMechanism(BaseMechanism):
         if not identity:
             return None
 
-        return Identity(
+        identity = Identity(
             {
                 "id": str(identity.id),
                 "teams": {
@@ -203,6 +380,8 @@ class HmacMechanism(BaseMechanism):
                 "is_read_only_user": identity.team.id == flask.g.team_redhat_id,
             }
         )
+        flask.g.identity_cache.set(cache_key, identity)
+        return identity
 
 
 class OpenIDCAuth(BaseMechanism):
@@ -211,6 +390,14 @@ class OpenIDCAuth(BaseMechanism):
         if len(auth_header) != 2:
             return False
         _, token = auth_header
+        cache_key = (
+            hashlib.sha256(token.encode("utf-8")).hexdigest(),
+            self.get_scoped_team_id(),
+        )
+        identity = flask.g.sso_identity_cache.get(cache_key)
+        if identity is not None:
+            self.identity = identity
+            return True
         conf = dci_config.CONFIG
 
         def __get_and_set_sso_public_key():
@@ -256,8 +443,19 @@ class OpenIDCAuth(BaseMechanism):
             self.identity = self._get_or_update_or_create_user(user_info, team_id)
         except sa_exc.IntegrityError:
             raise dci_exc.DCICreationConflict("users", "username")
+        flask.g.sso_identity_cache.set(
+            cache_key, self.identity, ttl=self._get_token_ttl(decoded_token)
+        )
         return True
 
+    @staticmethod
+    def _get_token_ttl(token):
+        """Returns the number of seconds before the token expires, None if
+        the token has no expiration."""
+        if "exp" not in token:
+            return None
+        return token["exp"] - time.time()
+
     @staticmethod
     def _is_read_only_user(token, read_only_group):
         # todo(gvincent): implement the solution with idp and verified email
@@ -290,6 +488,11 @@ class OpenIDCAuth(BaseMechanism):
         if user:
             return self.identity_from_user(user)
 
+        # the user is updated or created, even by a GET served by a replica,
+        # and looked up again on the primary which may be ahead of it
+        request_connection = flask.g.get("request_connection")
+        if request_connection is not None:
+            request_connection.use_primary()
         user = self._get_user_with_only_red_hat_login(user_info)
         if user:
             user_updated = self._update_user(user, user_info)
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import collections
+import threading
+import time
+
+
+class TTLCache(object):
+    """Bounded in-memory cache whose entries expire after a time to live.
+
+    When the cache is full the least recently used entry is evicted. A cache
+    created with maxsize or ttl lower or equal to 0 is disabled: nothing is
+    stored and every lookup is a miss.
+    """
+
+    def __init__(self, maxsize, ttl, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._timer = timer
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0 and self.ttl > 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > self._timer():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, ttl overrides the default time to live."""
+        if not self.enabled:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, self._timer() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_if(self, predicate):
+        """Remove every entry for which predicate(key, value) is true."""
+        with self._lock:
+            keys = [k for k, (v, _) in self._entries.items() if predicate(k, v)]
+            for key in keys:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CacheGroup(object):
+    """Caches of a process which are cleared when another process
+    invalidates some of their entries.
+
+    The processes share a generation number, stored in the database, that
+    every invalidation increments. A process clears its caches as soon as it
+    reads a generation other than the one its caches were filled under.
+    """
+
+    def __init__(self, caches):
+        self.caches = caches
+        self.generation = None
+        self._lock = threading.Lock()
+
+    def check_generation(self, generation):
+        with self._lock:
+            if generation == self.generation:
+                return
+            if self.generation is not None:
+                for cache in self.caches:
+                    cache.clear()
+            self.generation = generation
+
+    def set_generation(self, generation):
+        """Called with the generation resulting from an invalidation of this
+        process, which already dropped the stale entries itself: the caches
+        are only kept if no other process invalidated entries in between."""
+        with self._lock:
+            if self.generation == generation - 1:
+                self.generation = generation
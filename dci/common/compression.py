@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+BROTLI_QUALITY = 4
+
+# mime types of the content which is already compressed
+COMPRESSED_MIMETYPES = {
+    "application/gzip",
+    "application/x-gzip",
+    "application/zip",
+    "application/x-bzip2",
+    "application/x-xz",
+    "application/x-7z-compressed",
+    "application/x-rar-compressed",
+    "application/x-tar",
+    "application/zstd",
+    "application/vnd.rar",
+    "application/java-archive",
+    "application/x-rpm",
+    "application/pdf",
+}
+COMPRESSED_MIMETYPE_PREFIXES = ("image/", "video/", "audio/", "font/")
+UNCOMPRESSED_MIMETYPES = {"image/svg+xml", "image/bmp"}
+
+
+class _GzipCompressor(object):
+    def __init__(self):
+        self._compressor = zlib.compressobj(
+            GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class _ZstdCompressor(object):
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class _BrotliCompressor(object):
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def get_compressors():
+    """Return the compressor of each available encoding."""
+    compressors = {"gzip": _GzipCompressor}
+    if zstandard is not None:
+        compressors["zstd"] = _ZstdCompressor
+    if brotli is not None:
+        compressors["br"] = _BrotliCompressor
+    return compressors
+
+
+def get_encoding(accept_encodings, encodings):
+    """Return the encoding of encodings, in order of preference, which the
+    client accepts with the highest quality, None if it accepts none."""
+    compressors = get_compressors()
+    best_encoding = None
+    best_quality = 0
+    for encoding in encodings:
+        if encoding not in compressors:
+            continue
+        quality = accept_encodings[encoding]
+        if quality > best_quality:
+            best_encoding = encoding
+            best_quality = quality
+    return best_encoding
+
+
+def is_compressible(response, min_size):
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return False
+    if "Content-Encoding" in response.headers or "Content-Range" in response.headers:
+        return False
+    mimetype = response.mimetype or ""
+    if mimetype in COMPRESSED_MIMETYPES or (
+        mimetype.startswith(COMPRESSED_MIMETYPE_PREFIXES)
+        and mimetype not in UNCOMPRESSED_MIMETYPES
+    ):
+        return False
+    # the size of the streamed responses is unknown
+    content_length = response.content_length
+    if content_length is None and not response.is_streamed:
+        content_length = len(response.get_data())
+    return content_length is None or content_length >= min_size
+
+
+def _compress_iter(iterable, compressor):
+    try:
+        for chunk in iterable:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+    finally:
+        if hasattr(iterable, "close"):
+            iterable.close()
+
+
+def compress_response(request, response, encodings, min_size):
+    """Compress the body of the response with the encoding negotiated with
+    the Accept-Encoding header of the request.
+
+    The bodies of at least min_size bytes are compressed, the streamed ones
+    are compressed chunk by chunk while they are sent. The ETag of a
+    compressed response is made weak, the compressed and the identity bodies
+    must not share a strong validator.
+    """
+    response.vary.add("Accept-Encoding")
+    if request.method == "HEAD" or not is_compressible(response, min_size):
+        return response
+    encoding = get_encoding(request.accept_encodings, encodings)
+    if encoding is None:
+        return response
+
+    compressor = get_compressors()[encoding]()
+    if response.is_streamed:
+        response.response = _compress_iter(response.iter_encoded(), compressor)
+        response.direct_passthrough = False
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        response.set_data(compressor.compress(data) + compressor.flush())
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag is not None and not weak:
+        response.set_etag(etag, weak=True)
+    return response
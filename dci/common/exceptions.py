@@ -76,6 +76,12 @@ class Unauthorized(DCIException):
         super(Unauthorized, self).__init__(msg, status_code=401)
 
 
+class ServiceUnavailable(DCIException):
+    def __init__(self, message, retry_after):
+        super(ServiceUnavailable, self).__init__(message, status_code=503)
+        self.headers = {"Retry-After": str(retry_after)}
+
+
 class Forbidden(DCIException):
     def __init__(self):
         msg = "Operation forbidden."
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from dci.common import utils
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+COMPACT_SEPARATORS = (",", ":")
+
+
+class OrjsonEncoder(utils.JSONEncoder):
+    """utils.JSONEncoder using orjson, which encodes uuids and datetimes
+    natively, for the documents it encodes to the same bytes.
+
+    That is the compact documents built by flask.jsonify: orjson has no
+    option for the separators with spaces nor for the indentation used by
+    json.dumps, they are encoded by the parent class as well as the
+    documents orjson can not encode (non string keys, integers over 64 bits)
+    and the ones with non ascii characters when ensure_ascii is set.
+    """
+
+    def encode(self, o):
+        separators = (self.item_separator, self.key_separator)
+        if self.indent is not None or separators != COMPACT_SEPARATORS:
+            return super(OrjsonEncoder, self).encode(o)
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        try:
+            encoded = orjson.dumps(o, default=self.default, option=option)
+        except TypeError:
+            return super(OrjsonEncoder, self).encode(o)
+        if self.ensure_ascii:
+            try:
+                return encoded.decode("ascii")
+            except UnicodeDecodeError:
+                return super(OrjsonEncoder, self).encode(o)
+        return encoded.decode("utf-8")
+
+
+def get_json_encoder(name):
+    """Returns the encoder class of the JSON_ENCODER setting: orjson, stdlib
+    or auto which picks orjson when it is installed."""
+    if name not in ("auto", "orjson", "stdlib"):
+        raise ValueError("unknown json encoder '%s'" % name)
+    if name == "stdlib" or (name == "auto" and orjson is None):
+        return utils.JSONEncoder
+    if orjson is None:
+        raise ValueError("the orjson json encoder requires orjson")
+    return OrjsonEncoder
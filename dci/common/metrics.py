@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import ipaddress
+import os
+import time
+
+import flask
+
+# When the api runs in several gunicorn workers, prometheus_multiproc_dir
+# points to a directory shared by the workers where the values are kept in
+# memory mapped files, /metrics then aggregates the values of all of them.
+MULTIPROC_DIR_ENV_VARS = ("prometheus_multiproc_dir", "PROMETHEUS_MULTIPROC_DIR")
+
+STORE_OPERATIONS = ("upload", "get", "head", "delete")
+
+# prometheus_client is only imported once the metrics are enabled, until then
+# every function of this module is a no-op
+_metrics = None
+
+
+class _Metrics(object):
+    def __init__(self):
+        import prometheus_client
+
+        self.prometheus_client = prometheus_client
+        self.request_duration = prometheus_client.Histogram(
+            "dci_request_duration_seconds",
+            "Time spent processing a request",
+            ["blueprint", "endpoint", "method", "status"],
+        )
+        self.requests_in_flight = prometheus_client.Gauge(
+            "dci_requests_in_flight",
+            "Number of requests being processed",
+            multiprocess_mode="livesum",
+        )
+        self.db_pool_size = prometheus_client.Gauge(
+            "dci_db_pool_size",
+            "Number of connections the database pool keeps open",
+            multiprocess_mode="livesum",
+        )
+        self.db_pool_checked_out = prometheus_client.Gauge(
+            "dci_db_pool_checked_out",
+            "Number of database connections in use",
+            multiprocess_mode="livesum",
+        )
+        self.db_pool_overflow = prometheus_client.Gauge(
+            "dci_db_pool_overflow",
+            "Number of database connections opened beyond the pool size",
+            multiprocess_mode="livesum",
+        )
+        self.db_pool_checkout_wait = prometheus_client.Histogram(
+            "dci_db_pool_checkout_wait_seconds",
+            "Time spent waiting for a database connection",
+        )
+        self.store_operation_duration = prometheus_client.Histogram(
+            "dci_store_operation_duration_seconds",
+            "Time spent in the storage backend",
+            ["store", "operation"],
+        )
+        self.messages_published = prometheus_client.Counter(
+            "dci_kombu_messages_published_total",
+            "Number of messages published to the analytics queue",
+        )
+        self.messages_queued = prometheus_client.Gauge(
+            "dci_kombu_messages_queued",
+            "Number of messages waiting to be published to the analytics queue",
+            multiprocess_mode="livesum",
+        )
+        self.messages_dropped = prometheus_client.Counter(
+            "dci_kombu_messages_dropped_total",
+            "Number of messages dropped because the publish queue was full",
+        )
+        self.messages_spilled = prometheus_client.Counter(
+            "dci_kombu_messages_spilled_total",
+            "Number of messages spilled to disk because the publish queue was full",
+        )
+        self.events_sent = prometheus_client.Counter(
+            "dci_zmq_events_sent_total", "Number of events sent to the zmq notifier"
+        )
+
+
+def enable():
+    global _metrics
+    if _metrics is None:
+        _metrics = _Metrics()
+
+
+def is_enabled():
+    return _metrics is not None
+
+
+def get_multiproc_dir():
+    for env_var in MULTIPROC_DIR_ENV_VARS:
+        if os.environ.get(env_var):
+            return os.environ[env_var]
+    return None
+
+
+def get_content_type():
+    return _metrics.prometheus_client.CONTENT_TYPE_LATEST
+
+
+def generate_latest():
+    prometheus_client = _metrics.prometheus_client
+    if get_multiproc_dir() is None:
+        return prometheus_client.generate_latest(prometheus_client.REGISTRY)
+    from prometheus_client import multiprocess
+
+    registry = prometheus_client.CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=get_multiproc_dir())
+    return prometheus_client.generate_latest(registry)
+
+
+def is_allowed(remote_addr, allowed_networks):
+    try:
+        address = ipaddress.ip_address(remote_addr)
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network.strip())
+        for network in allowed_networks.split(",")
+        if network.strip()
+    )
+
+
+def start_request():
+    if _metrics is None:
+        return
+    _metrics.requests_in_flight.inc()
+    flask.g.metrics_started_at = time.perf_counter()
+
+
+def end_request(response):
+    if _metrics is not None:
+        flask.g.metrics_status_code = response.status_code
+
+
+def teardown_request(engine, exception=None):
+    """Records the duration of the request, teardown_request runs even when
+    an exception was raised before or while the response was processed, the
+    request is then reported with a 500 status."""
+    started_at = flask.g.pop("metrics_started_at", None)
+    if _metrics is None or started_at is None:
+        return
+    status_code = flask.g.get("metrics_status_code")
+    if exception is not None or status_code is None:
+        status_code = 500
+    url_rule = flask.request.url_rule
+    _metrics.request_duration.labels(
+        flask.request.blueprint or "none",
+        url_rule.endpoint if url_rule is not None else "none",
+        flask.request.method,
+        status_code,
+    ).observe(time.perf_counter() - started_at)
+    _metrics.requests_in_flight.dec()
+    pool = engine.pool
+    _metrics.db_pool_size.set(pool.size())
+    _metrics.db_pool_checked_out.set(pool.checkedout())
+    _metrics.db_pool_overflow.set(max(0, pool.overflow()))
+
+
+def observe_checkout_wait(wait):
+    if _metrics is not None:
+        _metrics.db_pool_checkout_wait.observe(wait)
+
+
+def inc_messages_published(nb_messages=1):
+    if _metrics is not None:
+        _metrics.messages_published.inc(nb_messages)
+
+
+def set_messages_queued(nb_messages):
+    if _metrics is not None:
+        _metrics.messages_queued.set(nb_messages)
+
+
+def inc_messages_dropped(nb_messages):
+    if _metrics is not None:
+        _metrics.messages_dropped.inc(nb_messages)
+
+
+def inc_messages_spilled(nb_messages):
+    if _metrics is not None:
+        _metrics.messages_spilled.inc(nb_messages)
+
+
+def inc_events_sent(nb_events):
+    if _metrics is not None:
+        _metrics.events_sent.inc(nb_events)
+
+
+class MeasuredStore(object):
+    """Store wrapper observing the latency of the storage operations."""
+
+    def __init__(self, store):
+        self._store = store
+        self._name = type(store).__name__
+
+    def __getattr__(self, name):
+        attribute = getattr(self._store, name)
+        if name not in STORE_OPERATIONS or _metrics is None:
+            return attribute
+        histogram = _metrics.store_operation_duration.labels(self._name, name)
+
+        def measured(*args, **kwargs):
+            with histogram.time():
+                return attribute(*args, **kwargs)
+
+        return measured
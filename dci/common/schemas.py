@@ -150,12 +150,15 @@ args_schema = {
         "sort": Properties.string,
         "where": Properties.key_value_csv,
         "embed": Properties.string,
+        "fields": Properties.string,
+        "cursor": Properties.string,
+        "count": Properties.enum(["exact", "estimate", "none"]),
         "query": Properties.string,
         "created_after": Properties.isoformat_date,
         "updated_after": Properties.isoformat_date,
     },
     "dependencies": {
-        "limit": {"required": ["offset"]},
+        "limit": {"anyOf": [{"required": ["offset"]}, {"required": ["cursor"]}]},
         "offset": {"required": ["limit"]},
     },
     "additionalProperties": False,
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import collections
+import contextlib
+import logging
+import time
+
+import flask
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings(object):
+    """Time spent by a request in each of its phases and number of SQL
+    statements it ran."""
+
+    def __init__(self, timer=time.perf_counter):
+        self._timer = timer
+        self.started_at = timer()
+        self.phases = collections.OrderedDict()
+        self.sql_count = 0
+
+    def add(self, phase, duration):
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    @contextlib.contextmanager
+    def measure(self, phase):
+        start = self._timer()
+        try:
+            yield
+        finally:
+            self.add(phase, self._timer() - start)
+
+    def total(self):
+        return self._timer() - self.started_at
+
+    def to_dict(self):
+        """Durations in milliseconds."""
+        timings = {"%s_ms" % p: round(d * 1000, 3) for p, d in self.phases.items()}
+        timings["sql_count"] = self.sql_count
+        timings["total_ms"] = round(self.total() * 1000, 3)
+        return timings
+
+    def get_server_timing_header(self):
+        metrics = ["%s;dur=%.3f" % (p, d * 1000) for p, d in self.phases.items()]
+        metrics.append('sql_count;desc="%s"' % self.sql_count)
+        metrics.append("total;dur=%.3f" % (self.total() * 1000))
+        return ", ".join(metrics)
+
+
+def get_request_timings():
+    if not flask.has_app_context():
+        return None
+    return flask.g.get("timings")
+
+
+@contextlib.contextmanager
+def measure(phase):
+    """Add the time spent in the block to the phase of the current request,
+    a no-op when the instrumentation is disabled."""
+    timings = get_request_timings()
+    if timings is None:
+        yield
+        return
+    with timings.measure(phase):
+        yield
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if get_request_timings() is not None:
+        conn.info.setdefault("timings_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timings = get_request_timings()
+    query_start = conn.info.get("timings_query_start")
+    if timings is None or not query_start:
+        return
+    timings.add("sql", time.perf_counter() - query_start.pop())
+    timings.sql_count += 1
+
+
+def instrument_sql():
+    """Time the statements of every engine, the listeners are installed once
+    per process."""
+    for name, listener in (
+        ("before_cursor_execute", _before_cursor_execute),
+        ("after_cursor_execute", _after_cursor_execute),
+    ):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+
+
+class TimedProxy(object):
+    """Add the time spent in the methods of target to phase, used around
+    the store and the notification senders."""
+
+    def __init__(self, target, phase):
+        self._target = target
+        self._phase = phase
+
+    def __getattr__(self, name):
+        attribute = getattr(self._target, name)
+        if not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            with measure(self._phase):
+                return attribute(*args, **kwargs)
+
+        return timed
+
+
+def get_timed_json_encoder(json_encoder):
+    class TimedJSONEncoder(json_encoder):
+        def encode(self, o):
+            with measure("json"):
+                return super(TimedJSONEncoder, self).encode(o)
+
+    return TimedJSONEncoder
@@ -26,6 +26,7 @@ except ImportError:
 
 import six
 from sqlalchemy.engine import result
+from werkzeug.http import unquote_etag
 from werkzeug.routing import BaseConverter, ValidationError
 
 from dci.common import exceptions
@@ -55,7 +56,12 @@ class JSONEncoder(json.JSONEncoder):
     """Default JSON encoder."""
 
     def default(self, o):
-        if isinstance(o, datetime.datetime):
+        # exact types first, default is called for every uuid and datetime
+        if type(o) is uuid.UUID:
+            return str(o)
+        elif type(o) is datetime.datetime:
+            return o.isoformat()
+        elif isinstance(o, datetime.datetime):
             return o.isoformat()
         elif isinstance(o, result.RowProxy):
             return dict(o)
@@ -88,7 +94,10 @@ def check_and_get_etag(headers):
         raise exceptions.DCIException(
             "'If-match' header must be provided", status_code=412
         )
-    return if_match_etag
+    # the ETag of the compressed responses is the weak form of the etag, the
+    # other values are compared as is, some stored etags are quoted
+    etag, weak = unquote_etag(if_match_etag)
+    return etag if weak else if_match_etag
 
 
 def _filter_empty_tags(values):
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import atexit
+import datetime
+import logging
+import threading
+import time
+
+from dci.common import utils
+from dci.db import models2
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLogWriter(object):
+    """Buffers the audit log entries and inserts them in bulk.
+
+    Entries are written with a single multi-row INSERT by a background
+    thread once batch_size entries are buffered or flush_interval seconds
+    after the first one. A batch_size lower or equal to 1 writes every entry
+    synchronously with the session of the request. The buffer is flushed
+    synchronously when the process exits and before the audit log is read.
+    """
+
+    def __init__(self, get_engine, batch_size=100, flush_interval=1.0):
+        self._get_engine = get_engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # entries which could not be written are kept for the next flush as
+        # long as the buffer stays under this size
+        self.max_buffer_size = max(1, batch_size) * 10
+        self._entries = []
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def add(self, user_id, action, session):
+        entry = {
+            "id": utils.gen_uuid(),
+            "user_id": user_id,
+            "action": action,
+            "created_at": datetime.datetime.utcnow(),
+        }
+        if self.batch_size <= 1:
+            session.execute(self._get_insert([entry]))
+            session.commit()
+            return
+        with self._condition:
+            self._entries.append(entry)
+            if len(self._entries) >= self.batch_size:
+                self._condition.notify()
+            self._start()
+
+    def flush(self, session=None):
+        """Write the buffered entries synchronously, with session when given
+        instead of a connection of their own, returns False if they could
+        not be written."""
+        with self._flush_lock:
+            with self._condition:
+                entries, self._entries = self._entries, []
+            if not entries:
+                return True
+            try:
+                if session is None:
+                    with self._get_engine().begin() as conn:
+                        conn.execute(self._get_insert(entries))
+                else:
+                    session.execute(self._get_insert(entries))
+                    session.commit()
+                return True
+            except Exception as e:
+                if session is not None:
+                    session.rollback()
+                logger.error("cannot save audit log: %s" % str(e))
+                with self._condition:
+                    if len(self._entries) + len(entries) <= self.max_buffer_size:
+                        self._entries[0:0] = entries
+                    else:
+                        logger.error("%s audit log entries dropped" % len(entries))
+                return False
+
+    def _get_insert(self, entries):
+        return models2.Log.__table__.insert().values(entries)
+
+    def _start(self):
+        # started on first add, in the worker process and not in the process
+        # which created the application before forking
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._entries:
+                    self._condition.wait()
+                if len(self._entries) < self.batch_size:
+                    self._condition.wait(self.flush_interval)
+            if not self.flush():
+                time.sleep(self.flush_interval)
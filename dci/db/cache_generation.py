@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+
+from sqlalchemy.dialects import postgresql as pg
+
+from dci.common import utils
+from dci.db import models2
+
+# name of the row of the counter table holding the generation of the caches
+COUNTER_NAME = "caches"
+
+
+def get_generation(session):
+    """Return the generation of the caches shared by the processes."""
+    generation = (
+        session.query(models2.Counter.sequence)
+        .filter(models2.Counter.name == COUNTER_NAME)
+        .scalar()
+    )
+    return generation or 0
+
+
+def increment_generation(session):
+    """Increment and return the generation of the caches, in its own
+    transaction so that it runs after the change it invalidates is
+    committed."""
+    now = datetime.datetime.utcnow()
+    counter = models2.Counter.__table__
+    statement = (
+        pg.insert(counter)
+        .values(
+            name=COUNTER_NAME,
+            sequence=1,
+            created_at=now,
+            updated_at=now,
+            etag=utils.gen_etag(),
+        )
+        .on_conflict_do_update(
+            index_elements=[counter.c.name],
+            set_={
+                "sequence": counter.c.sequence + 1,
+                "updated_at": now,
+                "etag": utils.gen_etag(),
+            },
+        )
+        .returning(counter.c.sequence)
+    )
+    generation = session.execute(statement).scalar()
+    session.commit()
+    return generation
@@ -15,91 +15,329 @@
 # under the License.
 
 from dci.common import exceptions as dci_exc
+from dci.common import utils
 from dci.db import query_dsl
 
+import base64
+import json
 import pyparsing as pp
-from sqlalchemy import func, String
-from sqlalchemy.types import ARRAY
+from sqlalchemy import func, orm, sql, String
+from sqlalchemy.dialects import postgresql as pg
+from sqlalchemy.types import ARRAY, Boolean, DateTime, Enum, Float, Integer
 from sqlalchemy.sql.expression import cast
 import datetime
 import uuid
 
 
-class Mixin(object):
-    def serialize(self, ignore_columns=[]):
-        def _get_nested_columns():
-            _res = {}
-            for ic in ignore_columns:
-                if "." in ic:
-                    k, v = ic.split(".")
-                    if k not in _res:
-                        _res[k] = [v]
-                    else:
-                        _res[k].append(v)
-            return _res
-
-        nested_ignore_columns = []
+def _copy_list(value):
+    return list(value) if isinstance(value, list) else value
+
+
+def _uuid_to_str(value):
+    return str(value) if isinstance(value, uuid.UUID) else value
+
+
+def _datetime_to_str(value):
+    return value.isoformat() if isinstance(value, datetime.datetime) else value
+
+
+def _get_column_converter(column_type):
+    if isinstance(column_type, pg.UUID):
+        return _uuid_to_str
+    if isinstance(column_type, DateTime):
+        return _datetime_to_str
+    if isinstance(column_type, (String, Integer, Float, Boolean, Enum)):
+        return None
+    # arrays and json documents
+    return _copy_list
+
+
+_nested_ignore_columns = {}
+
+
+def _get_nested_ignore_columns(ignore_columns):
+    """Returns the ignored columns of the relationships, for instance
+    {"remotecis": ["api_secret"]} for ["remotecis.api_secret"]."""
+    key = tuple(ignore_columns)
+    nested = _nested_ignore_columns.get(key)
+    if nested is None:
+        nested = {}
+        for ic in ignore_columns:
+            if "." in ic:
+                k, v = ic.split(".")
+                nested.setdefault(k, []).append(v)
+        _nested_ignore_columns[key] = nested
+    return nested
+
+
+class _Serializer(object):
+    """Serializer of a mapped class, the converters of its columns and its
+    relationships are computed once from its mapper."""
+
+    def __init__(self, model):
+        mapper = model.__mapper__
+        self.columns = {
+            prop.key: _get_column_converter(prop.columns[0].type)
+            for prop in mapper.column_attrs
+        }
+        self.relationships = {prop.key: prop.uselist for prop in mapper.relationships}
+
+    def __call__(self, obj, ignore_columns, fields):
+        nested_ignore_columns = {}
         if ignore_columns:
-            nested_ignore_columns = _get_nested_columns()
+            nested_ignore_columns = _get_nested_ignore_columns(ignore_columns)
+        columns = self.columns
+        relationships = self.relationships
         _dict = {}
-        _attrs = self.__dict__.keys()
 
-        for attr in _attrs:
-            if attr in ignore_columns:
+        # only the loaded attributes are in __dict__, serializing them never
+        # emits a query
+        for attr, value in obj.__dict__.items():
+            if attr in ignore_columns or (fields and attr not in fields):
                 continue
-            attr_obj = getattr(self, attr)
-            if isinstance(attr_obj, list):
-                _dict[attr] = []
-                for ao in attr_obj:
-                    _ignore_columns = []
-                    if attr in nested_ignore_columns:
-                        _ignore_columns = nested_ignore_columns[attr]
-                    if isinstance(ao, Mixin):
-                        _dict[attr].append(ao.serialize(ignore_columns=_ignore_columns))
-                    else:
-                        _dict[attr].append(ao)
-            elif isinstance(attr_obj, Mixin):
-                _ignore_columns = []
-                if attr in nested_ignore_columns:
-                    _ignore_columns = nested_ignore_columns[attr]
-                _dict[attr] = attr_obj.serialize(ignore_columns=_ignore_columns)
-            elif isinstance(attr_obj, uuid.UUID):
-                _dict[attr] = str(attr_obj)
-            elif isinstance(attr_obj, datetime.datetime):
-                _dict[attr] = attr_obj.isoformat()
-            elif not attr.startswith("_"):
-                _dict[attr] = self.__dict__[attr]
+            if attr in columns:
+                converter = columns[attr]
+                _dict[attr] = value if converter is None else converter(value)
+            elif attr in relationships:
+                _ignore_columns = nested_ignore_columns.get(attr, [])
+                if relationships[attr]:
+                    _dict[attr] = [
+                        (
+                            ao.serialize(ignore_columns=_ignore_columns)
+                            if isinstance(ao, Mixin)
+                            else ao
+                        )
+                        for ao in value
+                    ]
+                elif isinstance(value, Mixin):
+                    _dict[attr] = value.serialize(ignore_columns=_ignore_columns)
+                else:
+                    _dict[attr] = value
+            else:
+                # attribute set on the object but not mapped
+                _ignore_columns = nested_ignore_columns.get(attr, [])
+                if isinstance(value, list):
+                    _dict[attr] = [
+                        (
+                            ao.serialize(ignore_columns=_ignore_columns)
+                            if isinstance(ao, Mixin)
+                            else ao
+                        )
+                        for ao in value
+                    ]
+                elif isinstance(value, Mixin):
+                    _dict[attr] = value.serialize(ignore_columns=_ignore_columns)
+                elif isinstance(value, (uuid.UUID, datetime.datetime)):
+                    _dict[attr] = _datetime_to_str(_uuid_to_str(value))
+                elif not attr.startswith("_"):
+                    _dict[attr] = value
         return _dict
 
 
-def handle_pagination(query, args):
+_serializers = {}
+
+
+class Mixin(object):
+    def serialize(self, ignore_columns=[], fields=None):
+        """fields restricts the serialized attributes to the given ones."""
+        serializer = _serializers.get(self.__class__)
+        if serializer is None:
+            serializer = _serializers[self.__class__] = _Serializer(self.__class__)
+        return serializer(self, ignore_columns, fields)
+
+
+def _get_limit(args):
     limit_max = 200
     default_limit = 20
+    return min(args.get("limit", default_limit), limit_max)
+
+
+def _get_primary_key_name(model_object):
+    mapper = model_object.__mapper__
+    return mapper.get_property_by_column(mapper.primary_key[0]).key
+
+
+def _get_sort_keys(model_object, args):
+    """Return the (column name, ascending) pairs which order the query, the
+    primary key is added to break the ties."""
+    columns = model_object.__mapper__.columns.keys()
+    sort_keys = []
+    for s in args.get("sort") or ["-created_at"]:
+        asc = True
+        if s.startswith("-"):
+            s = s[1:]
+            asc = False
+        if s not in columns:
+            raise dci_exc.DCIException(
+                'Invalid sort key: "%s"' % s,
+                payload={"Valid sort keys": sorted(set(columns))},
+            )
+        sort_keys.append((s, asc))
+    primary_key = _get_primary_key_name(model_object)
+    if primary_key not in [name for name, _ in sort_keys]:
+        sort_keys.append((primary_key, True))
+    return sort_keys
+
+
+def _encode_cursor(sort_keys, values):
+    cursor = json.dumps([sort_keys, values], cls=utils.JSONEncoder)
+    return base64.urlsafe_b64encode(cursor.encode()).decode()
+
+
+def _decode_cursor(cursor, sort_keys):
+    try:
+        cursor_sort_keys, values = json.loads(base64.urlsafe_b64decode(cursor))
+    except (TypeError, ValueError):
+        raise dci_exc.DCIException('Invalid cursor: "%s"' % cursor)
+    if [list(k) for k in sort_keys] != cursor_sort_keys or len(values) != len(
+        sort_keys
+    ):
+        raise dci_exc.DCIException(
+            'Invalid cursor: "%s"' % cursor,
+            payload={"error": "the cursor does not match the sort of the query"},
+        )
+    return values
+
+
+def _is_after(column, value, asc):
+    # null values come last in ascending order and first in descending order
+    if value is None:
+        return sql.false() if asc else column.isnot(None)
+    if asc:
+        return sql.or_(column > value, column.is_(None))
+    return column < value
+
+
+def _is_equal(column, value):
+    return column.is_(None) if value is None else column == value
+
+
+def _get_keyset_filter(model_object, sort_keys, values):
+    """Return the filter of the rows which come after values in the order of
+    sort_keys."""
+    conditions = []
+    for i, (name, asc) in enumerate(sort_keys):
+        previous = [
+            _is_equal(getattr(model_object, n), v)
+            for (n, _), v in zip(sort_keys[:i], values[:i])
+        ]
+        after = _is_after(getattr(model_object, name), values[i], asc)
+        conditions.append(sql.and_(*(previous + [after])))
+    return sql.or_(*conditions)
+
+
+def handle_pagination(query, args, model_object=None):
+    """Paginate the query with limit and either offset or the cursor
+    returned by get_next_cursor in the _meta of the previous page.
+
+    A cursor selects the rows following the last row of the previous page
+    in the order of the sort keys, the cost of a page does not depend on
+    its depth.
+    """
     default_offset = 0
-    query = query.offset(args.get("offset", default_offset))
-    query = query.limit(min(args.get("limit", default_limit), limit_max))
+    if "cursor" in args:
+        if model_object is None:
+            raise dci_exc.DCIException("cursor pagination is not supported")
+        if "offset" in args:
+            raise dci_exc.DCIException("offset and cursor are mutually exclusive")
+        if args["cursor"]:
+            sort_keys = _get_sort_keys(model_object, args)
+            values = _decode_cursor(args["cursor"], sort_keys)
+            query = query.filter(_get_keyset_filter(model_object, sort_keys, values))
+    else:
+        query = query.offset(args.get("offset", default_offset))
+    return query.limit(_get_limit(args))
+
+
+def get_next_cursor(query, args, model_object):
+    """Return the cursor of the page which follows the page returned by the
+    paginated query, None if it is the last one."""
+    sort_keys = _get_sort_keys(model_object, args)
+    rows = query.with_entities(
+        *[getattr(model_object, name) for name, _ in sort_keys]
+    ).all()
+    if not rows or len(rows) < _get_limit(args):
+        return None
+    return _encode_cursor(sort_keys, list(rows[-1]))
+
+
+# in the estimate count mode the rows are counted up to this number, the
+# planner estimates the count of the larger results
+COUNT_ESTIMATE_THRESHOLD = 10000
+
+
+def _get_planner_estimate(query):
+    statement = query.statement
+    connection = query.session.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    plan = connection.execute(
+        "EXPLAIN (FORMAT JSON) %s" % compiled, compiled.params
+    ).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def get_count_meta(query, args):
+    """Return the count of the rows of the filtered query for the _meta of
+    the response, according to the count argument:
+
+    - exact, the default, counts all the rows
+    - estimate counts the rows up to COUNT_ESTIMATE_THRESHOLD and returns
+      the estimate of the planner beyond
+    - none does not count the rows
+
+    The count_mode returned with the count tells which mode produced it
+    when the count argument is given.
+    """
+    mode = args.get("count", "exact")
+    # the order and the eager loads do not change the count
+    query = query.order_by(None).enable_eagerloads(False)
+    if mode == "none":
+        count = None
+    elif mode == "estimate":
+        count = query.limit(COUNT_ESTIMATE_THRESHOLD + 1).count()
+        if count > COUNT_ESTIMATE_THRESHOLD:
+            count = max(_get_planner_estimate(query), count)
+        else:
+            mode = "exact"
+    else:
+        count = query.count()
+    meta = {"count": count}
+    if "count" in args:
+        meta["count_mode"] = mode
+    return meta
+
+
+def handle_fields(query, model_object, fields):
+    """Load only the columns and the relationships listed in fields, the
+    loading options of the query must be set before."""
+    mapper = model_object.__mapper__
+    columns = mapper.column_attrs.keys()
+    relationships = mapper.relationships.keys()
+    for field in fields:
+        if field not in columns and field not in relationships:
+            raise dci_exc.DCIException(
+                'Invalid fields key: "%s"' % field,
+                payload={"Valid fields keys": sorted(set(columns + relationships))},
+            )
+    # the primary key is always loaded
+    load_only = [f for f in fields if f in columns] or [
+        mapper.get_property_by_column(mapper.primary_key[0]).key
+    ]
+    query = query.options(orm.load_only(*load_only))
+    for relationship in relationships:
+        if relationship not in fields:
+            query = query.options(orm.noload(relationship))
     return query
 
 
 def handle_args(query, model_object, args):
-    if args.get("sort"):
-        columns = model_object.__mapper__.columns.keys()
-        for s in args.get("sort"):
-            asc = True
-            if s.startswith("-"):
-                s = s[1:]
-                asc = False
-            if s not in columns:
-                raise dci_exc.DCIException(
-                    'Invalid sort key: "%s"' % s,
-                    payload={"Valid sort keys": sorted(set(columns))},
-                )
-            if asc:
-                query = query.order_by(getattr(model_object, s).asc())
-            else:
-                query = query.order_by(getattr(model_object, s).desc())
-    else:
-        query = query.order_by(getattr(model_object, "created_at").desc())
+    for s, asc in _get_sort_keys(model_object, args):
+        if asc:
+            query = query.order_by(getattr(model_object, s).asc())
+        else:
+            query = query.order_by(getattr(model_object, s).desc())
     where = args.get("where")
     if where:
         columns = model_object.__mapper__.columns.keys()
@@ -159,4 +397,6 @@ def handle_args(query, model_object, args):
         query = query.filter(
             getattr(model_object, "updated_at") >= args.get("updated_after")
         )
+    if args.get("fields"):
+        query = handle_fields(query, model_object, args.get("fields"))
     return query
@@ -116,11 +116,11 @@ class User(dci_declarative.Mixin, Base):
         "Remoteci", secondary=USER_REMOTECIS, back_populates="users"
     )
 
-    def serialize(self, ignore_columns=[]):
+    def serialize(self, ignore_columns=[], fields=None):
         ignore_columns = list(ignore_columns)
         if "password" not in ignore_columns:
             ignore_columns.append("password")
-        return super(User, self).serialize(ignore_columns=ignore_columns)
+        return super(User, self).serialize(ignore_columns=ignore_columns, fields=fields)
 
 
 JOIN_PRODUCTS_TEAMS = sa.Table(
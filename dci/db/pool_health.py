@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import math
+import threading
+import time
+
+from dci.common import exceptions as dci_exc
+from dci.common import metrics
+
+
+class CircuitBreaker(object):
+    """Fail fast while the database is unreachable.
+
+    After `threshold` consecutive connection failures the circuit opens and
+    every checkout is refused with a 503 for `reset_timeout` seconds. Then a
+    single checkout is let through: the circuit closes if it succeeds and
+    opens again if it fails.
+    """
+
+    def __init__(self, threshold, reset_timeout, timer=time.monotonic):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = None
+        self._trial_in_progress = False
+        self._timer = timer
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self._opened_at is None:
+            return "closed"
+        if self._timer() - self._opened_at < self.reset_timeout:
+            return "open"
+        return "half-open"
+
+    def before_checkout(self):
+        """Raise ServiceUnavailable if the checkout must not be attempted."""
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return
+        raise self.get_exception()
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial_in_progress = False
+
+    def cancel_checkout(self):
+        """The checkout failed for a reason which says nothing about the
+        database, like a pool timeout: the trial, if it was one, is given
+        back without counting a failure."""
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_progress or self.failures >= self.threshold:
+                self._opened_at = self._timer()
+            self._trial_in_progress = False
+
+    def get_retry_after(self):
+        if self._opened_at is None:
+            return self.reset_timeout
+        remaining = self.reset_timeout - (self._timer() - self._opened_at)
+        return max(1, int(math.ceil(remaining)))
+
+    def get_exception(self):
+        return dci_exc.ServiceUnavailable(
+            "the database is unreachable", retry_after=self.get_retry_after()
+        )
+
+
+class PoolMetrics(object):
+    """Usage of the connection pool of an engine and time spent waiting for
+    a connection."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.checkouts = 0
+        self.checkout_wait_sum = 0.0
+        self.checkout_wait_max = 0.0
+        self._lock = threading.Lock()
+
+    def observe_checkout(self, wait):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_sum += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+        metrics.observe_checkout_wait(wait)
+
+    def stats(self):
+        pool = self.pool
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            # QueuePool.overflow() starts at -size and only becomes positive
+            # once connections are opened beyond the pool size
+            "overflow": max(0, pool.overflow()),
+            "checkouts": self.checkouts,
+            "checkout_wait_seconds_sum": self.checkout_wait_sum,
+            "checkout_wait_seconds_max": self.checkout_wait_max,
+        }
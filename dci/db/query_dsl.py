@@ -16,6 +16,7 @@
 
 from dci.common import exceptions as dci_exc
 
+import functools
 import pyparsing as pp
 from sqlalchemy import sql
 
@@ -62,12 +63,31 @@ query << (
 )
 
 
+# number of parsed queries kept in memory, the dashboards send the same
+# queries over and over
+PARSE_CACHE_SIZE = 1024
+
+# column names of each model object
+_columns = {}
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse(q):
+    """Parse the query, the parsed queries are cached and must not be
+    modified."""
     return query.parseString(q).asList()
 
 
-def _build(sa_query, parsed_query, model_object):
-    columns = model_object.__mapper__.columns.keys()
+def _get_columns(model_object):
+    columns = _columns.get(model_object)
+    if columns is None:
+        columns = _columns[model_object] = frozenset(
+            model_object.__mapper__.columns.keys()
+        )
+    return columns
+
+
+def _build(sa_query, parsed_query, model_object, columns):
     if isinstance(parsed_query[0], list):
         parsed_query = parsed_query[0]
     op = parsed_query[0]
@@ -77,7 +97,7 @@ def _build(sa_query, parsed_query, model_object):
         sql_op = getattr(sql, op + "_")
         res = []
         for operand in operands:
-            res.append(_build(sa_query, operand, model_object))
+            res.append(_build(sa_query, operand, model_object, columns))
         return sql_op(*res)
 
     value = None
@@ -119,4 +139,5 @@ def _build(sa_query, parsed_query, model_object):
 
 
 def build(sa_query, parsed_query, model_object):
-    return sa_query.filter(_build(sa_query, parsed_query, model_object))
+    columns = _get_columns(model_object)
+    return sa_query.filter(_build(sa_query, parsed_query, model_object, columns))
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import threading
+
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaRouter(object):
+    """Round robin over the engines of the read replicas.
+
+    The circuit breaker of each engine is its health check: a replica whose
+    circuit is open is skipped until its reset timeout expires.
+    """
+
+    def __init__(self, engines):
+        self.engines = engines
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def __bool__(self):
+        return len(self.engines) > 0
+
+    def get_engines(self):
+        """Returns the healthy replicas, starting with the next one in the
+        round robin."""
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % max(1, len(self.engines))
+        engines = self.engines[start:] + self.engines[:start]
+        return [e for e in engines if e.circuit_breaker.state != "open"]
+
+    def stats(self):
+        return [
+            dict(
+                e.pool_metrics.stats(),
+                url=repr(e.url),
+                circuit_breaker=e.circuit_breaker.state,
+            )
+            for e in self.engines
+        ]
+
+
+def is_read_only(request, view):
+    """A request can be served by a replica if its method does not write and
+    its view is not decorated with decorators.primary_database."""
+    return request.method in READ_ONLY_METHODS and not getattr(
+        view, "primary_database", False
+    )
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import logging
+import time
+
+from sqlalchemy import exc as sa_exc
+from sqlalchemy import orm
+
+from dci.common import exceptions as dci_exc
+
+logger = logging.getLogger(__name__)
+
+
+class RequestConnection(object):
+    """Database connection of a request.
+
+    The connection is checked out from the pool on first use only and both
+    flask.g.session and flask.g.db_conn run their statements on it, so a
+    request holds at most one pooled connection and requests which never
+    reach the database, like the ones failing authentication, hold none.
+
+    Read only requests are served by the first healthy replica of `replicas`
+    and fall back on the primary engine when none can be reached. Every
+    other request, and so every write and the reads following it, uses the
+    primary engine. A read only request which has to write after all calls
+    use_primary first.
+    """
+
+    def __init__(self, engine, replicas=None, read_only=False):
+        self.engine = engine
+        self.replicas = replicas if read_only else None
+        self._connection = None
+        self._connection_engine = None
+        self._session = None
+
+    @property
+    def connected(self):
+        return self._connection is not None
+
+    def connection(self):
+        if self._connection is None:
+            self._connection = self._connect_to_replica() or self._connect(self.engine)
+        return self._connection
+
+    def use_primary(self):
+        """Run the rest of the request on the primary engine. A connection to
+        a replica is released, the objects loaded by its session must be
+        loaded again."""
+        self.replicas = None
+        if self._connection is not None and self._connection_engine is not self.engine:
+            self.close()
+
+    def session(self):
+        if self._session is None:
+            self._session = orm.Session(bind=self.connection())
+        return self._session
+
+    def _connect_to_replica(self):
+        if not self.replicas:
+            return None
+        for engine in self.replicas.get_engines():
+            try:
+                return self._connect(engine)
+            except dci_exc.ServiceUnavailable:
+                continue
+        return None
+
+    def _connect(self, engine):
+        """Check out a connection, a database failing to answer opens the
+        engine's circuit breaker and the request is refused with a 503."""
+        circuit_breaker = engine.circuit_breaker
+        circuit_breaker.before_checkout()
+        start = time.monotonic()
+        try:
+            connection = engine.connect()
+        except sa_exc.DBAPIError as e:
+            circuit_breaker.record_failure()
+            logger.warning("failed to connect to the database: %s" % str(e))
+            raise circuit_breaker.get_exception()
+        except BaseException:
+            circuit_breaker.cancel_checkout()
+            raise
+        circuit_breaker.record_success()
+        engine.pool_metrics.observe_checkout(time.monotonic() - start)
+        self._connection_engine = engine
+        return connection
+
+    def close(self):
+        """Release the connection to the pool, the session is closed first
+        so that its pending transaction is rolled back."""
+        try:
+            if self._session is not None:
+                self._session.close()
+        finally:
+            if self._connection is not None:
+                self._connection.close()
+            self._session = None
+            self._connection = None
+            self._connection_engine = None
@@ -16,7 +16,7 @@
 
 import os
 
-from dci.stores import filesystem, s3
+from dci.db import pool_health
 
 import flask
 import sqlalchemy
@@ -33,14 +33,21 @@ def generate_conf(param=None):
 
 
 def get_engine(db_uri):
-    return sqlalchemy.create_engine(
+    engine = sqlalchemy.create_engine(
         db_uri,
         pool_size=CONFIG["SQLALCHEMY_POOL_SIZE"],
         max_overflow=CONFIG["SQLALCHEMY_MAX_OVERFLOW"],
+        pool_pre_ping=CONFIG["SQLALCHEMY_POOL_PRE_PING"],
         encoding="utf8",
         convert_unicode=CONFIG["SQLALCHEMY_NATIVE_UNICODE"],
         echo=CONFIG["SQLALCHEMY_ECHO"],
     )
+    engine.circuit_breaker = pool_health.CircuitBreaker(
+        CONFIG["DB_CIRCUIT_BREAKER_THRESHOLD"],
+        CONFIG["DB_CIRCUIT_BREAKER_RESET_TIMEOUT"],
+    )
+    engine.pool_metrics = pool_health.PoolMetrics(engine.pool)
+    return engine
 
 
 def get_store():
@@ -58,7 +65,12 @@ def get_store():
         configuration["aws_region"] = CONFIG["STORE_S3_AWS_REGION"]
         configuration["endpoint_url"] = CONFIG.get("STORE_S3_ENDPOINT_URL")
         configuration["signature_version"] = CONFIG.get("STORE_S3_SIGNATURE_VERSION")
+        # boto3 is only imported by the deployments using s3
+        from dci.stores import s3
+
         return s3.S3(configuration)
     else:
+        from dci.stores import filesystem
+
         configuration["path"] = CONFIG["STORE_FILE_PATH"]
         return filesystem.FileSystem(configuration)
@@ -13,7 +13,6 @@
 # WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 # License for the specific language governing permissions and limitations
 # under the License.
-import datetime
 import json
 import logging
 from functools import wraps
@@ -22,11 +21,10 @@ import flask
 
 import dci.auth_mechanism as am
 from dci.common import exceptions as dci_exc
+from dci.common import timing
 
 logger = logging.getLogger(__name__)
 
-from dci.db import models2
-
 
 def reject():
     """Sends a 401 reject response that enables basic auth."""
@@ -62,30 +60,46 @@ def _get_auth_class_from_headers(headers):
 
 
 def login_required(f):
+    streamed_body = getattr(f, "streamed_body", False)
+
     @wraps(f)
     def decorated(*args, **kwargs):
         auth_class = _get_auth_class_from_headers(flask.request.headers)
-        auth_scheme = auth_class(flask.request)
-        auth_scheme.authenticate()
+        auth_scheme = auth_class(flask.request, streamed_body=streamed_body)
+        if streamed_body:
+            # a body too large is rejected before the authentication
+            body = auth_scheme.get_streamed_body()
+        with timing.measure("auth"):
+            auth_scheme.authenticate()
+        if streamed_body:
+            flask.g.streamed_body = body
         return f(auth_scheme.identity, *args, **kwargs)
 
     return decorated
 
 
+def streamed_body(f):
+    """The view reads the request body from flask.g.streamed_body instead of
+    flask.request.data, with files_utils.spool_streamed_body which verifies
+    it before the view uses it. To be placed under login_required."""
+    f.streamed_body = True
+    return f
+
+
+def primary_database(f):
+    """The request always uses the primary database, even when it could be
+    served by a read replica. For the views which can not afford to read
+    data lagging behind the primary."""
+    f.primary_database = True
+    return f
+
+
 def log(f):
     @wraps(f)
     def decorated(*args, **kwargs):
         user = args[0]
         try:
-            log = models2.Log(
-                **{
-                    "user_id": user.id,
-                    "action": f.__name__,
-                    "created_at": datetime.datetime.utcnow().isoformat(),
-                }
-            )
-            flask.g.session.add(log)
-            flask.g.session.commit()
+            flask.g.audit_log.add(user.id, f.__name__, flask.g.session)
         except Exception as e:
             flask.g.session.rollback()
             logger.error("cannot save audit log")
@@ -103,7 +117,7 @@ def log_file_info(f):
             key = key.lower().replace("dci-", "").replace("-", "_")
             if key in ["md5", "mime", "jobstate_id", "job_id", "name", "test_id"]:
                 logger.info("DCI-%s:%s" % (key.upper(), value))
-        logger.info("DCI-FILE-SIZE:%s" % len(flask.request.data))
+        logger.info("DCI-FILE-SIZE:%s" % flask.request.content_length)
         return f(*args, **kwargs)
 
     return decorated
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import atexit
+import collections
+import fcntl
+import json
+import logging
+import os
+import threading
+
+from dci.common import metrics
+from dci.common import utils
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop-oldest"
+SPILL = "spill"
+OVERFLOW_POLICIES = (DROP_OLDEST, SPILL)
+
+
+class KombuProducer(object):
+    """Publishes the analytics messages to the AMQP broker.
+
+    publish() only appends the message to a bounded in memory queue, a
+    background thread (a greenlet under the gevent workers) publishes the
+    queued messages in batches with publisher confirms. When the broker is
+    unreachable the thread reconnects with an exponential backoff while the
+    requests keep queueing messages.
+
+    Once the queue is full the overflow policy applies: drop-oldest discards
+    the oldest queued message, spill appends the new message to spill_file,
+    the spilled messages are queued again as soon as the queue is empty.
+    """
+
+    def __init__(
+        self,
+        broker_url,
+        queue_size=10000,
+        batch_size=100,
+        overflow_policy=DROP_OLDEST,
+        spill_file=None,
+        max_backoff=60,
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError("unknown overflow policy '%s'" % overflow_policy)
+        if overflow_policy == SPILL and not spill_file:
+            raise ValueError("the spill overflow policy requires a spill file")
+        self.broker_url = broker_url
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.overflow_policy = overflow_policy
+        self.spill_file = spill_file
+        self.max_backoff = max_backoff
+        self.published = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.errors = 0
+        self._queue = collections.deque()
+        self._condition = threading.Condition()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._connection = None
+        self._producer = None
+
+    def publish(self, message):
+        """Queue the message, it is published by the background thread."""
+        with self._condition:
+            if len(self._queue) >= self.queue_size:
+                if self.overflow_policy == SPILL:
+                    self._spill([message])
+                    return
+                self._queue.popleft()
+                self._drop(1, "the queue is full")
+            self._queue.append(message)
+            metrics.set_messages_queued(len(self._queue))
+            self._condition.notify()
+            self._start()
+
+    def stats(self):
+        with self._condition:
+            return {
+                "queued": len(self._queue),
+                "published": self.published,
+                "dropped": self.dropped,
+                "spilled": self.spilled,
+                "errors": self.errors,
+                "connected": self._producer is not None,
+            }
+
+    def close(self, timeout=5):
+        """Stop the background thread once the queued messages are
+        published, what could not be published by then is spilled or
+        dropped."""
+        with self._condition:
+            self._stopping.set()
+            self._condition.notify()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        self._release()
+
+    def _start(self):
+        # started on first publish, in the worker process and not in the
+        # process which created the application before forking
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    def _run(self):
+        backoff = 0
+        while True:
+            batch = self._get_batch()
+            if not batch:
+                return
+            published = self._publish_batch(batch)
+            if published == len(batch):
+                backoff = 0
+                continue
+            if self._stopping.is_set():
+                self._discard(batch[published:] + self._get_batch(drain=True))
+                return
+            with self._condition:
+                self._queue.extendleft(reversed(batch[published:]))
+            backoff = min(self.max_backoff, max(1, backoff * 2))
+            logger.warning("reconnecting to the broker in %s seconds" % backoff)
+            self._stopping.wait(backoff)
+
+    def _get_batch(self, drain=False):
+        with self._condition:
+            while not self._queue and not self._stopping.is_set():
+                self._load_spilled()
+                if self._queue:
+                    break
+                self._condition.wait()
+            if not self._queue:
+                self._load_spilled()
+            size = len(self._queue) if drain else self.batch_size
+            batch = []
+            while self._queue and len(batch) < size:
+                batch.append(self._queue.popleft())
+            metrics.set_messages_queued(len(self._queue))
+            return batch
+
+    def _publish_batch(self, batch):
+        published = 0
+        try:
+            producer = self._get_producer()
+            for message in batch:
+                producer.publish(message)
+                published += 1
+        except Exception as e:
+            self.errors += 1
+            logger.error("error while trying to publish a message: %s", str(e))
+            self._release()
+        self.published += published
+        metrics.inc_messages_published(published)
+        return published
+
+    def _get_producer(self):
+        if self._producer is not None:
+            return self._producer
+
+        # kombu is imported and the connection created on first publish
+        import kombu
+
+        # with confirm_publish the broker acknowledges every message before
+        # publish returns, a message is only dropped from the queue once the
+        # broker has it
+        self._connection = kombu.Connection(
+            self.broker_url, transport_options={"confirm_publish": True}
+        )
+        exchange = kombu.Exchange("dci.analytics.exchange", type="direct")
+        queue = kombu.Queue(
+            name="dci.analytics.queue",
+            exchange=exchange,
+            routing_key="dci.analytics.jobs",
+        )
+        channel = self._connection.channel()
+        producer = kombu.Producer(
+            exchange=exchange,
+            channel=channel,
+            routing_key="dci.analytics.jobs",
+        )
+        queue.maybe_bind(self._connection)
+        queue.declare()
+        self._producer = producer
+        return producer
+
+    def _release(self):
+        connection = self._connection
+        self._connection = None
+        self._producer = None
+        if connection is not None:
+            try:
+                connection.release()
+            except Exception:
+                pass
+
+    def _discard(self, messages):
+        if not messages:
+            return
+        if self.overflow_policy == SPILL:
+            with self._condition:
+                self._spill(messages)
+        else:
+            self._drop(len(messages), "the broker is unreachable")
+
+    def _drop(self, nb_messages, reason):
+        self.dropped += nb_messages
+        metrics.inc_messages_dropped(nb_messages)
+        logger.warning("%s analytics message(s) dropped, %s" % (nb_messages, reason))
+
+    def _spill(self, messages):
+        try:
+            with open(self.spill_file, "a") as f:
+                # the spill file is shared by the workers
+                fcntl.flock(f, fcntl.LOCK_EX)
+                for message in messages:
+                    f.write(json.dumps(message, cls=utils.JSONEncoder) + "\n")
+        except (OSError, TypeError, ValueError) as e:
+            logger.error("unable to spill messages to %s: %s" % (self.spill_file, e))
+            self._drop(len(messages), "the spill file is not writable")
+            return
+        self.spilled += len(messages)
+        metrics.inc_messages_spilled(len(messages))
+
+    def _load_spilled(self):
+        """Queue the spilled messages which fit in the queue, the others are
+        written back to the spill file."""
+        if self.spill_file is None:
+            return
+        free = self.queue_size - len(self._queue)
+        try:
+            if os.path.getsize(self.spill_file) == 0:
+                return
+            with open(self.spill_file, "r+") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                lines = f.readlines()
+                f.seek(0)
+                f.truncate()
+                f.writelines(lines[free:])
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            logger.error("unable to load the spilled messages: %s" % str(e))
+            return
+        self._queue.extend(json.loads(line) for line in lines[:free])
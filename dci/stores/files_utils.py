@@ -17,9 +17,15 @@
 
 import logging
 import hashlib
+import shutil
+import tempfile
 
 logger = logging.getLogger(__name__)
 
+# the streamed bodies are kept in memory up to this size, on disk beyond
+SPOOL_MAX_SIZE = 1024 * 1024
+SPOOL_CHUNK_SIZE = 64 * 1024
+
 
 def build_file_path(root, middle, file_id):
     root = str(root)
@@ -28,6 +34,22 @@ def build_file_path(root, middle, file_id):
     return "%s/%s/%s" % (root, middle, file_id)
 
 
+def spool_streamed_body(body):
+    """Copy the request body in a temporary file and verify it, the
+    returned file is positioned at its start and has to be closed by the
+    caller. Nothing is looked up or stored for a body which is not the one
+    that was authenticated."""
+    spooled_body = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        shutil.copyfileobj(body, spooled_body, SPOOL_CHUNK_SIZE)
+        body.verify()
+    except BaseException:
+        spooled_body.close()
+        raise
+    spooled_body.seek(0)
+    return spooled_body
+
+
 def md5Checksum(filePath):
     with open(filePath, "rb") as fh:
         m = hashlib.md5()
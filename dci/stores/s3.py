@@ -17,6 +17,7 @@
 import logging
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 from botocore.config import Config
 from dci import stores
@@ -24,6 +25,10 @@ from dci.common import exceptions
 
 logger = logging.getLogger(__name__)
 
+# file objects are sent in parts of this size, bounding the memory used by
+# an upload whatever the size of the file
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
 
 class S3(stores.Store):
     def __init__(self, conf):
@@ -131,4 +136,16 @@ class S3(stores.Store):
                     status_code=int(e.response["Error"]["Code"]),
                 )
 
-        self.s3.put_object(Bucket=bucket, Key=filename, Body=iterable)
+        if hasattr(iterable, "read"):
+            self.s3.upload_fileobj(
+                iterable,
+                bucket,
+                filename,
+                Config=TransferConfig(
+                    multipart_threshold=UPLOAD_CHUNK_SIZE,
+                    multipart_chunksize=UPLOAD_CHUNK_SIZE,
+                    max_concurrency=2,
+                ),
+            )
+        else:
+            self.s3.put_object(Bucket=bucket, Key=filename, Body=iterable)
@@ -1,4 +1,6 @@
 import os
+import shutil
+import tempfile
 
 # Don't manage workers with gunicorn but by spawning more containers and let haproxy handle balancing
 DEFAULT_NB_WORKERS = 1
@@ -6,6 +8,27 @@ workers = int(os.getenv("DCI_NB_WORKERS", DEFAULT_NB_WORKERS))
 worker_connections = int(os.getenv("DCI_GUNICORN_WORKER_CONNECTIONS", 50))
 worker_class = "gevent"
 
+# With several workers the prometheus metrics are kept in files shared by the
+# workers so that /metrics aggregates the values of all of them.
+if workers > 1 and not os.getenv("prometheus_multiproc_dir"):
+    os.environ["prometheus_multiproc_dir"] = tempfile.mkdtemp(prefix="dci-metrics-")
+
+
+def on_starting(server):
+    multiproc_dir = os.getenv("prometheus_multiproc_dir")
+    if multiproc_dir:
+        # drop the values left by a previous run
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir)
+
+
+def child_exit(server, worker):
+    if os.getenv("prometheus_multiproc_dir"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
 # Restart worker after a certain amount of requests to mitigate memory leaks, etc. …
 if os.getenv("DCI_GUNICORN_MAX_REQUESTS") is not None:
     max_requests = int(os.getenv("DCI_GUNICORN_MAX_REQUESTS"))
@@ -22,4 +45,5 @@ if os.getenv("DCI_GUNICORN_GRACEFUL_TIMEOUT") is not None:
 accesslog = "-"
 access_log_format = (
     '%(h)s:%({x-forwarded-for}i)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+    ' "%({server-timing}o)s"'
 )
@@ -38,3 +38,17 @@ def test_audits_acls(client_admin, client_user1):
 
     gaudits = client_user1.get("/api/v1/audits")
     assert gaudits.status_code == 401
+
+
+def test_audits_cursor_pagination(client_admin, client_epm):
+    for i in range(3):
+        client_epm.post("/api/v1/teams", data={"name": "partner%s" % i})
+    audits = client_admin.get("/api/v1/audits").data["audits"]
+    assert len(audits) == 3
+
+    page = client_admin.get("/api/v1/audits?limit=2&cursor=").data
+    assert page["audits"] == audits[:2]
+    cursor = page["_meta"]["next_cursor"]
+    page = client_admin.get("/api/v1/audits?limit=2&cursor=%s" % cursor).data
+    assert page["audits"] == audits[2:]
+    assert page["_meta"] == {"count": 3, "next_cursor": None}
@@ -14,6 +14,14 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import flask
+import mock
+import pytest
+import sqlalchemy as sa
+
+from dci.api.v1 import base
+from dci.db import declarative
+
 
 def test_purge_resource(client_admin, rhel_product):
     data = {
@@ -137,3 +145,199 @@ def test_where_with_forbidden_column_names(client_user1):
 
     request = client_user1.get("/api/v1/jobs?where=cert_fp:brute_force")
     assert request.status_code == 400
+
+
+@pytest.mark.parametrize("pretty", [False, True])
+@pytest.mark.parametrize("nb_items", [0, 1, 3])
+def test_jsonify_stream_is_jsonify(app, pretty, nb_items):
+    items = [
+        {"id": i, "name": "item\n%s" % i, "tags": ["a", "b"]} for i in range(nb_items)
+    ]
+    app.config["JSONIFY_PRETTYPRINT_REGULAR"] = pretty
+    with app.test_request_context():
+        expected = flask.jsonify(
+            {"component": {"name": "c", "jobs": items, "id": 1}, "_meta": {"count": 3}}
+        )
+        streamed = base.jsonify_stream(
+            {
+                "component": {"name": "c", "jobs": base.STREAMED_LIST, "id": 1},
+                "_meta": {"count": 3},
+            },
+            iter(items),
+            headers={"ETag": "etag"},
+        )
+        assert streamed.is_streamed
+        assert streamed.headers["ETag"] == "etag"
+        assert streamed.mimetype == expected.mimetype
+        assert streamed.get_data() == expected.get_data()
+
+
+def test_jsonify_stream_sends_chunks(app):
+    items = [{"id": i} for i in range(10)]
+    with app.test_request_context():
+        with mock.patch.object(base, "STREAM_CHUNK_SIZE", 16):
+            streamed = base.jsonify_stream(
+                {"items": base.STREAMED_LIST}, (i for i in items)
+            )
+            chunks = list(streamed.response)
+    assert len(chunks) > 1
+    assert flask.json.loads("".join(chunks)) == {"items": items}
+
+
+def test_get_all_jobs_is_streamed(app, client_admin, team1_job_id):
+    with mock.patch.object(base, "STREAM_YIELD_PER", 1):
+        response = app.test_client().get(
+            "/api/v1/jobs",
+            headers={"Authorization": "Basic YWRtaW46YWRtaW4="},
+        )
+        assert response.is_streamed
+        jobs = flask.json.loads(response.get_data())
+    assert jobs["_meta"]["count"] == 1
+    assert jobs["jobs"][0]["id"] == team1_job_id
+    assert jobs == client_admin.get("/api/v1/jobs").data
+
+
+def test_fields(client_admin, team1_job_id, engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    sa.event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        jobs = client_admin.get("/api/v1/jobs?fields=id,status,created_at").data
+    finally:
+        sa.event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+    assert jobs["_meta"]["count"] == 1
+    assert jobs["jobs"][0]["id"] == team1_job_id
+    assert set(jobs["jobs"][0]) == {"id", "status", "created_at"}
+    # the columns of the from_self subquery which are not selected by the
+    # outer query are not fetched by postgresql
+    jobs_statements = [s for s in statements if "FROM jobs" in s]
+    assert len(jobs_statements) == 2
+    for statement in jobs_statements:
+        projection = statement.split("FROM")[0]
+        assert "jobs_data" not in projection
+        assert "jobs_tags" not in projection
+    assert not [s for s in statements if "JOIN remotecis" in s]
+    assert not [s for s in statements if "FROM components" in s]
+
+
+def test_fields_with_relationships(client_admin, team1_job_id):
+    jobs = client_admin.get("/api/v1/jobs?fields=id,data,remoteci").data["jobs"]
+    assert set(jobs[0]) == {"id", "data", "remoteci"}
+    assert jobs[0]["remoteci"]["id"]
+
+    jobs = client_admin.get("/api/v1/jobs?embed=remoteci").data["jobs"]
+    assert "data" not in jobs[0]
+    assert "remoteci" in jobs[0]
+
+
+def test_fields_with_invalid_field(client_admin):
+    request = client_admin.get("/api/v1/jobs?fields=id,unknown")
+    assert request.status_code == 400
+    assert "status" in request.data["payload"]["Valid fields keys"]
+
+
+def _walk_with_cursor(client, url, key):
+    items = []
+    cursor = ""
+    while cursor is not None:
+        page = client.get("%s&limit=2&cursor=%s" % (url, cursor)).data
+        assert len(page[key]) <= 2
+        items.extend(page[key])
+        cursor = page["_meta"]["next_cursor"]
+    return [i["id"] for i in items]
+
+
+@pytest.mark.parametrize(
+    "sort", ["", "&sort=team_id", "&sort=-team_id,name", "&sort=-released_at"]
+)
+def test_cursor_pagination(client_admin, rhel_80_topic_id, team1_id, sort):
+    for i in range(5):
+        data = {
+            "name": "c%s" % (i % 2),
+            "version": str(i),
+            "type": "t",
+            "topic_id": rhel_80_topic_id,
+        }
+        if i % 2:
+            data["team_id"] = team1_id
+        assert client_admin.post("/api/v1/components", data=data).status_code == 201
+
+    url = "/api/v1/topics/%s/components?where=type:t%s" % (rhel_80_topic_id, sort)
+    components = client_admin.get("%s&limit=100&offset=0" % url).data["components"]
+    assert len(components) == 5
+    assert _walk_with_cursor(client_admin, url, "components") == [
+        c["id"] for c in components
+    ]
+
+
+def test_cursor_pagination_is_stable(client_admin, rhel_80_topic_id):
+    def create_component(name):
+        data = {"name": name, "type": "t", "topic_id": rhel_80_topic_id}
+        return client_admin.post("/api/v1/components", data=data).data["component"]
+
+    ids = [create_component("c%s" % i)["id"] for i in range(3)]
+    url = "/api/v1/components?where=type:t&sort=-created_at&limit=2&cursor="
+    page = client_admin.get(url).data
+    assert [c["id"] for c in page["components"]] == [ids[2], ids[1]]
+    assert page["_meta"]["count"] == 3
+
+    # the rows inserted before the cursor position do not shift the pages
+    create_component("c3")
+    page = client_admin.get(url + page["_meta"]["next_cursor"]).data
+    assert [c["id"] for c in page["components"]] == [ids[0]]
+    assert page["_meta"]["count"] == 4
+    assert page["_meta"]["next_cursor"] is None
+
+
+def test_cursor_pagination_of_jobs(client_admin, team1_job_id, team_admin_job):
+    ids = _walk_with_cursor(client_admin, "/api/v1/jobs?embed=remoteci", "jobs")
+    jobs = client_admin.get("/api/v1/jobs").data["jobs"]
+    assert ids == [j["id"] for j in jobs]
+    assert len(ids) == 2
+
+
+def test_cursor_pagination_errors(client_admin, team1_job_id, team_admin_job):
+    r = client_admin.get("/api/v1/jobs?limit=2&offset=0&cursor=")
+    assert r.status_code == 400
+    r = client_admin.get("/api/v1/jobs?limit=2&cursor=foo")
+    assert r.status_code == 400
+    cursor = client_admin.get("/api/v1/jobs?limit=1&cursor=").data["_meta"][
+        "next_cursor"
+    ]
+    r = client_admin.get("/api/v1/jobs?limit=1&sort=name&cursor=%s" % cursor)
+    assert r.status_code == 400
+    assert r.data["payload"]["error"] == (
+        "the cursor does not match the sort of the query"
+    )
+
+
+def test_count_modes(client_admin, team1_job_id, team_admin_job):
+    meta = client_admin.get("/api/v1/jobs?embed=remoteci").data["_meta"]
+    assert meta == {"count": 2}
+    meta = client_admin.get("/api/v1/jobs?count=exact").data["_meta"]
+    assert meta == {"count": 2, "count_mode": "exact"}
+    meta = client_admin.get("/api/v1/jobs?count=none").data["_meta"]
+    assert meta == {"count": None, "count_mode": "none"}
+    # under the threshold the estimate is exact
+    meta = client_admin.get("/api/v1/jobs?count=estimate").data["_meta"]
+    assert meta == {"count": 2, "count_mode": "exact"}
+    meta = client_admin.get("/api/v1/topics?count=none").data["_meta"]
+    assert meta == {"count": None, "count_mode": "none"}
+
+    r = client_admin.get("/api/v1/jobs?count=approximate")
+    assert r.status_code == 400
+
+
+def test_count_estimate(client_admin, team1_job_id, team_admin_job):
+    with mock.patch.object(declarative, "COUNT_ESTIMATE_THRESHOLD", 1):
+        r = client_admin.get(
+            "/api/v1/jobs?count=estimate&where=state:active&embed=team"
+        )
+    assert r.status_code == 200
+    assert r.data["_meta"]["count_mode"] == "estimate"
+    assert r.data["_meta"]["count"] >= 2
+    assert len(r.data["jobs"]) == 2
@@ -624,6 +624,25 @@ def test_get_component_by_id_or_name(client_admin, rhel_80_topic_id):
     assert created_ct["component"]["id"] == pc_id
 
 
+def test_get_component_by_id_if_none_match(
+    client_user1, hmac_client_team1, rhel_80_topic, rhel_80_component
+):
+    url = "/api/v1/components/%s" % rhel_80_component["id"]
+    etag = client_user1.get(url).headers["ETag"]
+    data = {
+        "components_ids": [rhel_80_component["id"]],
+        "topic_id": rhel_80_topic["id"],
+    }
+    r = hmac_client_team1.post("/api/v1/jobs/schedule", data=data)
+    team1_job_id = r.data["job"]["id"]
+
+    # the jobs using the component are embedded in the response
+    r = client_user1.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] == etag
+    assert team1_job_id in [j["id"] for j in r.data["component"]["jobs"]]
+
+
 def test_nrt_get_component_by_id_return_list_of_jobs_only_from_team_of_the_user(
     team_admin_job, client_admin, client_user1
 ):
@@ -17,12 +17,15 @@
 from __future__ import unicode_literals
 
 import base64
+import gzip
+import io
 
 import flask
 import mock
 import pytest
 
 from datetime import datetime
+from dciauth.v2.headers import generate_headers
 from datetime import timedelta
 from uuid import UUID
 from sqlalchemy import sql
@@ -228,6 +231,88 @@ def test_get_file_content_as_user(client_user1, team1_jobstate):
     assert get_file.data == content
 
 
+def test_create_file_with_hmac_streams_the_body(
+    app, hmac_client_team1, client_user1, team1_job_id
+):
+    content = "azertyuiop" * 100000
+    headers = {"DCI-JOB-ID": team1_job_id, "DCI-NAME": "large_file"}
+    file_id = hmac_client_team1.post(
+        "/api/v1/files", headers=headers, data=content
+    ).data["file"]["id"]
+
+    get_file = client_user1.get("/api/v1/files/%s/content" % file_id)
+    assert get_file.status_code == 200
+    assert get_file.data == '"%s"' % content
+
+    # the content is compressed while it is sent
+    get_file = app.test_client().get(
+        "/api/v1/files/%s/content" % file_id,
+        headers={
+            "Authorization": "Basic dXNlcjE6dXNlcjE=",
+            "Accept-Encoding": "gzip",
+        },
+    )
+    assert get_file.status_code == 200
+    assert get_file.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in get_file.headers
+    compressed = get_file.get_data()
+    assert len(compressed) < len(content) / 100
+    assert gzip.decompress(compressed).decode() == '"%s"' % content
+
+
+def _get_signed_file_headers(remoteci, job_id, data):
+    headers = generate_headers(
+        {
+            "method": "POST",
+            "endpoint": "/api/v1/files",
+            "data": data,
+            "host": "localhost",
+        },
+        {
+            "access_key": "remoteci/%s" % remoteci["id"],
+            "secret_key": remoteci["api_secret"],
+        },
+    )
+    headers.update({"DCI-JOB-ID": job_id, "DCI-NAME": "forged_file"})
+    return headers
+
+
+def test_create_file_with_invalid_hmac_payload_is_discarded(
+    app, client_user1, team1_remoteci, team1_job_id
+):
+    headers = _get_signed_file_headers(team1_remoteci, team1_job_id, "signed content")
+
+    with mock.patch.object(app.store, "upload") as m_upload:
+        with mock.patch.object(files.base, "get_resource_orm") as m_get_resource:
+            r = app.test_client().post(
+                "/api/v1/files", headers=headers, data="forged content"
+            )
+    assert r.status_code == 400
+    assert b"signature is invalid" in r.data
+    # the job is not even looked up before the signature is verified
+    assert not m_get_resource.called
+    assert not m_upload.called
+
+    files_list = client_user1.get("/api/v1/jobs/%s/files" % team1_job_id).data
+    assert files_list["_meta"]["count"] == 0
+
+
+def test_create_file_larger_than_max_content_length(
+    app, client_user1, team1_remoteci, team1_job_id, monkeypatch
+):
+    content = "x" * 100
+    headers = _get_signed_file_headers(team1_remoteci, team1_job_id, content)
+    monkeypatch.setitem(app.config, "MAX_CONTENT_LENGTH", 10)
+
+    with mock.patch.object(app.store, "upload") as m_upload:
+        r = app.test_client().post("/api/v1/files", headers=headers, data=content)
+    assert r.status_code == 413
+    assert not m_upload.called
+
+    files_list = client_user1.get("/api/v1/jobs/%s/files" % team1_job_id).data
+    assert files_list["_meta"]["count"] == 0
+
+
 def test_change_file_to_invalid_state(client_admin, team1_jobstate_file):
     t = client_admin.get("/api/v1/files/" + team1_jobstate_file).data["file"]
     data = {"state": "file"}
@@ -615,3 +700,18 @@ def test_upload_tests_with_invalid_xml(
     )
     assert file_upload_result.status_code == 400
     assert file_upload_result.data["message"].startswith("Invalid XML: ")
+
+
+def test_create_file_without_content_length(app, team1_job_id):
+    headers = {
+        "Authorization": "Basic dXNlcjE6dXNlcjE=",
+        "DCI-JOB-ID": team1_job_id,
+        "DCI-NAME": "chunked_file",
+        "Transfer-Encoding": "chunked",
+    }
+    with mock.patch.object(app.store, "upload") as m_upload:
+        r = app.test_client().post(
+            "/api/v1/files", headers=headers, input_stream=io.BytesIO(b"chunk")
+        )
+    assert r.status_code == 411
+    assert not m_upload.called
@@ -362,7 +362,8 @@ def test_get_all_jobs_with_subresources(
     hmac_client_team1.post("/api/v1/jobs", data=data)
     hmac_client_team1.post("/api/v1/jobs", data=data)
 
-    jobs = client_admin.get("/api/v1/jobs").data
+    embed = "embed=team,remoteci,results,components"
+    jobs = client_admin.get("/api/v1/jobs?%s" % embed).data
 
     for job in jobs["jobs"]:
         assert "team" in job
@@ -388,7 +389,7 @@ def test_get_all_jobs_with_subresources(
             "Content-Type": "application/junit",
         }
         client_admin.post("/api/v1/files", headers=headers, data=JUNIT)
-    jobs = client_admin.get("/api/v1/jobs").data
+    jobs = client_admin.get("/api/v1/jobs?%s" % embed).data
     assert jobs["_meta"]["count"] == 2
     assert len(jobs["jobs"]) == 2
     for job in jobs["jobs"]:
@@ -426,6 +427,30 @@ def test_get_all_jobs_with_embed_and_limit(
     assert len(jobs["jobs"][0]["components"]) == 1
 
 
+def test_get_all_jobs_embeds_nothing_by_default(client_admin, team1_job_id):
+    job = client_admin.get("/api/v1/jobs").data["jobs"][0]
+    assert job["id"] == team1_job_id
+    for relationship in ("results", "remoteci", "components", "topic", "team"):
+        assert relationship not in job
+
+    job = client_admin.get("/api/v1/jobs?embed=topic,unknown").data["jobs"][0]
+    assert job["topic"]["id"] == job["topic_id"]
+    assert "team" not in job
+
+
+def test_get_all_jobs_embed_all_by_default(app, client_admin, team1_job_id):
+    app.config["JOBS_EMBED_ALL_BY_DEFAULT"] = True
+    job = client_admin.get("/api/v1/jobs").data["jobs"][0]
+    for relationship in ("results", "remoteci", "components", "topic", "team"):
+        assert relationship in job
+    assert job["pipeline"] is None
+    assert job["keys_values"] == []
+
+    job = client_admin.get("/api/v1/jobs?embed=team").data["jobs"][0]
+    assert job["team"]["id"] == job["team_id"]
+    assert "remoteci" not in job
+
+
 def test_update_job(client_admin, team1_job_id):
     data_update = {
         "status": "failure",
@@ -610,6 +635,71 @@ def test_get_job_by_id(hmac_client_team1, rhel_80_topic_id, rhel_80_component_id
     assert "files" in job["job"]
 
 
+def test_get_job_by_id_if_none_match(
+    client_admin, client_user1, client_user2, team1_job
+):
+    url = "/api/v1/jobs/%s" % team1_job["id"]
+    etag = client_user1.get(url).headers["ETag"]
+    assert etag == team1_job["etag"]
+
+    r = client_user1.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.headers["ETag"] == etag
+    assert not r.data
+    r = client_user1.get(url, headers={"If-None-Match": '"foo", W/"%s"' % etag})
+    assert r.status_code == 304
+
+    # the etag is checked after the permissions
+    assert client_user2.get(url, headers={"If-None-Match": etag}).status_code == 404
+
+    r = client_admin.put(url, headers={"If-match": etag}, data={"comment": "new"})
+    assert r.status_code == 200
+    r = client_user1.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.data["job"]["comment"] == "new"
+    assert r.headers["ETag"] == r.data["job"]["etag"] != etag
+
+
+def test_get_job_by_id_if_none_match_after_embedded_changes(
+    client_user1, team1_id, rhel_80_topic_id, team1_job
+):
+    url = "/api/v1/jobs/%s" % team1_job["id"]
+    data = {
+        "name": "pname",
+        "type": "gerrit_review",
+        "team_id": team1_id,
+        "topic_id": rhel_80_topic_id,
+    }
+    pc_id = client_user1.post("/api/v1/components", data=data).data["component"]["id"]
+
+    def get_revalidated_job(etag):
+        r = client_user1.get(url, headers={"If-None-Match": etag})
+        assert r.status_code == 200
+        assert r.headers["ETag"] != etag
+        return r
+
+    etag = team1_job["etag"]
+    client_user1.post("%s/components" % url, data={"id": pc_id})
+    r = get_revalidated_job(etag)
+    assert pc_id in [c["id"] for c in r.data["job"]["components"]]
+
+    etag = r.headers["ETag"]
+    client_user1.delete("%s/components/%s" % (url, pc_id))
+    r = get_revalidated_job(etag)
+    assert pc_id not in [c["id"] for c in r.data["job"]["components"]]
+
+    etag = r.headers["ETag"]
+    data = {"status": "running", "job_id": team1_job["id"]}
+    js_id = client_user1.post("/api/v1/jobstates", data=data).data["jobstate"]["id"]
+    r = get_revalidated_job(etag)
+    assert r.data["job"]["status"] == "running"
+
+    etag = r.headers["ETag"]
+    client_user1.delete("/api/v1/jobstates/%s" % js_id)
+    r = get_revalidated_job(etag)
+    assert js_id not in [js["id"] for js in r.data["job"]["jobstates"]]
+
+
 def test_get_jobstates_by_job_id(client_admin, client_user1, team1_job_id):
     data = {"status": "new", "job_id": team1_job_id}
     jobstate_ids = set(
@@ -16,6 +16,8 @@
 
 import mock
 
+from dci.db import models2
+
 
 @mock.patch("dci.api.v1.notifications.job_dispatcher")
 def test_jobs_events_create(
@@ -57,6 +59,18 @@ def test_get_jobs_events_sequence(client_admin):
     assert sequence["sequence"] == 0
 
 
+def test_get_jobs_events_sequence_created_on_the_primary(
+    session, read_only_replica, client_admin
+):
+    session.query(models2.Counter).filter(
+        models2.Counter.name == "jobs_events"
+    ).delete()
+    session.commit()
+    sequence = client_admin.get("/api/v1/jobs_events/sequence")
+    assert sequence.status_code == 200
+    assert sequence.data["sequence"]["sequence"] == 0
+
+
 def test_put_jobs_events_sequence(client_admin):
     sequence = client_admin.get("/api/v1/jobs_events/sequence")
     assert sequence.status_code == 200
@@ -144,9 +144,10 @@ def test_delete_a_remoteci_delete_the_associated_subscriptions(
     r = client_user1.post("/api/v1/remotecis/%s/users" % remoteci["id"])
     assert r.status_code == 201
 
+    # the subscription changed the etag of the remoteci
+    url = "/api/v1/remotecis/%s" % remoteci["id"]
     r = client_user1.delete(
-        "/api/v1/remotecis/%s" % remoteci["id"],
-        headers={"If-match": remoteci["etag"]},
+        url, headers={"If-match": client_user1.get(url).headers["ETag"]}
     )
     assert r.status_code == 204
 
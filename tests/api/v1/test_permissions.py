@@ -0,0 +1,144 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import contextlib
+import uuid
+
+import flask
+from sqlalchemy import event
+
+from dci.api.v1 import permissions
+from dci import identity
+from dci.db import models2
+from tests.utils import generate_client
+
+
+@contextlib.contextmanager
+def count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_get_components_access_teams_ids_is_cached(
+    app, engine, session, client_admin, team1_id, team2_id, team3_id
+):
+    for team_id in (team2_id, team3_id):
+        r = client_admin.post(
+            "/api/v1/teams/%s/permissions/components" % team_id,
+            data={"teams_ids": [team1_id]},
+        )
+        assert r.status_code == 201
+    teams_ids = [uuid.UUID(team2_id), uuid.UUID(team3_id)]
+
+    with app.test_request_context():
+        app.preprocess_request()
+        flask.g.session = session
+        with count_queries(engine) as statements:
+            assert permissions.get_components_access_teams_ids(teams_ids) == [
+                uuid.UUID(team1_id),
+                uuid.UUID(team1_id),
+            ]
+            assert permissions.get_components_access_teams_ids(teams_ids)
+            # the generation of the caches and the access teams
+            assert len(statements) == 2
+
+    with app.test_request_context():
+        app.preprocess_request()
+        flask.g.session = session
+        with count_queries(engine) as statements:
+            assert permissions.get_components_access_teams_ids(teams_ids)
+            assert len(statements) == 1
+
+    r = client_admin.delete(
+        "/api/v1/teams/%s/permissions/components" % team2_id,
+        data={"teams_ids": [team1_id]},
+    )
+    assert r.status_code == 204
+
+    with app.test_request_context():
+        app.preprocess_request()
+        flask.g.session = session
+        assert permissions.get_components_access_teams_ids(teams_ids) == [
+            uuid.UUID(team1_id)
+        ]
+
+
+def test_has_access_to_topic_is_cached(
+    app, engine, session, client_admin, rhel_product, rhel_80_topic
+):
+    team = client_admin.post("/api/v1/teams", data={"name": "partner"}).data["team"]
+    user = identity.Identity({"teams": {uuid.UUID(team["id"]): team}})
+    topic = models2.Topic(
+        id=uuid.UUID(rhel_80_topic["id"]),
+        product_id=uuid.UUID(rhel_product["id"]),
+        export_control=True,
+    )
+
+    def has_access_to_topic():
+        with app.test_request_context():
+            app.preprocess_request()
+            flask.g.session = session
+            with count_queries(engine) as statements:
+                has_access = permissions.has_access_to_topic(user, topic)
+            return has_access, len(statements)
+
+    # the generation of the caches is read by every request
+    assert has_access_to_topic() == (False, 3)
+    assert has_access_to_topic() == (False, 1)
+
+    r = client_admin.post(
+        "/api/v1/products/%s/teams" % rhel_product["id"],
+        data={"team_id": team["id"]},
+    )
+    assert r.status_code == 201
+    assert has_access_to_topic() == (True, 3)
+    assert has_access_to_topic() == (True, 1)
+
+    topic.export_control = False
+    assert has_access_to_topic() == (False, 3)
+
+    r = client_admin.delete(
+        "/api/v1/products/%s/teams/%s" % (rhel_product["id"], team["id"])
+    )
+    assert r.status_code == 204
+    topic.export_control = True
+    assert has_access_to_topic() == (False, 3)
+
+
+def test_components_access_changed_by_another_process(
+    app, other_app, session, team1_id, team2_id
+):
+    def get_components_access_teams_ids():
+        with app.test_request_context():
+            app.preprocess_request()
+            flask.g.session = session
+            return permissions.get_components_access_teams_ids([uuid.UUID(team2_id)])
+
+    assert get_components_access_teams_ids() == []
+    r = generate_client(other_app, ("admin", "admin")).post(
+        "/api/v1/teams/%s/permissions/components" % team2_id,
+        data={"teams_ids": [team1_id]},
+    )
+    assert r.status_code == 201
+    assert get_components_access_teams_ids() == [uuid.UUID(team1_id)]
@@ -118,6 +118,18 @@ def test_get_pipelines(hmac_client_team1, team1_id):
     assert len(pipelines.data["pipelines"]) == 3
 
 
+def test_get_pipeline_by_id_if_none_match(client_user1, client_user2, team1_id):
+    pipeline = client_user1.post(
+        "/api/v1/pipelines", data={"name": "pipeline1", "team_id": team1_id}
+    ).data["pipeline"]
+    url = "/api/v1/pipelines/%s" % pipeline["id"]
+    assert client_user1.get(url).headers["ETag"] == pipeline["etag"]
+
+    headers = {"If-None-Match": pipeline["etag"]}
+    assert client_user1.get(url, headers=headers).status_code == 304
+    assert client_user2.get(url, headers=headers).status_code == 401
+
+
 def test_update_pipeline(client_user1, hmac_client_team1, team1_id):
     pipeline = hmac_client_team1.post(
         "/api/v1/pipelines",
@@ -158,6 +158,33 @@ def test_get_remoteci_by_id(client_user1, team1_id):
     assert created_r["remoteci"]["id"] == pr_id
 
 
+def test_get_remoteci_by_id_if_none_match(client_user1, client_user2, team1_remoteci):
+    url = "/api/v1/remotecis/%s" % team1_remoteci["id"]
+    headers = {"If-None-Match": team1_remoteci["etag"]}
+    assert client_user1.get(url, headers=headers).status_code == 304
+    assert client_user2.get(url, headers=headers).status_code == 401
+    r = client_user1.get(url, headers={"If-None-Match": "foo"})
+    assert r.status_code == 200
+    assert r.headers["ETag"] == team1_remoteci["etag"]
+
+
+def test_get_remoteci_by_id_if_none_match_after_users_change(
+    client_user1, user1_id, team1_remoteci
+):
+    url = "/api/v1/remotecis/%s" % team1_remoteci["id"]
+    etag = team1_remoteci["etag"]
+    assert client_user1.post("%s/users" % url).status_code == 201
+    r = client_user1.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert [u["id"] for u in r.data["remoteci"]["users"]] == [user1_id]
+
+    etag = r.headers["ETag"]
+    assert client_user1.delete("%s/users/%s" % (url, user1_id)).status_code == 204
+    r = client_user1.get(url, headers={"If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.data["remoteci"]["users"] == []
+
+
 def test_get_remoteci_with_embed(client_user1, team1_id):
     team = client_user1.get("/api/v1/teams/%s" % team1_id).data["team"]
     premoteci = client_user1.post(
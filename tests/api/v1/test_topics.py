@@ -323,6 +323,12 @@ def test_get_topic_by_id(client_admin, client_user1, rhel_product):
     assert created_ct["topic"]["id"] == pt_id
 
 
+def test_get_topic_by_id_if_none_match(client_user1, rhel_81_topic):
+    url = "/api/v1/topics/%s" % rhel_81_topic["id"]
+    headers = {"If-None-Match": rhel_81_topic["etag"]}
+    assert client_user1.get(url, headers=headers).status_code == 401
+
+
 def test_get_topic_not_found(client_admin):
     result = client_admin.get("/api/v1/topics/%s" % uuid.uuid4())
     assert result.status_code == 404
@@ -18,6 +18,8 @@ from dci.db import models2
 from dci import auth
 from tests import utils
 
+import mock
+
 
 def test_nrt_one_user_s_name_is_equal_to_the_email_of_another_user(session, app):
     session.add(
@@ -56,3 +58,36 @@ def test_user_without_password_cannot_basic_auth(session, app):
     session.commit()
     user = utils.generate_client(app, ("nopassword@example.org", ""))
     assert user.get("/api/v1/identity").status_code == 401
+
+
+def test_basic_auth_successful_verification_is_cached(app, client_user1):
+    app.credentials_cache.clear()
+    with mock.patch(
+        "dci.auth_mechanism.check_passwords_equal",
+        side_effect=auth.check_passwords_equal,
+    ) as check_passwords_equal:
+        assert client_user1.get("/api/v1/identity").status_code == 200
+        assert client_user1.get("/api/v1/identity").status_code == 200
+        assert check_passwords_equal.call_count == 1
+
+
+def test_basic_auth_failed_verification_is_not_cached(app):
+    app.credentials_cache.clear()
+    client = utils.generate_client(app, ("user1", "wrong password"))
+    assert client.get("/api/v1/identity").status_code == 401
+    assert client.get("/api/v1/identity").status_code == 401
+    assert len(app.credentials_cache) == 0
+
+
+def test_basic_auth_password_change_invalidates_cached_verification(app, client_user1):
+    identity = client_user1.get("/api/v1/identity")
+    assert identity.status_code == 200
+    r = client_user1.put(
+        "/api/v1/identity",
+        data={"current_password": "user1", "new_password": "new password"},
+        headers={"If-match": identity.headers["ETag"]},
+    )
+    assert r.status_code == 200
+    assert client_user1.get("/api/v1/identity").status_code == 401
+    client = utils.generate_client(app, ("user1", "new password"))
+    assert client.get("/api/v1/identity").status_code == 200
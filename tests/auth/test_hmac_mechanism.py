@@ -14,8 +14,14 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import hashlib
+import io
+
 from dci import auth_mechanism
+from dciauth.v2.headers import generate_headers, parse_headers
+from tests.utils import generate_client
 import flask
+import pytest
 
 
 def test_hmac_mechanism_api_get_jobs_remoteci(hmac_client_team1):
@@ -47,6 +53,7 @@ def test_nrt_build_identity_with_remoteci_inactive(
         flask.g.team_redhat_id = team_redhat_id
         flask.g.team_epm_id = team_epm_id
         flask.g.session = session
+        flask.g.identity_cache = app.identity_cache
         hm = auth_mechanism.HmacMechanism(None)
         bi = hm.build_identity(
             client_info={"client_type": "remoteci", "client_id": team1_remoteci["id"]}
@@ -68,3 +75,126 @@ def test_nrt_build_identity_with_remoteci_inactive(
             client_info={"client_type": "remoteci", "client_id": team1_remoteci["id"]}
         )
         assert bi is None
+
+
+def test_hmac_mechanism_identity_is_cached(app, hmac_client_team1):
+    app.identity_cache.clear()
+    assert hmac_client_team1.get("/api/v1/jobs").status_code == 200
+    misses = app.identity_cache.misses
+    hits = app.identity_cache.hits
+    assert hmac_client_team1.get("/api/v1/jobs").status_code == 200
+    assert app.identity_cache.misses == misses
+    assert app.identity_cache.hits == hits + 1
+
+
+def test_hmac_mechanism_rotated_remoteci_secret_invalidates_identity(
+    app, client_user1, hmac_client_team1, team1_remoteci
+):
+    assert hmac_client_team1.get("/api/v1/jobs").status_code == 200
+    r = client_user1.put(
+        "/api/v1/remotecis/%s/api_secret" % team1_remoteci["id"],
+        headers={"If-match": team1_remoteci["etag"]},
+    )
+    assert r.status_code == 200
+    assert hmac_client_team1.get("/api/v1/jobs").status_code == 400
+
+
+def test_hmac_mechanism_rotated_feeder_secret_invalidates_identity(
+    app, client_user1, hmac_client_feeder, team1_feeder
+):
+    assert hmac_client_feeder.get("/api/v1/jobs").status_code == 200
+    r = client_user1.put(
+        "/api/v1/feeders/%s/api_secret" % team1_feeder["id"],
+        headers={"If-match": team1_feeder["etag"]},
+    )
+    assert r.status_code == 200
+    assert hmac_client_feeder.get("/api/v1/jobs").status_code == 400
+
+
+def test_hmac_mechanism_inactive_team_invalidates_identity(
+    app, client_admin, hmac_client_team1, team1_id
+):
+    assert hmac_client_team1.get("/api/v1/jobs").status_code == 200
+    team = client_admin.get("/api/v1/teams/%s" % team1_id).data["team"]
+    r = client_admin.put(
+        "/api/v1/teams/%s" % team1_id,
+        data={"state": "inactive"},
+        headers={"If-match": team["etag"]},
+    )
+    assert r.status_code == 200
+    assert hmac_client_team1.get("/api/v1/jobs").status_code == 412
+
+
+def test_get_caches_stats(client_admin, client_user1, hmac_client_team1):
+    hmac_client_team1.get("/api/v1/jobs")
+    caches = client_admin.get("/api/v1/caches").data["caches"]
+    assert caches["identity"]["size"] >= 1
+    assert "hits" in caches["identity"]
+    assert "misses" in caches["identity"]
+    assert client_user1.get("/api/v1/caches").status_code == 401
+
+
+@pytest.mark.parametrize(
+    "method,endpoint,params,data",
+    [
+        ("POST", "/api/v1/files", {"embed": "team"}, b"file content"),
+        ("POST", "/api/v1/components/1234/files", {}, b""),
+        ("GET", "/api/v1/jobs", {"where": "name:a b", "limit": 10}, b""),
+        ("PUT", "/api/v1/jobs/%C3%A9t%C3%A9", None, "\u00e9t\u00e9".encode()),
+    ],
+)
+def test_get_hmac_signature_matches_dciauth(method, endpoint, params, data):
+    # get_hmac_signature relies on private helpers of dciauth, this test
+    # fails if the pinned release changes them
+    request = {
+        "method": method,
+        "endpoint": endpoint,
+        "params": params,
+        "data": data,
+        "host": "localhost",
+    }
+    headers = generate_headers(
+        dict(request), {"access_key": "remoteci/1234", "secret_key": "secret"}
+    )
+    parsed_headers = parse_headers(dict(headers, host="localhost"))
+    request = dict(parsed_headers, method=method, endpoint=endpoint, params=params)
+
+    signature = auth_mechanism.get_hmac_signature(
+        request, "secret", hashlib.sha256(data).hexdigest()
+    )
+    assert signature == parsed_headers["signature"]
+
+
+def test_streamed_body_does_not_read_beyond_its_length():
+    body = auth_mechanism.StreamedBody(io.BytesIO(b"0123456789"), 4)
+    assert body.read(3) == b"012"
+    assert body.read() == b"3"
+    assert body.read(10) == b""
+
+
+def test_hmac_mechanism_secret_rotated_by_another_process(
+    app, other_app, hmac_client_team1, team1_remoteci
+):
+    assert hmac_client_team1.get("/api/v1/jobs").status_code == 200
+    r = generate_client(other_app, ("user1", "user1")).put(
+        "/api/v1/remotecis/%s/api_secret" % team1_remoteci["id"],
+        headers={"If-match": team1_remoteci["etag"]},
+    )
+    assert r.status_code == 200
+    assert len(app.identity_cache) == 1
+    assert hmac_client_team1.get("/api/v1/jobs").status_code == 400
+
+
+def test_hmac_mechanism_team_deactivated_by_another_process(
+    app, other_app, hmac_client_team1, team1_id
+):
+    assert hmac_client_team1.get("/api/v1/jobs").status_code == 200
+    other_client_admin = generate_client(other_app, ("admin", "admin"))
+    team = other_client_admin.get("/api/v1/teams/%s" % team1_id).data["team"]
+    r = other_client_admin.put(
+        "/api/v1/teams/%s" % team1_id,
+        data={"state": "inactive"},
+        headers={"If-match": team["etag"]},
+    )
+    assert r.status_code == 200
+    assert hmac_client_team1.get("/api/v1/jobs").status_code == 412
@@ -15,6 +15,7 @@
 # under the License.
 
 import datetime
+import time
 
 import dci.auth_mechanism as authm
 from dci.common import exceptions as dci_exc
@@ -50,6 +51,7 @@ def test_sso_auth_verified(
         flask.g.team_redhat_id = team_redhat_id
         flask.g.team_epm_id = team_epm_id
         flask.g.session = session
+        flask.g.sso_identity_cache = app.sso_identity_cache
         mech = authm.OpenIDCAuth(sso_headers)
         assert mech.authenticate()
         assert mech.identity.name == "user4"
@@ -109,6 +111,7 @@ def test_sso_auth_verified_rh_employee(
         flask.g.team_redhat_id = team_redhat_id
         flask.g.team_epm_id = team_epm_id
         flask.g.session = session
+        flask.g.sso_identity_cache = app.sso_identity_cache
         mech = authm.OpenIDCAuth(sso_headers)
         assert mech.authenticate()
         assert mech.identity.name == "rh_employee"
@@ -319,6 +322,7 @@ def test_sso_auth_not_verified(
     with app.app_context():
         flask.g.team_admin_id = team_admin_id
         flask.g.session = session
+        flask.g.sso_identity_cache = app.sso_identity_cache
         mech = authm.OpenIDCAuth(sso_headers)
         with pytest.raises(dci_exc.DCIException):
             mech.authenticate()
@@ -355,3 +359,90 @@ def test_sso_auth_get_current_user(
         flask.g.session = session
         request = sso_client_user1.get("/api/v1/users/me?embed=team,remotecis")
         assert request.status_code == 200
+
+
+def _generate_jdoe_token(**claims):
+    payload = {
+        "aud": "dci",
+        "sub": "f:436a6686-719b-43ab-a01e-5ecd50b0c8fc:jdoe1@example.org",
+        "typ": "Bearer",
+        "scope": "openid",
+        "name": "John Doe",
+        "email": "jdoe@example.org",
+        "username": "jdoe1@example.org",
+    }
+    payload.update(claims)
+    return generate_jwt(payload, SSO_PRIVATE_KEY)
+
+
+def test_sso_auth_identity_is_cached(app):
+    john_doe_client = generate_client(app, access_token=_generate_jdoe_token())
+    assert john_doe_client.get("/api/v1/identity").status_code == 200
+    with mock.patch("dci.auth_mechanism.decode_jwt") as m_decode_jwt:
+        with mock.patch.object(authm.BaseMechanism, "get_user") as m_get_user:
+            r = john_doe_client.get("/api/v1/identity")
+            assert r.status_code == 200
+            assert r.data["identity"]["name"] == "jdoe1@example.org"
+            assert not m_decode_jwt.called
+            assert not m_get_user.called
+
+
+def test_sso_auth_identity_is_cached_until_token_expiration(app):
+    exp = int(time.time()) + 120
+    john_doe_client = generate_client(app, access_token=_generate_jdoe_token(exp=exp))
+    with mock.patch.object(app.sso_identity_cache, "_timer", return_value=0):
+        assert john_doe_client.get("/api/v1/identity").status_code == 200
+    with mock.patch("dci.auth_mechanism.decode_jwt") as m_decode_jwt:
+        with mock.patch.object(app.sso_identity_cache, "_timer", return_value=100):
+            assert john_doe_client.get("/api/v1/identity").status_code == 200
+            assert not m_decode_jwt.called
+        with mock.patch.object(app.sso_identity_cache, "_timer", return_value=130):
+            john_doe_client.get("/api/v1/identity")
+            assert m_decode_jwt.called
+
+
+def test_sso_auth_get_token_ttl():
+    with mock.patch("dci.auth_mechanism.time.time", return_value=1000):
+        assert authm.OpenIDCAuth._get_token_ttl({"exp": 1060}) == 60
+        assert authm.OpenIDCAuth._get_token_ttl({"exp": 900}) == -100
+        assert authm.OpenIDCAuth._get_token_ttl({}) is None
+
+
+def test_sso_auth_cached_identity_respects_team_scope(app, client_admin, team1_id):
+    token = _generate_jdoe_token()
+    john_doe_client = generate_client(app, access_token=token)
+    # the test client keeps the headers of the previous requests
+    john_doe_team1_client = generate_client(app, access_token=token)
+    team1_scope = {"X-Dci-Team-Id": team1_id}
+
+    jdoe = john_doe_client.get("/api/v1/identity").data["identity"]
+    assert jdoe["teams"] == {}
+    r = john_doe_team1_client.get("/api/v1/identity", headers=team1_scope)
+    assert r.status_code == 401
+
+    r = client_admin.post("/api/v1/teams/%s/users/%s" % (team1_id, jdoe["id"]))
+    assert r.status_code == 201
+    r = john_doe_team1_client.get("/api/v1/identity", headers=team1_scope)
+    assert r.status_code == 200
+    assert list(r.data["identity"]["teams"].keys()) == [team1_id]
+    r = john_doe_client.get("/api/v1/identity")
+    assert list(r.data["identity"]["teams"].keys()) == [team1_id]
+
+    r = client_admin.delete("/api/v1/teams/%s/users/%s" % (team1_id, jdoe["id"]))
+    assert r.status_code == 204
+    r = john_doe_client.get("/api/v1/identity")
+    assert r.data["identity"]["teams"] == {}
+    r = john_doe_team1_client.get("/api/v1/identity", headers=team1_scope)
+    assert r.status_code == 401
+
+
+def test_sso_auth_cached_identity_updated_by_another_process(app, other_app, team1_id):
+    john_doe_client = generate_client(app, access_token=_generate_jdoe_token())
+    jdoe = john_doe_client.get("/api/v1/identity").data["identity"]
+    assert jdoe["teams"] == {}
+
+    other_client_admin = generate_client(other_app, ("admin", "admin"))
+    r = other_client_admin.post("/api/v1/teams/%s/users/%s" % (team1_id, jdoe["id"]))
+    assert r.status_code == 201
+    r = john_doe_client.get("/api/v1/identity")
+    assert list(r.data["identity"]["teams"].keys()) == [team1_id]
@@ -0,0 +1,157 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from jwt.algorithms import RSAAlgorithm
+
+from dci.api.v1 import sso
+from dci.common import exceptions as dci_exc
+from dci import dci_config
+from tests.settings import SSO_PRIVATE_KEY, SSO_PUBLIC_KEY
+
+
+def _get_jwk(kid):
+    public_key = serialization.load_pem_public_key(
+        SSO_PUBLIC_KEY.encode("utf-8"), default_backend()
+    )
+    jwk = json.loads(RSAAlgorithm.to_jwk(public_key))
+    jwk["kid"] = kid
+    return jwk
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 1000
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sso_server(monkeypatch):
+    server = HTTPServer(("127.0.0.1", 0), None)
+    url = "http://127.0.0.1:%s" % server.server_port
+    state = {"kids": ["key1"], "requests": [], "delay": 0}
+
+    class SSOHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["requests"].append(self.path)
+            time.sleep(state["delay"])
+            if self.path.endswith("/.well-known/openid-configuration"):
+                content = {"jwks_uri": "%s/certs" % url}
+            else:
+                content = {"keys": [_get_jwk(kid) for kid in state["kids"]]}
+            body = json.dumps(content).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server.RequestHandlerClass = SSOHandler
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setitem(dci_config.CONFIG, "SSO_URL", url)
+    monkeypatch.setitem(dci_config.CONFIG, "SSO_JWKS_REFRESH_INTERVAL", 3600)
+    monkeypatch.setitem(dci_config.CONFIG, "SSO_JWKS_MIN_REFRESH_INTERVAL", 30)
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def _wait_for(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_jwks_key_cache_serves_known_keys_from_memory(sso_server):
+    cache = sso.JWKSKeyCache(timer=FakeTimer())
+    key = cache.get("key1")
+    assert b"BEGIN PUBLIC KEY" in key
+    assert len(sso_server["requests"]) == 2
+    assert cache.get("key1") == key
+    assert len(sso_server["requests"]) == 2
+
+
+def test_jwks_key_cache_rate_limits_unknown_kids(sso_server):
+    timer = FakeTimer()
+    cache = sso.JWKSKeyCache(timer=timer)
+    cache.get("key1")
+    timer.now += 31
+    with pytest.raises(dci_exc.DCIException):
+        cache.get("unknown")
+    assert len(sso_server["requests"]) == 4
+    for _ in range(10):
+        with pytest.raises(dci_exc.DCIException):
+            cache.get("unknown")
+    assert len(sso_server["requests"]) == 4
+
+    sso_server["kids"] = ["key1", "key2"]
+    timer.now += 31
+    assert cache.get("key2")
+    assert len(sso_server["requests"]) == 6
+
+
+def test_jwks_key_cache_shares_in_flight_fetch(sso_server):
+    sso_server["delay"] = 0.2
+    cache = sso.JWKSKeyCache(timer=FakeTimer())
+    keys = []
+    threads = [
+        threading.Thread(target=lambda: keys.append(cache.get("key1")))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(keys) == 10
+    assert len(sso_server["requests"]) == 2
+
+
+def test_jwks_key_cache_refreshes_stale_keys_in_background(sso_server):
+    timer = FakeTimer()
+    cache = sso.JWKSKeyCache(timer=timer)
+    key = cache.get("key1")
+    timer.now += 3601
+    sso_server["delay"] = 0.2
+    assert cache.get("key1") == key
+    assert cache.get("key1") == key
+    assert _wait_for(lambda: len(sso_server["requests"]) == 4)
+    assert _wait_for(lambda: cache._refreshed_at == timer.now)
+    assert len(sso_server["requests"]) == 4
+
+
+def test_get_public_key_from_token(sso_server):
+    sso.jwks_key_cache.clear()
+    token = jwt.encode(
+        {"aud": "dci"}, SSO_PRIVATE_KEY, algorithm="RS256", headers={"kid": "key1"}
+    ).decode("utf-8")
+    key = sso.get_public_key_from_token(token)
+    assert jwt.decode(token, key=key, audience="dci", algorithms=["RS256"])
+    sso.jwks_key_cache.clear()
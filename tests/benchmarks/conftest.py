@@ -0,0 +1,37 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import pytest
+
+_measures = []
+
+
+@pytest.fixture
+def benchmark_report():
+    """Adds a line to the measures printed at the end of the run, the
+    benchmarks do not assert on timings which depend on the machine."""
+
+    def report(line):
+        _measures.append(line)
+
+    return report
+
+
+def pytest_terminal_summary(terminalreporter):
+    if _measures:
+        terminalreporter.section("benchmarks")
+        for line in _measures:
+            terminalreporter.write_line(line)
@@ -0,0 +1,70 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+
+import pytest
+from sqlalchemy import event
+
+pytestmark = pytest.mark.benchmark
+
+NB_REQUESTS = 50
+
+
+def _get_put_job_latency(client, job_id):
+    etag = client.get("/api/v1/jobs/%s" % job_id).data["job"]["etag"]
+    start = time.perf_counter()
+    for i in range(NB_REQUESTS):
+        r = client.put(
+            "/api/v1/jobs/%s" % job_id,
+            data={"comment": "comment %s" % i},
+            headers={"If-match": etag},
+        )
+        assert r.status_code == 200
+        etag = r.data["job"]["etag"]
+    return (time.perf_counter() - start) / NB_REQUESTS * 1000
+
+
+def test_benchmark_audit_log_buffering(
+    app, engine, client_user1, team1_job_id, benchmark_report
+):
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(conn))
+    # warm up the connection pool and the caches
+    _get_put_job_latency(client_user1, team1_job_id)
+
+    app.audit_log.batch_size = 1
+    commits[:] = []
+    synchronous = _get_put_job_latency(client_user1, team1_job_id)
+    synchronous_commits = len(commits)
+
+    app.audit_log.batch_size = 100
+    app.audit_log.flush_interval = 60
+    commits[:] = []
+    buffered = _get_put_job_latency(client_user1, team1_job_id)
+    buffered_commits = len(commits)
+    app.audit_log.flush()
+
+    benchmark_report(
+        "PUT /jobs/<id>: %.2fms and %.1f commits per request with a buffered "
+        "audit log, %.2fms and %.1f commits synchronous"
+        % (
+            buffered,
+            buffered_commits / NB_REQUESTS,
+            synchronous,
+            synchronous_commits / NB_REQUESTS,
+        )
+    )
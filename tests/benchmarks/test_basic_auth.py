@@ -0,0 +1,53 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+
+import pytest
+from passlib.apps import custom_app_context
+
+from dci import auth
+
+pytestmark = pytest.mark.benchmark
+
+NB_REQUESTS = 5
+
+
+def _get_requests_per_second(client):
+    start = time.perf_counter()
+    for _ in range(NB_REQUESTS):
+        assert client.get("/api/v1/identity").status_code == 200
+    return NB_REQUESTS / (time.perf_counter() - start)
+
+
+def test_benchmark_basic_auth_credentials_cache(
+    app, client_user1, monkeypatch, benchmark_report
+):
+    # the session fixture memoize_password_hash makes the hash verification
+    # free, use a fresh context to pay the real cost of the hash
+    monkeypatch.setattr(auth, "pwd_context", custom_app_context.copy())
+
+    app.credentials_cache.clear()
+    with_cache = _get_requests_per_second(client_user1)
+
+    app.credentials_cache.clear()
+    monkeypatch.setattr(app.credentials_cache, "maxsize", 0)
+    without_cache = _get_requests_per_second(client_user1)
+
+    benchmark_report(
+        "basic auth: %.1f req/s with credentials cache, %.1f req/s without"
+        % (with_cache, without_cache)
+    )
@@ -0,0 +1,81 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import os
+import time
+
+import pytest
+
+from dci.common import compression
+from dci.common import utils
+from tests.benchmarks import test_json
+
+pytestmark = pytest.mark.benchmark
+
+DATA_DIR = test_json.DATA_DIR
+# bandwidth of the link between the api and its clients used to estimate the
+# transfer time, 10 Mbit/s
+BANDWIDTH = 10 * 1000 * 1000 / 8
+CHUNK_SIZE = 64 * 1024
+
+
+def get_bodies():
+    bodies = []
+    for name in sorted(os.listdir(DATA_DIR)):
+        if name.endswith(".xml"):
+            with open(os.path.join(DATA_DIR, name), "rb") as f:
+                bodies.append(("%s file" % name, f.read()))
+    for document in test_json.get_junit_documents():
+        body = json.dumps(document, cls=utils.JSONEncoder, separators=(",", ":"))
+        bodies.append(("%s results" % document["name"], body.encode()))
+    return bodies
+
+
+def _compress(encoding, body):
+    compressor = compression.get_compressors()[encoding]()
+    chunks = [body[i : i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE)]
+    start = time.perf_counter()
+    compressed = b"".join(compression._compress_iter(iter(chunks), compressor))
+    return compressed, time.perf_counter() - start
+
+
+def test_benchmark_compression(benchmark_report):
+    bodies = get_bodies()
+    total_size = sum(len(body) for _, body in bodies)
+    raw_transfer = total_size / BANDWIDTH
+    benchmark_report(
+        "%s junit bodies, %s bytes, %.1fms to transfer uncompressed"
+        % (len(bodies), total_size, raw_transfer * 1000)
+    )
+    for encoding in compression.get_compressors():
+        total_compressed = 0
+        total_time = 0
+        for name, body in bodies:
+            compressed, duration = _compress(encoding, body)
+            total_compressed += len(compressed)
+            total_time += duration
+        transfer = total_time + total_compressed / BANDWIDTH
+        benchmark_report(
+            "%s: %s bytes (%.1f%%), %.1fms to compress, %.1fms to transfer"
+            % (
+                encoding,
+                total_compressed,
+                total_compressed * 100.0 / total_size,
+                total_time * 1000,
+                transfer * 1000,
+            )
+        )
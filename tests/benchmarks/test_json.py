@@ -0,0 +1,77 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+import json
+import os
+import time
+import uuid
+
+import pytest
+
+from dci.api.v1 import junit
+from dci.common import json_encoders
+from dci.common import utils
+
+pytestmark = pytest.mark.benchmark
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+JUNIT_FILES = [
+    "tempest-results.xml",
+    "rally-results.xml",
+    "cki-results.xml",
+    "ansible-run-ovs-integration-tests.xml",
+]
+NB_ENCODINGS = 20
+
+
+def get_junit_documents():
+    documents = []
+    for name in JUNIT_FILES:
+        with open(os.path.join(DATA_DIR, name), "rb") as f:
+            testsuites = junit.get_testsuites_from_junit(f)
+        documents.append(
+            {
+                "id": uuid.uuid4(),
+                "name": name,
+                "created_at": datetime.datetime.utcnow(),
+                "job": {"id": uuid.uuid4(), "name": "job"},
+                "testsuites": junit.update_testsuites_with_testcase_changes(
+                    [], testsuites
+                ),
+            }
+        )
+    return documents
+
+
+def _time(encoder, documents):
+    start = time.perf_counter()
+    for _ in range(NB_ENCODINGS):
+        for document in documents:
+            json.dumps(document, cls=encoder, separators=(",", ":"), sort_keys=True)
+    return (time.perf_counter() - start) * 1000 / NB_ENCODINGS
+
+
+def test_benchmark_json_encoders(benchmark_report):
+    pytest.importorskip("orjson")
+    documents = get_junit_documents()
+    stdlib = min(_time(utils.JSONEncoder, documents) for _ in range(3))
+    orjson = min(_time(json_encoders.OrjsonEncoder, documents) for _ in range(3))
+
+    benchmark_report(
+        "encode %s junit documents: %.2fms with orjson, %.2fms with the stdlib"
+        % (len(documents), orjson, stdlib)
+    )
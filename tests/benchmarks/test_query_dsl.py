@@ -0,0 +1,56 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+
+import pytest
+
+from dci.db import models2
+from dci.db import query_dsl
+
+pytestmark = pytest.mark.benchmark
+
+NB_ITERATIONS = 200
+
+QUERIES = [
+    "eq(name,openshift-vanilla)",
+    "and(eq(name,openshift-vanilla),not_contains(tags,build:ga),not(null(url)))",
+    "and(eq(state,active),contains(tags,nightly),"
+    "or(eq(type,compose),eq(type,compose-noinstall)))",
+    "or(and(eq(name,ocp),or(eq(type,ocp),and(eq(state,active),not(null(url))))),"
+    "and(ge(created_at,2023-01-01),lt(created_at,2024-01-01),ilike(name,%ocp%)))",
+]
+
+
+def _get_duration(f, *args):
+    start = time.perf_counter()
+    for _ in range(NB_ITERATIONS):
+        f(*args)
+    return (time.perf_counter() - start) / NB_ITERATIONS
+
+
+def test_benchmark_query_dsl(session, benchmark_report):
+    query = session.query(models2.Component)
+    query_dsl.parse.cache_clear()
+    for q in QUERIES:
+        not_cached = _get_duration(query_dsl.parse.__wrapped__, q)
+        cached = _get_duration(query_dsl.parse, q)
+        parsed_query = query_dsl.parse(q)
+        build = _get_duration(query_dsl.build, query, parsed_query, models2.Component)
+        benchmark_report(
+            "%s\nparse: %.1fus, %.1fus cached, build: %.1fus"
+            % (q, not_cached * 1e6, cached * 1e6, build * 1e6)
+        )
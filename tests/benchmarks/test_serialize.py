@@ -0,0 +1,44 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+
+import pytest
+
+from tests.db.test_declarative import get_job_graph
+from tests.db.test_declarative import reflective_serialize
+
+pytestmark = pytest.mark.benchmark
+
+NB_JOBS = 200
+
+
+def _time(serialize, jobs):
+    start = time.perf_counter()
+    for job in jobs:
+        serialize(job, ignore_columns=["data"])
+    return (time.perf_counter() - start) * 1000
+
+
+def test_benchmark_serialize(benchmark_report):
+    jobs = get_job_graph(NB_JOBS)
+    reflective = min(_time(reflective_serialize, jobs) for _ in range(5))
+    compiled = min(_time(lambda j, **kw: j.serialize(**kw), jobs) for _ in range(5))
+
+    benchmark_report(
+        "serialize %s jobs: %.1fms compiled, %.1fms reflective"
+        % (NB_JOBS, compiled, reflective)
+    )
@@ -0,0 +1,60 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+from tests.test_app import DEFERRED_MODULES
+
+pytestmark = pytest.mark.benchmark
+
+STARTUP_SCRIPT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import dci.app
+imported = time.perf_counter()
+app = dci.app.create_app()
+created = time.perf_counter()
+loaded = sorted(m for m in %r if m in sys.modules)
+app.test_client().get("/api/v1")
+first_request = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (first_request - created) * 1000,
+    "loaded": loaded,
+}))
+""" % (
+    DEFERRED_MODULES,
+)
+
+
+def test_benchmark_startup(benchmark_report):
+    output = subprocess.check_output([sys.executable, "-c", STARTUP_SCRIPT])
+    startup = json.loads(output.decode("utf-8").splitlines()[-1])
+
+    benchmark_report(
+        "startup: import %(import_ms).1fms, create_app %(create_app_ms).1fms, "
+        "first request %(first_request_ms).1fms, deferred modules loaded: %(loaded)s"
+        % startup
+    )
@@ -68,6 +68,12 @@ def test_args_invalid_where_field():
         check_json_is_valid(args_schema, {"where": "f1"})
 
 
+def test_args_limit_requires_offset_or_cursor():
+    check_json_is_valid(args_schema, {"limit": "10", "cursor": ""})
+    with pytest.raises(DCIException):
+        check_json_is_valid(args_schema, {"limit": "10"})
+
+
 def test_parse_args():
     args = {
         "limit": "50",
@@ -75,6 +81,7 @@ def test_parse_args():
         "sort": "field_1,field_2",
         "where": "field_1:value_1,field_2:value_2",
         "embed": "resource_1,resource_2",
+        "fields": "id,name",
         "created_after": "2021-12-18T01:04:05.080452",
         "updated_after": "1640090291000",
     }
@@ -84,6 +91,7 @@ def test_parse_args():
         "sort": ["field_1", "field_2"],
         "where": ["field_1:value_1", "field_2:value_2"],
         "embed": ["resource_1", "resource_2"],
+        "fields": ["id", "name"],
         "created_after": datetime(2021, 12, 18, 1, 4, 5, 80452),
         "updated_after": datetime(2021, 12, 21, 12, 38, 11),
     }
@@ -0,0 +1,114 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from dci.common.cache import CacheGroup, TTLCache
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_get_and_set():
+    cache = TTLCache(10, 60)
+    assert cache.get("key") is None
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 10}
+
+
+def test_ttl_cache_entries_expire():
+    timer = FakeTimer()
+    cache = TTLCache(10, 60, timer=timer)
+    cache.set("key", "value")
+    cache.set("short", "value", ttl=5)
+    timer.now = 10
+    assert cache.get("short") is None
+    assert cache.get("key") == "value"
+    timer.now = 60
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_ttl_cannot_exceed_the_default_one():
+    timer = FakeTimer()
+    cache = TTLCache(10, 60, timer=timer)
+    cache.set("key", "value", ttl=3600)
+    timer.now = 60
+    assert cache.get("key") is None
+
+
+def test_ttl_cache_evicts_least_recently_used_entry():
+    cache = TTLCache(2, 60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_delete():
+    cache = TTLCache(10, 60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("c", 3)
+    cache.delete("a")
+    cache.delete("unknown")
+    cache.delete_if(lambda key, value: value == 2)
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_ttl_cache_disabled():
+    for cache in (TTLCache(0, 60), TTLCache(10, 0)):
+        assert not cache.enabled
+        cache.set("key", "value")
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+
+def test_cache_group_clears_the_caches_on_new_generation():
+    c1, c2 = TTLCache(10, 60), TTLCache(10, 60)
+    group = CacheGroup([c1, c2])
+    group.check_generation(3)
+    c1.set("a", 1)
+    c2.set("b", 2)
+    group.check_generation(3)
+    assert len(c1) == len(c2) == 1
+
+    # the process invalidated its own entries
+    group.set_generation(4)
+    group.check_generation(4)
+    assert len(c1) == len(c2) == 1
+
+    # another process invalidated entries
+    group.check_generation(5)
+    assert len(c1) == len(c2) == 0
+
+    # another process invalidated entries before this one
+    c1.set("a", 1)
+    group.set_generation(7)
+    assert group.generation == 5
+    group.check_generation(7)
+    assert len(c1) == 0
@@ -0,0 +1,145 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import gzip
+import json
+
+import flask
+import mock
+from werkzeug import test as werkzeug_test
+
+from dci.common import compression
+
+BODY = json.dumps({"jobs": [{"id": i, "name": "job %s" % i} for i in range(100)]})
+
+
+def _get_request(method="GET", accept_encoding="gzip"):
+    headers = {"Accept-Encoding": accept_encoding}
+    return werkzeug_test.EnvironBuilder(method=method, headers=headers).get_request(
+        flask.Request
+    )
+
+
+def _compress(response, method="GET", accept_encoding="gzip", min_size=1024):
+    return compression.compress_response(
+        _get_request(method, accept_encoding),
+        response,
+        ["zstd", "br", "gzip"],
+        min_size,
+    )
+
+
+def test_get_encoding():
+    accept = _get_request(accept_encoding="deflate, gzip;q=0.5").accept_encodings
+    assert compression.get_encoding(accept, ["zstd", "br", "gzip"]) == "gzip"
+    assert compression.get_encoding(accept, ["zstd", "br"]) is None
+
+    accept = _get_request(accept_encoding="gzip;q=0, identity").accept_encodings
+    assert compression.get_encoding(accept, ["gzip"]) is None
+
+    accept = _get_request(accept_encoding="*").accept_encodings
+    assert compression.get_encoding(accept, ["gzip"]) == "gzip"
+
+    with mock.patch.object(compression, "zstandard", mock.Mock()):
+        accept = _get_request(accept_encoding="gzip, zstd").accept_encodings
+        assert compression.get_encoding(accept, ["zstd", "gzip"]) == "zstd"
+        assert compression.get_encoding(accept, ["gzip", "zstd"]) == "gzip"
+        accept = _get_request(accept_encoding="gzip, zstd;q=0.9").accept_encodings
+        assert compression.get_encoding(accept, ["zstd", "gzip"]) == "gzip"
+
+
+def test_compress_response():
+    response = _compress(flask.Response(BODY, mimetype="application/json"))
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert int(response.headers["Content-Length"]) < len(BODY)
+    assert gzip.decompress(response.get_data()).decode() == BODY
+
+
+def test_compress_response_streamed():
+    chunks = [BODY[i : i + 100] for i in range(0, len(BODY), 100)]
+    response = flask.Response(iter(chunks), mimetype="application/json")
+    response = _compress(response)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(b"".join(response.response)).decode() == BODY
+
+
+def test_compress_response_weakens_the_etag():
+    response = flask.Response(BODY, mimetype="application/json")
+    response.headers["ETag"] = "1234"
+    assert _compress(response).headers["ETag"] == 'W/"1234"'
+
+    response = flask.Response(BODY, mimetype="application/json")
+    response.headers["ETag"] = "1234"
+    response = _compress(response, accept_encoding="identity")
+    assert response.headers["ETag"] == "1234"
+
+
+def test_compress_response_skipped():
+    response = _compress(flask.Response(BODY, mimetype="application/json"), "HEAD")
+    assert "Content-Encoding" not in response.headers
+    response = _compress(flask.Response(BODY), accept_encoding="identity")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    response = _compress(flask.Response(BODY), min_size=len(BODY) + 1)
+    assert "Content-Encoding" not in response.headers
+    for mimetype in ("application/gzip", "image/png", "video/mp4"):
+        response = _compress(flask.Response(BODY, mimetype=mimetype))
+        assert "Content-Encoding" not in response.headers
+        assert response.get_data().decode() == BODY
+    response = _compress(flask.Response(BODY, status=206))
+    assert "Content-Encoding" not in response.headers
+    response = _compress(flask.Response(BODY, headers={"Content-Encoding": "br"}))
+    assert response.headers["Content-Encoding"] == "br"
+
+
+def test_compressed_api_response(app, client_admin, team1_job_id):
+    app.config["COMPRESSION_MIN_SIZE"] = 0
+    response = app.test_client().get(
+        "/api/v1/jobs",
+        headers={
+            "Authorization": "Basic YWRtaW46YWRtaW4=",
+            "Accept-Encoding": "gzip",
+        },
+    )
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    jobs = json.loads(gzip.decompress(response.get_data()).decode())
+    assert jobs == client_admin.get("/api/v1/jobs").data
+
+
+def test_compressed_api_response_etag(app, client_admin, team1_job):
+    app.config["COMPRESSION_MIN_SIZE"] = 0
+    url = "/api/v1/jobs/%s" % team1_job["id"]
+    etag = team1_job["etag"]
+    headers = {"Authorization": "Basic YWRtaW46YWRtaW4=", "Accept-Encoding": "gzip"}
+    response = app.test_client().get(url, headers=headers)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == 'W/"%s"' % etag
+
+    for if_none_match in ('W/"%s"' % etag, etag):
+        response = app.test_client().get(
+            url, headers=dict(headers, **{"If-None-Match": if_none_match})
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == if_none_match
+
+    # the weak etag is accepted by If-Match
+    r = client_admin.put(
+        url, headers={"If-match": 'W/"%s"' % etag}, data={"comment": "new"}
+    )
+    assert r.status_code == 200
@@ -0,0 +1,94 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import datetime
+import json
+import os
+import uuid
+
+import mock
+import pytest
+
+from dci.api.v1 import junit
+from dci.common import json_encoders
+from dci.common import utils
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+DOCUMENTS = [
+    {
+        "id": uuid.UUID("6b4d2f1c-5f7e-4d2a-9b1e-2d6f3c0a8e11"),
+        "created_at": datetime.datetime(2021, 3, 4, 5, 6, 7, 89),
+        "updated_at": datetime.datetime(2021, 3, 4, 5, 6, 7),
+        "tags": ["a", "b"],
+        "data": {"z": 1, "a": [1.5, None, True]},
+    },
+    {"name": "café"},
+    {1: "integer key"},
+    {"big": 2**70},
+    [],
+]
+
+
+@pytest.mark.parametrize("document", DOCUMENTS)
+@pytest.mark.parametrize(
+    "options",
+    [
+        {"separators": (",", ":"), "sort_keys": True},
+        {"separators": (",", ":"), "ensure_ascii": False},
+        {"sort_keys": True},
+        {"indent": 2, "separators": (",", ": ")},
+    ],
+)
+def test_orjson_encoder_output(document, options):
+    pytest.importorskip("orjson")
+    expected = json.dumps(document, cls=utils.JSONEncoder, **options)
+    assert json.dumps(document, cls=json_encoders.OrjsonEncoder, **options) == (
+        expected
+    )
+
+
+@pytest.mark.parametrize(
+    "junit_file", ["tempest-results.xml", "rally-results.xml", "cki-results.xml"]
+)
+def test_orjson_encoder_output_junit(junit_file):
+    pytest.importorskip("orjson")
+    with open(os.path.join(DATA_DIR, junit_file), "rb") as f:
+        testsuites = junit.get_testsuites_from_junit(f)
+    document = {
+        "id": uuid.uuid4(),
+        "created_at": datetime.datetime.utcnow(),
+        "testsuites": junit.update_testsuites_with_testcase_changes([], testsuites),
+    }
+    expected = json.dumps(document, cls=utils.JSONEncoder, separators=(",", ":"))
+    actual = json.dumps(
+        document, cls=json_encoders.OrjsonEncoder, separators=(",", ":")
+    )
+    assert actual == expected
+
+
+def test_get_json_encoder():
+    assert json_encoders.get_json_encoder("stdlib") is utils.JSONEncoder
+    with pytest.raises(ValueError):
+        json_encoders.get_json_encoder("ujson")
+
+    with mock.patch.object(json_encoders, "orjson", None):
+        assert json_encoders.get_json_encoder("auto") is utils.JSONEncoder
+        with pytest.raises(ValueError):
+            json_encoders.get_json_encoder("orjson")
+
+    with mock.patch.object(json_encoders, "orjson", mock.Mock()):
+        assert json_encoders.get_json_encoder("auto") is json_encoders.OrjsonEncoder
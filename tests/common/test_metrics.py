@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) Red Hat, Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import os
+import subprocess
+import sys
+
+import mock
+import prometheus_client
+import pytest
+
+import dci.app
+from dci import dci_config
+from dci.common import metrics
+from tests import utils
+
+
+@pytest.fixture
+def metrics_app(app, engine):
+    with mock.patch.dict(dci_config.CONFIG, {"METRICS_ENABLED": True}):
+        metrics_app = dci.app.create_app()
+    metrics_app.engine = engine
+    return metrics_app
+
+
+def get_sample_value(name, labels=None):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels or {}) or 0
+
+
+def test_metrics_are_disabled_by_default(app):
+    assert app.test_client().get("/metrics").status_code == 404
+
+
+def test_metrics_are_restricted_to_the_allowed_networks(metrics_app):
+    resp = metrics_app.test_client().get(
+        "/metrics", environ_base={"REMOTE_ADDR": "10.0.0.1"}
+    )
+    assert resp.status_code == 403
+
+
+def test_metrics_are_restricted_to_the_forwarded_address(app, engine):
+    with mock.patch.dict(
+        dci_config.CONFIG, {"METRICS_ENABLED": True, "NB_TRUSTED_PROXIES": 1}
+    ):
+        metrics_app = dci.app.create_app()
+    metrics_app.engine = engine
+    client = metrics_app.test_client()
+
+    def get_metrics(forwarded_for):
+        return client.get(
+            "/metrics",
+            headers={"X-Forwarded-For": forwarded_for},
+            environ_base={"REMOTE_ADDR": "10.0.0.1"},
+        )
+
+    assert get_metrics("127.0.0.1").status_code == 200
+    # the first address is set by the client, only the proxy one is trusted
+    assert get_metrics("127.0.0.1, 10.0.0.2").status_code == 403
+
+
+def test_metrics_ignore_the_forwarded_address_by_default(metrics_app):
+    resp = metrics_app.test_client().get(
+        "/metrics",
+        headers={"X-Forwarded-For": "127.0.0.1"},
+        environ_base={"REMOTE_ADDR": "10.0.0.1"},
+    )
+    assert resp.status_code == 403
+
+
+@pytest.mark.parametrize("propagate_exceptions", [False, True])
+def test_metrics_record_the_failed_requests(metrics_app, propagate_exceptions):
+    # when the exception is propagated no response is processed
+    metrics_app.config["PROPAGATE_EXCEPTIONS"] = propagate_exceptions
+
+    @metrics_app.route("/failure")
+    def failure():
+        raise RuntimeError("failure")
+
+    labels = {
+        "blueprint": "none",
+        "endpoint": "failure",
+        "method": "GET",
+        "status": "500",
+    }
+    nb_requests = get_sample_value("dci_request_duration_seconds_count", labels)
+    in_flight = get_sample_value("dci_requests_in_flight")
+    if propagate_exceptions:
+        with pytest.raises(RuntimeError):
+            metrics_app.test_client().get("/failure")
+    else:
+        assert metrics_app.test_client().get("/failure").status_code == 500
+    assert get_sample_value("dci_request_duration_seconds_count", labels) == (
+        nb_requests + 1
+    )
+    assert get_sample_value("dci_requests_in_flight") == in_flight
+
+
+def test_metrics(metrics_app):
+    labels = {
+        "blueprint": "api_v1",
+        "endpoint": "api_v1.get_all_jobs",
+        "method": "GET",
+        "status": "200",
+    }
+    nb_requests = get_sample_value("dci_request_duration_seconds_count", labels)
+    client = utils.generate_client(metrics_app, ("admin", "admin"))
+    assert client.get("/api/v1/jobs").status_code == 200
+
+    resp = metrics_app.test_client().get("/metrics")
+    assert resp.status_code == 200
+    assert resp.content_type == metrics.get_content_type()
+    content = resp.data.decode("utf-8")
+    for name in (
+        "dci_requests_in_flight",
+        "dci_db_pool_size",
+        "dci_db_pool_checked_out",
+        "dci_db_pool_overflow",
+        "dci_db_pool_checkout_wait_seconds_count",
+        "dci_kombu_messages_queued",
+    ):
+        assert name in content
+    assert get_sample_value("dci_request_duration_seconds_count", labels) == (
+        nb_requests + 1
+    )
+    assert get_sample_value("dci_db_pool_size") == metrics_app.engine.pool.size()
+
+
+def test_measured_store():
+    metrics.enable()
+    store = mock.Mock()
+    store.upload.return_value = "uploaded"
+    measured_store = metrics.MeasuredStore(store)
+    labels = {"store": "Mock", "operation": "upload"}
+    count = get_sample_value("dci_store_operation_duration_seconds_count", labels)
+
+    assert measured_store.upload("files", "path", b"content") == "uploaded"
+    store.upload.assert_called_once_with("files", "path", b"content")
+    assert get_sample_value("dci_store_operation_duration_seconds_count", labels) == (
+        count + 1
+    )
+
+
+def test_metrics_are_aggregated_across_workers(tmpdir, monkeypatch):
+    env = dict(os.environ, prometheus_multiproc_dir=str(tmpdir))
+    for _ in range(2):
+        subprocess.check_call(
+            [
+                sys.executable,
+                "-c",
+                "from dci.common import metrics; "
+                "metrics.enable(); metrics.inc_messages_published()",
+            ],
+            env=env,
+        )
+
+    monkeypatch.setenv("prometheus_multiproc_dir", str(tmpdir))
+    metrics.enable()
+    content = metrics.generate_latest().decode("utf-8")
+    assert "dci_kombu_messages_published_total 2.0" in content
@@ -0,0 +1,84 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+import dci.app
+from dci import dci_config
+from dci.common import timing
+from tests import utils
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_request_timings():
+    timer = FakeTimer()
+    timings = timing.RequestTimings(timer=timer)
+    with timings.measure("auth"):
+        timer.now += 0.002
+    timings.add("sql", 0.001)
+    timings.add("sql", 0.0005)
+    timings.sql_count = 2
+    timer.now += 0.001
+
+    assert timings.to_dict() == {
+        "auth_ms": 2.0,
+        "sql_ms": 1.5,
+        "sql_count": 2,
+        "total_ms": 3.0,
+    }
+    assert timings.get_server_timing_header() == (
+        'auth;dur=2.000, sql;dur=1.500, sql_count;desc="2", total;dur=3.000'
+    )
+
+
+def test_measure_without_request_timings(app):
+    with app.test_request_context():
+        with timing.measure("auth"):
+            pass
+
+
+def test_server_timing_is_disabled_by_default(client_admin):
+    resp = client_admin.get("/api/v1/jobs")
+    assert resp.status_code == 200
+    assert "Server-Timing" not in resp.headers
+
+
+def test_server_timing_header(app, engine):
+    with mock.patch.dict(dci_config.CONFIG, {"SERVER_TIMING": True}):
+        timed_app = dci.app.create_app()
+    timed_app.engine = engine
+    client = utils.generate_client(timed_app, ("admin", "admin"))
+
+    with mock.patch.object(timing.logger, "info") as m_info:
+        resp = client.get("/api/v1/jobs")
+    assert resp.status_code == 200
+
+    metrics = dict(
+        metric.strip().split(";", 1)
+        for metric in resp.headers["Server-Timing"].split(",")
+    )
+    assert {"auth", "sql", "json", "sql_count", "total"} <= set(metrics)
+    assert metrics["sql_count"] != 'desc="0"'
+    log_fields = m_info.call_args[1]["extra"]["timings"]
+    assert log_fields["path"] == "/api/v1/jobs"
+    assert log_fields["sql_count"] > 0
@@ -17,6 +17,7 @@
 import dci.app
 from dci import dci_config
 from dci.db import models2
+from dci.db import replicas
 import tests.utils as utils
 import tests.sso_tokens as sso_tokens
 
@@ -24,9 +25,35 @@ from passlib.apps import custom_app_context as pwd_context
 import contextlib
 import pytest
 import sqlalchemy_utils.functions
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--benchmark",
+        action="store_true",
+        default=False,
+        help="run the benchmarks of tests/benchmarks",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: measures reported at the end of the run"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    # the benchmarks measure timings, they are only run on demand
+    if config.getoption("--benchmark"):
+        return
+    deselected = [item for item in items if "benchmark" in item.keywords]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if "benchmark" not in item.keywords]
+
+
 @pytest.fixture(scope="session")
 def engine(request):
     utils.rm_upload_folder()
@@ -109,6 +136,35 @@ def app(db_provisioning, engine, fs_clean):
     return app
 
 
+@pytest.fixture
+def read_only_replica(app, engine):
+    """Replica of the database of app on which nothing can be written."""
+    replica = dci_config.get_engine(engine.url)
+
+    @event.listens_for(replica, "connect")
+    def set_read_only(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+        cursor.close()
+        # the transaction opened by psycopg2 for the SET is still read write
+        dbapi_connection.commit()
+
+    app.replicas = replicas.ReplicaRouter([replica])
+    yield replica
+    replica.dispose()
+
+
+@pytest.fixture
+def other_app(app, engine):
+    """Application of another process, with its own caches, sharing the
+    database of app."""
+    other_app = dci.app.create_app()
+    other_app.testing = True
+    other_app.engine = engine
+    other_app.messaging.publish = lambda x: None
+    return other_app
+
+
 # Clients
 # Clients basic auth
 @pytest.fixture
@@ -0,0 +1,136 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import time
+
+from sqlalchemy import event
+from sqlalchemy import sql
+
+from dci import dci_config
+from dci.db import audit_log
+from dci.db import models2
+from dci.db import replicas
+
+
+def count_inserts(engine):
+    inserts = []
+
+    def before_execute(conn, clauseelement, multiparams, params):
+        if isinstance(clauseelement, sql.Insert) and clauseelement.table.name == "logs":
+            inserts.append(clauseelement)
+
+    event.listen(engine, "before_execute", before_execute)
+    return inserts
+
+
+def wait_for(predicate, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_entries_are_inserted_by_batch(engine, session, admin_id):
+    inserts = count_inserts(engine)
+    writer = audit_log.AuditLogWriter(lambda: engine, batch_size=3, flush_interval=60)
+    for action in ("a1", "a2", "a3"):
+        writer.add(admin_id, action, session)
+
+    assert wait_for(lambda: session.query(models2.Log).count() == 3)
+    assert len(inserts) == 1
+    actions = [log.action for log in session.query(models2.Log).all()]
+    assert sorted(actions) == ["a1", "a2", "a3"]
+
+
+def test_entries_are_inserted_after_the_flush_interval(engine, session, admin_id):
+    writer = audit_log.AuditLogWriter(
+        lambda: engine, batch_size=100, flush_interval=0.1
+    )
+    writer.add(admin_id, "a1", session)
+
+    assert wait_for(lambda: session.query(models2.Log).count() == 1)
+
+
+def test_flush_keeps_the_entries_on_failure(engine, session, admin_id):
+    def get_unreachable_engine():
+        raise Exception("database unreachable")
+
+    writer = audit_log.AuditLogWriter(get_unreachable_engine, batch_size=100)
+    writer._start = lambda: None
+    writer.add(admin_id, "a1", session)
+    assert writer.flush() is False
+
+    writer._get_engine = lambda: engine
+    assert writer.flush() is True
+    assert session.query(models2.Log).count() == 1
+
+
+def test_synchronous_writes(engine, session, admin_id):
+    inserts = count_inserts(engine)
+    writer = audit_log.AuditLogWriter(lambda: engine, batch_size=1)
+    writer.add(admin_id, "a1", session)
+
+    assert writer._thread is None
+    assert session.query(models2.Log).count() == 1
+    assert len(inserts) == 1
+
+
+def test_buffered_entries_are_not_committed_by_the_requests(
+    app, engine, client_user1, team1_job_id
+):
+    commits = []
+    event.listen(engine, "commit", lambda conn: commits.append(conn))
+
+    def update_job(nb_requests):
+        etag = client_user1.get("/api/v1/jobs/%s" % team1_job_id).data["job"]["etag"]
+        commits[:] = []
+        for i in range(nb_requests):
+            r = client_user1.put(
+                "/api/v1/jobs/%s" % team1_job_id,
+                data={"comment": "comment %s" % i},
+                headers={"If-match": etag},
+            )
+            assert r.status_code == 200
+            etag = r.data["job"]["etag"]
+        return len(commits)
+
+    app.audit_log.batch_size = 1
+    synchronous_commits = update_job(5)
+    app.audit_log.batch_size = 100
+    app.audit_log.flush_interval = 60
+    buffered_commits = update_job(5)
+    app.audit_log.flush()
+
+    assert synchronous_commits - buffered_commits == 5
+
+
+def test_get_audits_flushes_the_buffer(app, engine, client_admin, client_epm):
+    app.audit_log.batch_size = 100
+    app.audit_log.flush_interval = 60
+    client_epm.post("/api/v1/teams", data={"name": "partner"})
+
+    replica = dci_config.get_engine(engine.url)
+    app.replicas = replicas.ReplicaRouter([replica])
+    checkouts = []
+    event.listen(engine, "checkout", lambda *args: checkouts.append(args))
+    event.listen(replica, "checkout", lambda *args: checkouts.append(args))
+
+    audits = client_admin.get("/api/v1/audits").data["audits"]
+    assert [a["action"] for a in audits] == ["create_teams"]
+    # flushed and read with the request connection to the primary
+    assert len(checkouts) == 1
+    assert replica.pool.checkedin() == 0
+    replica.dispose()
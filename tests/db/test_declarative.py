@@ -15,7 +15,11 @@
 # under the License.
 
 from dci.db import declarative as d
+from dci.db import models2
+from sqlalchemy.orm.attributes import set_committed_value
+import datetime
 import mock
+import uuid
 
 
 def test_handle_pagination():
@@ -30,3 +34,131 @@ def test_handle_pagination():
     d.handle_pagination(m, {"limit": 300, "offset": 12})
     m.offset.assert_called_once_with(12)
     m.limit.assert_called_once_with(200)
+
+
+def test_serialize(session, user1_id):
+    user = session.query(models2.User).filter(models2.User.id == user1_id).one()
+    user.remotecis
+    user.team
+
+    serialized = user.serialize(ignore_columns=["remotecis.api_secret"])
+    assert serialized["id"] == user1_id
+    assert isinstance(serialized["created_at"], str)
+    assert "password" not in serialized
+    assert serialized["team"][0]["id"] == str(user.team[0].id)
+    for remoteci in serialized["remotecis"]:
+        assert "api_secret" not in remoteci
+    # relationships which are not loaded are not serialized
+    assert "users" not in serialized["team"][0]
+
+
+def reflective_serialize(obj, ignore_columns=[]):
+    """The former Mixin.serialize which inspected every attribute."""
+    nested_ignore_columns = {}
+    for ic in ignore_columns:
+        if "." in ic:
+            k, v = ic.split(".")
+            nested_ignore_columns.setdefault(k, []).append(v)
+    _dict = {}
+    for attr in obj.__dict__.keys():
+        if attr in ignore_columns:
+            continue
+        attr_obj = getattr(obj, attr)
+        if isinstance(attr_obj, list):
+            _dict[attr] = []
+            for ao in attr_obj:
+                if isinstance(ao, d.Mixin):
+                    _dict[attr].append(
+                        reflective_serialize(ao, nested_ignore_columns.get(attr, []))
+                    )
+                else:
+                    _dict[attr].append(ao)
+        elif isinstance(attr_obj, d.Mixin):
+            _dict[attr] = reflective_serialize(
+                attr_obj, nested_ignore_columns.get(attr, [])
+            )
+        elif isinstance(attr_obj, uuid.UUID):
+            _dict[attr] = str(attr_obj)
+        elif isinstance(attr_obj, datetime.datetime):
+            _dict[attr] = attr_obj.isoformat()
+        elif not attr.startswith("_"):
+            _dict[attr] = obj.__dict__[attr]
+    return _dict
+
+
+def _get_dates(etag=True):
+    now = datetime.datetime.utcnow()
+    dates = {"id": uuid.uuid4(), "created_at": now, "updated_at": now}
+    if etag:
+        dates["etag"] = "etag"
+    return dates
+
+
+def get_job_graph(nb_jobs=3):
+    team = models2.Team(name="team", state="active", **_get_dates())
+    topic = models2.Topic(
+        name="RHEL-8.4", component_types=["Compose"], data={}, **_get_dates()
+    )
+    remoteci = models2.Remoteci(
+        name="remoteci", team_id=team.id, data={"key": "value"}, **_get_dates()
+    )
+    pipeline = models2.Pipeline(name="pipeline", team_id=team.id, **_get_dates())
+    components = [
+        models2.Component(
+            name="component %s" % i,
+            type="Compose",
+            tags=["build:ga"],
+            data={"url": "http://example.com"},
+            topic_id=topic.id,
+            **_get_dates()
+        )
+        for i in range(3)
+    ]
+    jobs = []
+    for i in range(nb_jobs):
+        job = models2.Job(
+            name="job %s" % i,
+            comment="",
+            status="success",
+            tags=["daily"],
+            data={"config": "value"},
+            team_id=team.id,
+            topic_id=topic.id,
+            remoteci_id=remoteci.id,
+            pipeline_id=pipeline.id,
+            previous_job_id=None,
+            duration=120,
+            **_get_dates()
+        )
+        # set as if loaded from the database, without the backrefs events
+        set_committed_value(job, "team", team)
+        set_committed_value(job, "topic", topic)
+        set_committed_value(job, "remoteci", remoteci)
+        set_committed_value(job, "pipeline", pipeline)
+        set_committed_value(job, "components", components)
+        results = [
+            models2.TestsResult(
+                name="result %s" % r,
+                total=100,
+                success=98,
+                failures=2,
+                **_get_dates(etag=False)
+            )
+            for r in range(2)
+        ]
+        set_committed_value(job, "results", results)
+        keys_values = [
+            models2.JobKeyValue(key="k%s" % k, value=float(k), job_id=job.id)
+            for k in range(2)
+        ]
+        set_committed_value(job, "keys_values", keys_values)
+        jobs.append(job)
+    return jobs
+
+
+def test_serialize_matches_the_reflective_serialization():
+    for job in get_job_graph():
+        assert job.serialize(ignore_columns=["data"]) == reflective_serialize(
+            job, ignore_columns=["data"]
+        )
+        assert job.remoteci.serialize() == reflective_serialize(job.remoteci)
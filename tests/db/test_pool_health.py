@@ -0,0 +1,137 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright 2015-2016 Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+import pytest
+import sqlalchemy
+from sqlalchemy import exc as sa_exc
+from sqlalchemy import pool
+
+from dci.common import exceptions as dci_exc
+from dci.db import pool_health
+from dci.db import request_connection
+
+
+class FakeTimer(object):
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_circuit_breaker_opens_after_threshold():
+    timer = FakeTimer()
+    breaker = pool_health.CircuitBreaker(2, 10, timer=timer)
+
+    breaker.before_checkout()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.before_checkout()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    timer.now += 4
+    with pytest.raises(dci_exc.ServiceUnavailable) as e:
+        breaker.before_checkout()
+    assert e.value.status_code == 503
+    assert e.value.headers == {"Retry-After": "6"}
+
+
+def test_circuit_breaker_lets_a_single_trial_through_once_reset():
+    timer = FakeTimer()
+    breaker = pool_health.CircuitBreaker(1, 10, timer=timer)
+    breaker.record_failure()
+
+    timer.now += 10
+    assert breaker.state == "half-open"
+    breaker.before_checkout()
+    with pytest.raises(dci_exc.ServiceUnavailable):
+        breaker.before_checkout()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    timer.now += 10
+    breaker.before_checkout()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    breaker.before_checkout()
+
+
+def test_circuit_breaker_success_resets_failures():
+    breaker = pool_health.CircuitBreaker(2, 10, timer=FakeTimer())
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_pool_metrics(engine):
+    metrics = pool_health.PoolMetrics(engine.pool)
+    metrics.observe_checkout(0.5)
+    metrics.observe_checkout(0.1)
+
+    with engine.connect():
+        stats = metrics.stats()
+        assert stats["checked_out"] == engine.pool.checkedout() > 0
+    assert stats["size"] == engine.pool.size()
+    assert stats["overflow"] == max(0, engine.pool.overflow())
+    assert stats["checkouts"] == 2
+    assert stats["checkout_wait_seconds_sum"] == pytest.approx(0.6)
+    assert stats["checkout_wait_seconds_max"] == 0.5
+
+
+def test_pre_ping_replaces_connections_closed_by_the_database(engine):
+    with engine.connect() as connection:
+        pid = connection.scalar("SELECT pg_backend_pid()")
+    # the pooled connection is killed while it is checked in
+    other_engine = sqlalchemy.create_engine(engine.url, poolclass=pool.NullPool)
+    other_engine.execute("SELECT pg_terminate_backend(%s)" % pid)
+
+    with engine.connect() as connection:
+        assert connection.scalar("SELECT pg_backend_pid()") != pid
+
+
+def test_circuit_breaker_cancelled_trial_lets_another_one_through():
+    timer = FakeTimer()
+    breaker = pool_health.CircuitBreaker(1, 10, timer=timer)
+    breaker.record_failure()
+
+    timer.now += 10
+    breaker.before_checkout()
+    breaker.cancel_checkout()
+    assert breaker.state == "half-open"
+    breaker.before_checkout()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_request_connection_non_database_failure_during_trial():
+    timer = FakeTimer()
+    engine = mock.Mock()
+    engine.circuit_breaker = pool_health.CircuitBreaker(1, 10, timer=timer)
+    engine.circuit_breaker.record_failure()
+    timer.now += 10
+
+    engine.connect.side_effect = sa_exc.TimeoutError("QueuePool limit reached")
+    with pytest.raises(sa_exc.TimeoutError):
+        request_connection.RequestConnection(engine).connection()
+    assert engine.circuit_breaker.state == "half-open"
+
+    engine.connect.side_effect = None
+    request_connection.RequestConnection(engine).connection()
+    assert engine.circuit_breaker.state == "closed"
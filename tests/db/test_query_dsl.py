@@ -14,6 +14,8 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+from dci.common import exceptions as dci_exc
+from dci.db import models2
 from dci.db import query_dsl
 
 import pyparsing as pp
@@ -81,3 +83,19 @@ def test_nrt_query_with_url():
     assert ret == [
         ["eq", "url", "https://github.com/dci-labs/partner-lab-config/pull/63"]
     ]
+
+
+def test_parse_is_cached():
+    query_dsl.parse.cache_clear()
+    q = "or(eq(type,compose),eq(type,compose-noinstall))"
+    assert query_dsl.parse(q) is query_dsl.parse(q)
+    assert query_dsl.parse.cache_info().hits == 1
+    for _ in range(2):
+        with pytest.raises(pp.ParseException):
+            query_dsl.parse("toto")
+
+
+def test_build_invalid_field(session):
+    query = session.query(models2.Component)
+    with pytest.raises(dci_exc.DCIException):
+        query_dsl.build(query, query_dsl.parse("eq(toto,1)"), models2.Component)
@@ -0,0 +1,66 @@
+# -*- encoding: utf-8 -*-
+#
+# Copyright Red Hat, Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import mock
+
+from dci import decorators
+from dci.db import pool_health
+from dci.db import replicas
+
+
+def get_replica(name):
+    replica = mock.Mock(name=name)
+    replica.circuit_breaker = pool_health.CircuitBreaker(1, 10)
+    return replica
+
+
+def test_replica_router_round_robin():
+    r1, r2, r3 = get_replica("r1"), get_replica("r2"), get_replica("r3")
+    router = replicas.ReplicaRouter([r1, r2, r3])
+
+    assert router.get_engines() == [r1, r2, r3]
+    assert router.get_engines() == [r2, r3, r1]
+    assert router.get_engines() == [r3, r1, r2]
+    assert router.get_engines() == [r1, r2, r3]
+
+
+def test_replica_router_skips_unhealthy_replicas():
+    r1, r2 = get_replica("r1"), get_replica("r2")
+    router = replicas.ReplicaRouter([r1, r2])
+
+    r1.circuit_breaker.record_failure()
+    assert router.get_engines() == [r2]
+    assert router.get_engines() == [r2]
+
+
+def test_replica_router_without_replicas():
+    router = replicas.ReplicaRouter([])
+    assert not router
+    assert router.get_engines() == []
+
+
+def test_is_read_only():
+    def view():
+        pass
+
+    @decorators.primary_database
+    def primary_view():
+        pass
+
+    assert replicas.is_read_only(mock.Mock(method="GET"), view)
+    assert replicas.is_read_only(mock.Mock(method="HEAD"), view)
+    assert not replicas.is_read_only(mock.Mock(method="POST"), view)
+    assert not replicas.is_read_only(mock.Mock(method="GET"), primary_view)
@@ -63,3 +63,6 @@ dn/RsYEONbwQSjIfMPkvxF+8HQ==
 """
 
 SSO_REALM = "redhat-external"
+
+# the tests read the audit log straight from the database
+AUDIT_LOG_BATCH_SIZE = 1